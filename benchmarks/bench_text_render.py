@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+썸네일 텍스트 렌더링 마이크로 벤치마크
+
+기존 방식 (오프셋 격자마다 draw.text + 매 축소마다 폰트 재로딩)과
+text_render (stroke 1회 + 폰트 캐시 + 이진 탐색) 비교
+
+    python benchmarks/bench_text_render.py [--runs 20]
+"""
+
+import os
+import sys
+import time
+import argparse
+from statistics import median
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from PIL import Image, ImageDraw, ImageFont
+import text_render
+
+TEXTS = ['AI 2030', 'QUANTUM LEAP', 'AI REVOLUTION', 'THE NEXT LEVEL AI']
+
+def legacy_render(img, text):
+    """기존 add_text_to_thumbnail 구현 (비교용)"""
+    draw = ImageDraw.Draw(img)
+    width, height = img.size
+    margin = int(width * 0.1)
+    max_text_width = width - (margin * 2)
+    font_size = int(width / 10)
+
+    def load(size):
+        try:
+            return ImageFont.truetype(text_render.FONT_CANDIDATES[0], size)
+        except OSError:
+            return ImageFont.load_default()
+
+    font = load(font_size)
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_width = bbox[2] - bbox[0]
+
+    retry_count = 0
+    while text_width > max_text_width and retry_count < 5:
+        font_size = int(font_size * 0.85)
+        font = load(font_size)
+        bbox = draw.textbbox((0, 0), text, font=font)
+        text_width = bbox[2] - bbox[0]
+        retry_count += 1
+
+    x = (width - text_width) / 2
+    x = max(margin, min(x, width - margin - text_width))
+    y = height / 4
+
+    outline_width = max(8, int(font_size / 20))
+    for offset_x in range(-outline_width, outline_width + 1):
+        for offset_y in range(-outline_width, outline_width + 1):
+            if offset_x != 0 or offset_y != 0:
+                draw.text((x + offset_x, y + offset_y), text, font=font, fill=(0, 0, 0))
+    draw.text((x, y), text, font=font, fill=(255, 255, 255))
+
+def new_render(img, text):
+    text_render.draw_outlined_text(img, text, y_frac=0.25)
+
+def bench(fn, base, runs):
+    timings = []
+    for _ in range(runs):
+        for text in TEXTS:
+            img = base.copy()
+            start = time.perf_counter()
+            fn(img, text)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    base = Image.new('RGB', (args.width, args.height), (20, 30, 60))
+
+    # 워밍업 (폰트 캐시 포함 - 파이프라인에서도 프로세스 내 재사용)
+    bench(new_render, base, 1)
+
+    results = {
+        'legacy (grid outline)': bench(legacy_render, base, args.runs),
+        'text_render (stroke)': bench(new_render, base, args.runs),
+    }
+
+    print(f"\n📊 Text render benchmark ({args.width}x{args.height}, {len(TEXTS)} texts x {args.runs} runs)")
+    for name, timings in results.items():
+        print(f"   {name:24s} median {median(timings) * 1000:8.2f} ms   "
+              f"max {max(timings) * 1000:8.2f} ms")
+
+    legacy = median(results['legacy (grid outline)'])
+    new = median(results['text_render (stroke)'])
+    print(f"   ⚡ Speedup: {legacy / new:.1f}x")
+
+if __name__ == '__main__':
+    main()
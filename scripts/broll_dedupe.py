@@ -0,0 +1,159 @@
+"""
+B-roll 후보 중복 제거 (영상 다운로드 전)
+
+- 1차: Pexels 영상 id
+- 2차: 검색 응답의 video_pictures 미리보기 이미지로 계산한 dHash (NumPy)
+  → 다른 키워드로 검색된 같은/거의 같은 영상을 바이트 다운로드 없이 걸러냄
+- 해시는 cache/broll_hashes.json에 id별로 저장 → 다음 실행에서는 미리보기도 다시 받지 않음
+  (id가 없는 항목은 미리보기 URL 또는 파일 경로로 저장)
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import numpy as np
+import requests
+from PIL import Image
+
+HASH_INDEX_PATH = os.environ.get('BROLL_HASH_INDEX', 'cache/broll_hashes.json')
+
+HASH_SIZE = 8                  # 8x8 = 64비트 dHash
+PICTURES_PER_VIDEO = 3         # 영상당 비교할 미리보기 수 (처음/중간/끝)
+MAX_HAMMING = 10               # 64비트 중 이 이하 차이면 같은 장면
+MATCH_RATIO = 0.5              # 미리보기 중 이 비율 이상 일치하면 중복 영상
+
+def load_hash_index():
+    """{hash_key(): [hex 해시, ...]}"""
+    if not os.path.exists(HASH_INDEX_PATH):
+        return {}
+    try:
+        with open(HASH_INDEX_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️ Ignoring unreadable hash index: {e}")
+        return {}
+
+def save_hash_index(index):
+    os.makedirs(os.path.dirname(HASH_INDEX_PATH) or '.', exist_ok=True)
+    tmp_path = f'{HASH_INDEX_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, HASH_INDEX_PATH)
+
+def hash_key(video):
+    """해시 인덱스 키: Pexels id, 없으면 첫 미리보기 URL / 파일 경로 (모두 없으면 None)"""
+    if video.get('id') is not None:
+        return str(video['id'])
+    pictures = video.get('pictures') or []
+    if pictures:
+        return f'preview:{pictures[0]}'
+    segments = video.get('segments') or []
+    path = video.get('path') or (segments[0]['path'] if segments else None)
+    if path:
+        return f'path:{path}'
+    return None
+
+def dhash(img, hash_size=HASH_SIZE):
+    """가로 방향 밝기 차이 기반 64비트 perceptual hash"""
+    gray = img.convert('L').resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(gray, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int(np.packbits(bits).view('>u8')[0])
+
+def pick_pictures(pictures, count=PICTURES_PER_VIDEO):
+    """미리보기 중 처음/중간/끝 (같은 간격으로) 선택"""
+    if len(pictures) <= count:
+        return list(pictures)
+    positions = np.linspace(0, len(pictures) - 1, count).round().astype(int)
+    return [pictures[i] for i in positions]
+
+def _fetch_hash(url):
+    response = requests.get(url, timeout=10)
+    response.raise_for_status()
+    img = Image.open(BytesIO(response.content))
+    img.draft('L', (64, 64))
+    return dhash(img)
+
+def _safe_fetch_hash(url):
+    try:
+        return _fetch_hash(url)
+    except Exception as e:
+        print(f"   ⚠️ Preview hash failed: {e}")
+        return None
+
+def compute_hashes(videos, max_workers=8):
+    """여러 영상의 미리보기 해시를 한 번에 병렬 계산 → [해시 목록, ...]"""
+    jobs = [(i, url) for i, video in enumerate(videos)
+            for url in pick_pictures(video.get('pictures') or [])]
+
+    results = [[] for _ in videos]
+    if not jobs:
+        return results
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        hashes = executor.map(_safe_fetch_hash, [url for _, url in jobs])
+        for (i, _), value in zip(jobs, hashes):
+            if value is not None:
+                results[i].append(value)
+    return results
+
+def hamming_matrix(hashes, others):
+    """(len(hashes), len(others)) 해밍 거리 행렬"""
+    a = np.array(hashes, dtype=np.uint64)[:, None]
+    b = np.array(others, dtype=np.uint64)[None, :]
+    xor = (a ^ b).astype('>u8')
+    return np.unpackbits(xor.view(np.uint8).reshape(*xor.shape, 8), axis=-1).sum(axis=-1)
+
+def is_near_duplicate(hashes, seen_hashes):
+    """미리보기의 MATCH_RATIO 이상이 이미 선택된 영상 장면과 일치하면 중복"""
+    if not hashes or not seen_hashes:
+        return False
+    distances = hamming_matrix(hashes, seen_hashes)
+    matched = (distances.min(axis=1) <= MAX_HAMMING).sum()
+    return matched / len(hashes) >= MATCH_RATIO
+
+def dedupe_candidates(videos):
+    """
+    Pexels id와 미리보기 perceptual hash로 후보 중복 제거 (순서 유지)
+
+    videos: search_pexels_videos()의 항목 ('id', 'pictures' 포함)
+    """
+    # 1차: 같은 id 제거
+    by_id = []
+    seen_ids = set()
+    for video in videos:
+        video_id = video.get('id')
+        if video_id is not None:
+            if video_id in seen_ids:
+                continue
+            seen_ids.add(video_id)
+        by_id.append(video)
+    dropped_ids = len(videos) - len(by_id)
+
+    # 인덱스에 없는 영상만 미리보기를 받아 해시 계산
+    index = load_hash_index()
+    missing = [v for v in by_id if v.get('pictures') and hash_key(v) not in index]
+    if missing:
+        print(f"   🔎 Hashing previews for {len(missing)} videos...")
+        for video, hashes in zip(missing, compute_hashes(missing)):
+            if hashes:
+                index[hash_key(video)] = [f'{h:016x}' for h in hashes]
+        save_hash_index(index)
+
+    # 2차: 이미 선택된 영상과 장면이 겹치면 제거
+    unique = []
+    seen_hashes = []
+    for video in by_id:
+        key = hash_key(video)
+        hashes = [int(h, 16) for h in index.get(key, [])] if key else []
+        if is_near_duplicate(hashes, seen_hashes):
+            print(f"   ♻️  Near-duplicate skipped: {video.get('keyword')} (id {video.get('id')})")
+            continue
+        seen_hashes.extend(hashes)
+        unique.append(video)
+
+    dropped_similar = len(by_id) - len(unique)
+    print(f"   🧹 Dedupe: {len(videos)} → {len(unique)} "
+          f"(same id: {dropped_ids}, near-duplicate: {dropped_similar})")
+    return unique
@@ -0,0 +1,298 @@
+"""
+처리량 기반 적응형 B-roll 다운로더
+
+- 동시 다운로드 수를 AIMD로 조절: 전체 처리량(bytes/s)이 유지/증가하면 +1, 떨어지거나 오류가 나면 절반
+- 재시도는 지수 백오프 + full jitter (고정 2초 대기 대신)
+- 전송 속도가 완료된 전송의 중앙값보다 크게 낮으면 다른 렌디션(없으면 같은 URL)으로
+  hedged 요청을 추가로 보내고, 먼저 끝난 쪽을 사용
+- AdaptiveDownloader를 순회하면 완료되는 순서대로 결과를 반환 → 호출 측은 LPTDispatcher(clip_scheduler)로
+  예측 비용 순서를 지켜 변환 워커에 투입
+"""
+
+import os
+import time
+import random
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from tracing import span
+
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = int(os.environ.get('DOWNLOAD_MAX_CONCURRENCY', '8'))
+INITIAL_CONCURRENCY = 2
+
+TICK = 0.5                 # 상태 확인 주기 (초)
+DECISION_INTERVAL = 2.0    # 동시성 조절 주기 (초)
+RATE_TOLERANCE = 0.95      # 이전 구간 대비 이 비율 이상이면 증가로 판단
+
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 20.0
+
+HEDGE_AFTER = 3.0          # 시작 후 이 시간이 지나야 hedge 판단 (초)
+HEDGE_RATIO = 0.25         # 완료 전송 중앙값 속도의 이 비율 미만이면 hedge
+MIN_HEDGE_SAMPLES = 2
+
+CONNECT_TIMEOUT = 10
+READ_TIMEOUT = 30
+CHUNK_SIZE = 256 * 1024
+MIN_FILE_SIZE = 100 * 1024  # 최소 100KB
+
+def backoff_delay(attempt):
+    """지수 백오프 + full jitter"""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+class ByteCounter:
+    """모든 전송이 받은 바이트 누적 (취소/실패한 전송 포함, 줄어들지 않음)"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def add(self, amount):
+        with self._lock:
+            self.value += amount
+
+class Transfer:
+    """진행 중인 HTTP 전송 하나 (hedge면 같은 작업에 둘)"""
+
+    def __init__(self, job, url, path, received, hedge=False):
+        self.job = job
+        self.url = url
+        self.path = path
+        self.received = received
+        self.hedge = hedge
+        self.bytes = 0
+        self.started = time.perf_counter()
+        self.cancel = threading.Event()
+
+    @property
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+def _fetch(transfer):
+    """스트리밍 다운로드 (취소 신호를 청크마다 확인)"""
+    with span(f"download {transfer.job['key']}", 'download', hedge=transfer.hedge, url=transfer.url[:80]):
+        return _stream(transfer)
+
+def _stream(transfer):
+    with requests.get(transfer.url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)) as response:
+        response.raise_for_status()
+        with open(transfer.path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if transfer.cancel.is_set():
+                    return False
+                f.write(chunk)
+                transfer.bytes += len(chunk)
+                transfer.received.add(len(chunk))
+
+    if transfer.bytes < MIN_FILE_SIZE:
+        raise IOError(f"file too small: {transfer.bytes}bytes")
+    return True
+
+class AdaptiveDownloader:
+    """
+    jobs: [(key, [url, 대체 url...], 저장 경로), ...] 순서대로 시작
+    """
+
+    def __init__(self, jobs):
+        self.pending = [
+            {'key': key, 'urls': urls, 'path': str(path), 'attempt': 0, 'not_before': 0.0,
+             'transfers': [], 'done': False}
+            for key, urls, path in jobs
+        ]
+        self.limit = min(INITIAL_CONCURRENCY, MAX_CONCURRENCY)
+        self.active = {}          # future → Transfer
+        self.completed_rates = []
+        self.total_bytes = 0
+        self.received = ByteCounter()
+        self.hedge_wasted_bytes = 0
+        self.failed_bytes = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.retries = 0
+        self.limit_history = [self.limit]
+        self._last_bytes = 0
+        self._last_decision = time.perf_counter()
+        self._last_rate = None
+        self.started = None
+
+    # 동시성 조절
+
+    def _active_jobs(self):
+        return {id(t.job): t.job for t in self.active.values()}
+
+    def _decrease(self, reason):
+        new_limit = max(MIN_CONCURRENCY, self.limit // 2)
+        if new_limit != self.limit:
+            print(f"   📉 Concurrency {self.limit} → {new_limit} ({reason})")
+            self.limit = new_limit
+            self.limit_history.append(new_limit)
+
+    def _adjust(self):
+        now = time.perf_counter()
+        elapsed = now - self._last_decision
+        if elapsed < DECISION_INTERVAL:
+            return
+
+        # 취소된 hedge나 실패한 전송의 바이트도 포함 → 구간 처리량이 음수가 되거나 급락하지 않음
+        total = self.received.value
+        rate = (total - self._last_bytes) / elapsed
+        self._last_bytes = total
+        self._last_decision = now
+
+        # 작업이 더 없으면 조절할 필요 없음
+        if not self.pending:
+            self._last_rate = rate
+            return
+
+        if self._last_rate is None or rate >= self._last_rate * RATE_TOLERANCE:
+            if self.limit < MAX_CONCURRENCY and len(self._active_jobs()) >= self.limit:
+                self.limit += 1
+                self.limit_history.append(self.limit)
+        else:
+            self._decrease(f"throughput {rate / 1e6:.1f}MB/s < {self._last_rate / 1e6:.1f}MB/s")
+        self._last_rate = rate
+
+    # 전송 시작 / hedge
+
+    def _start(self, pool, job, url, hedge=False):
+        suffix = '.hedge' if hedge else '.part'
+        transfer = Transfer(job, url, job['path'] + suffix, self.received, hedge)
+        job['transfers'].append(transfer)
+        self.active[pool.submit(_fetch, transfer)] = transfer
+
+    def _fill(self, pool):
+        now = time.perf_counter()
+        while len(self._active_jobs()) < self.limit:
+            ready = next((job for job in self.pending if job['not_before'] <= now), None)
+            if ready is None:
+                return
+            self.pending.remove(ready)
+            ready['transfers'] = []
+            self._start(pool, ready, ready['urls'][0])
+
+    def _maybe_hedge(self, pool):
+        if len(self.completed_rates) < MIN_HEDGE_SAMPLES:
+            return
+        median = statistics.median(self.completed_rates)
+        now = time.perf_counter()
+        for transfer in list(self.active.values()):
+            job = transfer.job
+            if transfer.hedge or len(job['transfers']) > 1:
+                continue
+            if now - transfer.started < HEDGE_AFTER or transfer.rate >= median * HEDGE_RATIO:
+                continue
+            alternates = job['urls'][1:] or job['urls'][:1]
+            url = alternates[job['attempt'] % len(alternates)]
+            print(f"   🪃 Hedging slow download {job['key']} "
+                  f"({transfer.rate / 1e6:.2f}MB/s vs median {median / 1e6:.2f}MB/s)")
+            self.hedges += 1
+            self._start(pool, job, url, hedge=True)
+
+    # 완료 처리
+
+    def _finish(self, future, transfer):
+        """완료된 전송 처리 → 작업이 끝났으면 결과 반환"""
+        job = transfer.job
+        siblings = [t for t in job['transfers'] if t is not transfer]
+
+        try:
+            ok = future.result()
+        except Exception as e:
+            ok = False
+            error = e
+        else:
+            error = None if ok else 'cancelled'
+
+        # 이미 다른 전송(primary/hedge)으로 끝난 작업 → 늦게 끝난 쪽은 버림
+        if job['done']:
+            self.hedge_wasted_bytes += transfer.bytes
+            _remove(transfer.path)
+            return None
+
+        if ok:
+            # 먼저 끝난 쪽 사용, 나머지 전송은 취소
+            job['done'] = True
+            for sibling in siblings:
+                sibling.cancel.set()
+            os.replace(transfer.path, job['path'])
+            elapsed = time.perf_counter() - transfer.started
+            self.total_bytes += transfer.bytes
+            self.completed_rates.append(transfer.rate)
+            if transfer.hedge:
+                self.hedge_wins += 1
+            return {
+                'key': job['key'], 'path': job['path'], 'bytes': transfer.bytes,
+                'seconds': elapsed, 'rate': transfer.rate, 'hedged': len(job['transfers']) > 1,
+                'attempts': job['attempt'] + 1
+            }
+
+        _remove(transfer.path)
+        if error == 'cancelled':
+            self.hedge_wasted_bytes += transfer.bytes
+            return None
+        self.failed_bytes += transfer.bytes
+
+        # 같은 작업의 다른 전송이 아직 진행 중이면 그쪽을 기다림
+        if any(not t.cancel.is_set() and t in self.active.values() for t in siblings):
+            return None
+
+        print(f"   ⚠️ Download {job['key']} failed (attempt {job['attempt'] + 1}/{MAX_RETRIES}): {error}")
+        self._decrease("error")
+        job['attempt'] += 1
+        if job['attempt'] < MAX_RETRIES:
+            delay = backoff_delay(job['attempt'])
+            job['not_before'] = time.perf_counter() + delay
+            self.retries += 1
+            self.pending.insert(0, job)
+            return None
+
+        return {'key': job['key'], 'path': None, 'bytes': 0, 'seconds': 0.0, 'rate': 0.0,
+                'hedged': len(job['transfers']) > 1, 'attempts': job['attempt'], 'error': str(error)}
+
+    def __iter__(self):
+        """완료되는 순서대로 결과 dict 반환 (실패하면 path=None)"""
+        self.started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=MAX_CONCURRENCY * 2) as pool:
+            while self.pending or self.active:
+                self._fill(pool)
+                if not self.active:
+                    time.sleep(TICK)
+                    continue
+
+                done, _ = wait(list(self.active), timeout=TICK, return_when=FIRST_COMPLETED)
+                for future in done:
+                    transfer = self.active.pop(future)
+                    result = self._finish(future, transfer)
+                    if result:
+                        yield result
+
+                self._adjust()
+                self._maybe_hedge(pool)
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            'bytes': self.total_bytes,
+            'received_bytes': self.received.value,
+            'hedge_wasted_bytes': self.hedge_wasted_bytes,
+            'failed_bytes': self.failed_bytes,
+            'seconds': round(elapsed, 2),
+            'aggregate_mb_s': round(self.total_bytes / elapsed / 1e6, 2) if elapsed else 0.0,
+            'median_transfer_mb_s': round(statistics.median(self.completed_rates) / 1e6, 2)
+            if self.completed_rates else 0.0,
+            'final_concurrency': self.limit,
+            'max_concurrency': max(self.limit_history),
+            'hedges': self.hedges,
+            'hedge_wins': self.hedge_wins,
+            'retries': self.retries
+        }
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
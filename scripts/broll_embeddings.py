@@ -0,0 +1,146 @@
+"""
+B-roll 라이브러리 의미 검색 (임베딩 색인)
+
+- 클립 설명(키워드/검색어/Pexels 페이지 제목) 임베딩을 float32 행렬 하나로 디스크에 저장
+  (cache/broll_library/embeddings.f32, 행 순서는 embeddings.json의 clip id 목록)
+- 조회 시 np.memmap으로 복사 없이 매핑, 모든 키워드를 한 번에 임베딩 → 행렬 곱 한 번으로 cosine top-k
+- 새 클립은 broll_library ingest 시점에 행렬 끝에 추가만 함 (prune 후에만 다시 씀)
+  → 검색은 memmap만 읽고 클립 임베딩 요청을 하지 않음 (쿼리 임베딩 1회)
+- 벡터는 저장 전에 L2 정규화 → 내적 = cosine 유사도
+"""
+
+import os
+import json
+import numpy as np
+from broll_library import LIBRARY_DIR, page_title_words
+from llm_gateway import embed
+
+EMBEDDING_MODEL = 'text-embedding-3-small'
+EMBEDDING_DIM = 256
+
+MATRIX_PATH = os.path.join(LIBRARY_DIR, 'embeddings.f32')
+IDS_PATH = os.path.join(LIBRARY_DIR, 'embeddings.json')
+
+# 이 유사도 미만은 후보에서 제외
+MIN_SIMILARITY = 0.35
+
+def clip_description(clip):
+    """임베딩할 클립 설명 문장"""
+    parts = [clip.get('keyword') or '', page_title_words(clip.get('page_url'))]
+    return '. '.join(p for p in parts if p) or ' '.join(clip.get('tags') or [])
+
+def embed_texts(texts):
+    """(len(texts), EMBEDDING_DIM) 정규화된 float32 행렬 (최대 2048개씩 배치 요청)"""
+    vectors = np.asarray(
+        embed(texts, model=EMBEDDING_MODEL, dimensions=EMBEDDING_DIM),
+        dtype=np.float32
+    )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def load_ids():
+    if not os.path.exists(IDS_PATH):
+        return []
+    try:
+        with open(IDS_PATH, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return []
+    # 모델/차원이 바뀌면 전체 재구축
+    if data.get('model') != EMBEDDING_MODEL or data.get('dim') != EMBEDDING_DIM:
+        return []
+    return data['ids']
+
+def _save_ids(ids):
+    tmp_path = f'{IDS_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'model': EMBEDDING_MODEL, 'dim': EMBEDDING_DIM, 'ids': ids}, f)
+    os.replace(tmp_path, IDS_PATH)
+
+def open_matrix(ids=None):
+    """임베딩 행렬을 읽기 전용 memmap으로 (행이 없으면 None)"""
+    ids = load_ids() if ids is None else ids
+    if not ids or not os.path.exists(MATRIX_PATH):
+        return None
+    rows = os.path.getsize(MATRIX_PATH) // (EMBEDDING_DIM * 4)
+    if rows < len(ids):
+        return None
+    return np.memmap(MATRIX_PATH, dtype=np.float32, mode='r', shape=(len(ids), EMBEDDING_DIM))
+
+def sync_embeddings(index):
+    """라이브러리에 있지만 아직 임베딩이 없는 클립만 임베딩해서 행렬 끝에 추가"""
+    ids = load_ids()
+    if ids and open_matrix(ids) is None:
+        ids = []
+    if not ids and os.path.exists(MATRIX_PATH):
+        os.remove(MATRIX_PATH)
+
+    known = set(ids)
+    new_ids = [clip_id for clip_id in index['clips'] if clip_id not in known]
+    if not new_ids:
+        return ids
+
+    # 같은 영상의 구간들은 설명이 같음 → 고유 설명만 임베딩
+    descriptions = [clip_description(index['clips'][clip_id]) for clip_id in new_ids]
+    row_of = {d: i for i, d in enumerate(dict.fromkeys(descriptions))}
+    unique = list(row_of)
+    vectors = embed_texts(unique)
+    rows = vectors[[row_of[d] for d in descriptions]]
+
+    os.makedirs(LIBRARY_DIR, exist_ok=True)
+    with open(MATRIX_PATH, 'ab') as f:
+        f.write(np.ascontiguousarray(rows, dtype=np.float32).tobytes())
+
+    ids = ids + new_ids
+    _save_ids(ids)
+    print(f"   🧮 Embedded {len(new_ids)} new library clips ({len(unique)} descriptions)")
+    return ids
+
+def compact_embeddings(keep_ids):
+    """prune 후 남은 클립의 행만 남기도록 행렬 재작성"""
+    ids = load_ids()
+    matrix = open_matrix(ids)
+    if matrix is None:
+        return
+
+    keep = set(keep_ids)
+    rows = [i for i, clip_id in enumerate(ids) if clip_id in keep]
+    if len(rows) == len(ids):
+        return
+
+    tmp_path = f'{MATRIX_PATH}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(np.ascontiguousarray(matrix[rows]).tobytes())
+    del matrix
+    os.replace(tmp_path, MATRIX_PATH)
+    _save_ids([ids[i] for i in rows])
+
+def semantic_search(queries, index, k=50):
+    """
+    모든 쿼리에 대한 cosine top-k를 한 번에 계산
+
+    반환: 쿼리별 [(clip_id, 유사도), ...] (유사도 내림차순, MIN_SIMILARITY 이상)
+    """
+    # 클립 임베딩은 ingest에서 이미 추가됨 → 여기서는 읽기만
+    ids = load_ids()
+    matrix = open_matrix(ids)
+    if matrix is None or not queries:
+        return [[] for _ in queries]
+
+    query_vectors = embed_texts(list(queries))
+    scores = query_vectors @ matrix.T
+
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+    results = []
+    for row_ids, row_scores in zip(top, top_scores):
+        results.append([
+            (ids[i], float(score)) for i, score in zip(row_ids, row_scores)
+            if score >= MIN_SIMILARITY and ids[i] in index['clips']
+        ])
+    return results
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+로컬 B-roll 라이브러리 (정규화된 1080p 구간 클립 + 역색인)
+
+- create_video가 처리한 구간 클립을 cache/broll_library/clips/에 보관
+- 검색어/키워드/Pexels 페이지 제목에서 뽑은 단어 → 클립 id 역색인을 index.json에 저장
+- search_videos는 라이브러리를 먼저 조회하고, 부족한 만큼만 Pexels를 검색
+- 단어가 일치하지 않는 클립은 broll_embeddings의 의미 검색으로 보충
+
+사용법:
+    python scripts/broll_library.py stats
+    python scripts/broll_library.py search "data center servers"
+    python scripts/broll_library.py ingest clip.mp4 [clip2.mp4 ...] --tags "robot, factory" [--no-transcode]
+    python scripts/broll_library.py prune [--max-gb 4] [--max-age-days 60]
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import shutil
+import hashlib
+import argparse
+import subprocess
+from collections import defaultdict
+from video_format import VIDEO_TIMESCALE, describe, encode_args, matches_target, probe_stream
+
+LIBRARY_DIR = os.environ.get('BROLL_LIBRARY_DIR', 'cache/broll_library')
+INDEX_PATH = os.path.join(LIBRARY_DIR, 'index.json')
+CLIPS_DIR = os.path.join(LIBRARY_DIR, 'clips')
+
+# 색인에서 제외할 단어 (검색 스타일 수식어 포함)
+STOPWORDS = {
+    'a', 'an', 'the', 'of', 'in', 'on', 'at', 'and', 'or', 'with', 'for', 'to',
+    'from', 'by', 'is', 'video', 'footage', 'stock', 'free', 'hd', '4k',
+    'cinematic', 'futuristic', 'modern', 'professional', 'tech', 'innovative',
+    'digital', 'advanced', 'standard'
+}
+
+# 키워드 단어 중 이 비율 이상이 일치해야 후보
+MIN_TERM_MATCH = 0.5
+
+_TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+def tokenize(text):
+    """소문자 단어 목록 (불용어 제거, 간단한 복수형 정규화)"""
+    tokens = []
+    for token in _TOKEN_PATTERN.findall((text or '').lower()):
+        if token in STOPWORDS or len(token) < 2 or token.isdigit():
+            continue
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def page_title_words(page_url):
+    """Pexels 페이지 URL 슬러그의 단어 (예: /video/robot-arm-in-factory-856789/)"""
+    if not page_url:
+        return ''
+    slug = page_url.rstrip('/').rsplit('/', 1)[-1]
+    return slug.replace('-', ' ')
+
+def load_index():
+    """{'clips': {clip_id: 항목}, 'terms': {단어: [clip_id, ...]}}"""
+    if not os.path.exists(INDEX_PATH):
+        return {'clips': {}, 'terms': {}}
+    try:
+        with open(INDEX_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️ Ignoring unreadable library index: {e}")
+        return {'clips': {}, 'terms': {}}
+
+def save_index(index):
+    os.makedirs(LIBRARY_DIR, exist_ok=True)
+    tmp_path = f'{INDEX_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False)
+    os.replace(tmp_path, INDEX_PATH)
+
+def _rebuild_terms(index):
+    terms = defaultdict(list)
+    for clip_id, clip in index['clips'].items():
+        for token in sorted(set(clip['tags'])):
+            terms[token].append(clip_id)
+    index['terms'] = dict(terms)
+
+def _add_terms(index, clip_id, tags):
+    for token in sorted(set(tags)):
+        postings = index['terms'].setdefault(token, [])
+        if clip_id not in postings:
+            postings.append(clip_id)
+
+def _copy_into_library(source_path, clip_id):
+    """라이브러리로 복사 (같은 파일시스템이면 하드링크)"""
+    os.makedirs(CLIPS_DIR, exist_ok=True)
+    destination = os.path.join(CLIPS_DIR, f"{clip_id}.mp4")
+    if os.path.exists(destination):
+        if os.path.samefile(source_path, destination):
+            return destination
+        os.remove(destination)
+    try:
+        os.link(source_path, destination)
+    except OSError:
+        shutil.copy2(source_path, destination)
+    return destination
+
+def _file_digest(path, block_size=1024 * 1024):
+    """로컬 클립 id용 내용 해시 (같은 파일을 다시 넣으면 같은 id)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+def _probe_format(path):
+    """길이 + 첫 영상 스트림 형식 (실패하면 None)"""
+    try:
+        return probe_stream(path)
+    except Exception:
+        return None
+
+def _normalize_clip(source_path, output_path):
+    """create_video와 같은 설정으로 1080p30 H.264 재인코딩 (성공하면 True)"""
+    result = subprocess.run(
+        ['ffmpeg', '-y', '-v', 'error', '-i', source_path, '-map', '0:v:0']
+        + encode_args()
+        + ['-an', '-video_track_timescale', str(VIDEO_TIMESCALE), output_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"   ⚠️ Transcode failed: {result.stderr.strip()[-300:]}")
+    return result.returncode == 0
+
+def _remux_clip(source_path, output_path):
+    """스트림 복사로 다시 mux해서 time base만 create_video 구간과 맞춤"""
+    result = subprocess.run(
+        ['ffmpeg', '-y', '-v', 'error', '-i', source_path, '-map', '0:v:0', '-c', 'copy',
+         '-an', '-video_track_timescale', str(VIDEO_TIMESCALE), output_path],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"   ⚠️ Remux failed: {result.stderr.strip()[-300:]}")
+    return result.returncode == 0
+
+def ingest_segments(video, segments, index=None):
+    """
+    처리된 구간 클립을 라이브러리에 추가
+
+    video: videos.json 항목 (id, keyword, style, page_url ...)
+    segments: [(경로, 길이), ...]
+    """
+    save = index is None
+    index = index or load_index()
+
+    text = ' '.join([
+        video.get('keyword', ''),
+        video.get('query', ''),
+        page_title_words(video.get('page_url')),
+        ' '.join(video.get('tags') or [])
+    ])
+    tags = tokenize(text)
+    pexels_id = video.get('id')
+    if pexels_id is not None:
+        prefix = f"px{pexels_id}"
+    else:
+        prefix = f"local{video.get('content_hash') or _file_digest(segments[0][0])}"
+
+    now = time.time()
+    added = 0
+    replaced = False
+    for number, (path, duration) in enumerate(segments):
+        clip_id = f"{prefix}_{number:02d}"
+        replaced = replaced or clip_id in index['clips']
+        destination = _copy_into_library(path, clip_id)
+        index['clips'][clip_id] = {
+            'path': destination,
+            'pexels_id': pexels_id,
+            'segment': number,
+            'duration': round(duration, 3),
+            'bytes': os.path.getsize(destination),
+            'keyword': video.get('keyword'),
+            'page_url': video.get('page_url'),
+            'tags': tags,
+            'added': now,
+            'last_used': now,
+            'uses': 1
+        }
+        _add_terms(index, clip_id, tags)
+        added += 1
+
+    # 같은 클립을 다시 넣으면 이전 태그의 역색인 항목 정리
+    if replaced:
+        _rebuild_terms(index)
+
+    # CLI ingest처럼 index를 넘긴 호출자는 저장 후 한 번에 임베딩
+    if save:
+        save_index(index)
+        sync_library_embeddings(index)
+    return added
+
+def sync_library_embeddings(index):
+    """새 클립 임베딩을 ingest 시점에 추가 (API 키가 없거나 실패하면 다음 ingest에서 다시 시도)"""
+    if not os.environ.get('OPENAI_API_KEY'):
+        return
+    try:
+        from broll_embeddings import sync_embeddings
+        sync_embeddings(index)
+    except Exception as e:
+        print(f"   ⚠️ Embedding sync failed: {e}")
+
+def search(keyword, index, exclude=()):
+    """
+    키워드에 맞는 클립 id를 점수순으로 반환 (idf 가중치, 덜 쓴 클립 우선)
+    """
+    tokens = list(dict.fromkeys(tokenize(keyword)))
+    if not tokens:
+        return []
+
+    total = max(len(index['clips']), 1)
+    scores = defaultdict(float)
+    matches = defaultdict(int)
+    for token in tokens:
+        postings = index['terms'].get(token, [])
+        if not postings:
+            continue
+        idf = math.log(1 + total / len(postings))
+        for clip_id in postings:
+            scores[clip_id] += idf
+            matches[clip_id] += 1
+
+    needed = max(1, math.ceil(len(tokens) * MIN_TERM_MATCH))
+    candidates = [
+        clip_id for clip_id in scores
+        if matches[clip_id] >= needed and clip_id not in exclude
+        and os.path.exists(index['clips'][clip_id]['path'])
+    ]
+    return sorted(
+        candidates,
+        key=lambda c: (-scores[c], index['clips'][c].get('uses', 0), index['clips'][c].get('last_used', 0))
+    )
+
+def semantic_candidates(keywords, index):
+    """키워드별 임베딩 유사 클립 id 목록 (API 키가 없거나 실패하면 빈 목록)"""
+    if not os.environ.get('OPENAI_API_KEY'):
+        return [[] for _ in keywords]
+    try:
+        from broll_embeddings import semantic_search
+        return [[clip_id for clip_id, _ in results] for results in semantic_search(keywords, index)]
+    except Exception as e:
+        print(f"   ⚠️ Semantic search unavailable: {e}")
+        return [[] for _ in keywords]
+
+def query_library(keywords, target_duration, per_keyword_seconds=None):
+    """
+    키워드 목록으로 라이브러리에서 구간 클립을 골라 videos.json 항목으로 반환
+
+    Pexels 영상 단위로 묶어서 반환 (create_video가 구간을 번갈아 배치)
+    반환: (항목 목록, 채운 길이)
+    """
+    index = load_index()
+    if not index['clips']:
+        return [], 0.0
+
+    per_keyword_seconds = per_keyword_seconds or target_duration / max(len(keywords), 1)
+    used = set()
+    groups = {}
+    covered = 0.0
+
+    # 단어가 정확히 일치하지 않는 클립은 임베딩 유사도로 보충
+    similar = semantic_candidates(keywords, index)
+
+    for keyword, similar_ids in zip(keywords, similar):
+        keyword_seconds = 0.0
+        lexical = search(keyword, index, exclude=used)
+        candidates = lexical + [c for c in similar_ids if c not in lexical]
+        for clip_id in candidates:
+            if keyword_seconds >= per_keyword_seconds or covered >= target_duration:
+                break
+            if clip_id in used or not os.path.exists(index['clips'][clip_id]['path']):
+                continue
+            clip = index['clips'][clip_id]
+            used.add(clip_id)
+
+            group_key = clip.get('pexels_id') or clip_id
+            group = groups.setdefault(group_key, {
+                'id': clip.get('pexels_id'),
+                'source': 'library',
+                'keyword': keyword,
+                'style': 'library',
+                'page_url': clip.get('page_url'),
+                'width': 1920,
+                'height': 1080,
+                'duration': 0.0,
+                'segments': []
+            })
+            group['segments'].append({'clip_id': clip_id, 'path': clip['path'], 'duration': clip['duration']})
+            group['duration'] += clip['duration']
+            keyword_seconds += clip['duration']
+            covered += clip['duration']
+
+    return list(groups.values()), covered
+
+def mark_used(clip_ids):
+    """create_video에서 사용한 라이브러리 클립 기록 (prune/순서에 사용)"""
+    if not clip_ids:
+        return
+    index = load_index()
+    now = time.time()
+    for clip_id in clip_ids:
+        clip = index['clips'].get(clip_id)
+        if clip:
+            clip['last_used'] = now
+            clip['uses'] = clip.get('uses', 0) + 1
+    save_index(index)
+
+def prune(max_bytes=None, max_age_days=None):
+    """파일이 없는 항목, 오래 안 쓴 클립, 용량 초과분(LRU)을 정리"""
+    index = load_index()
+    clips = index['clips']
+    now = time.time()
+    removed = []
+
+    for clip_id, clip in list(clips.items()):
+        stale = max_age_days is not None and now - clip.get('last_used', 0) > max_age_days * 86400
+        if stale or not os.path.exists(clip['path']):
+            removed.append(clip_id)
+
+    for clip_id in removed:
+        _remove_clip(clips, clip_id)
+
+    if max_bytes is not None:
+        total = sum(clip.get('bytes', 0) for clip in clips.values())
+        for clip_id in sorted(clips, key=lambda c: clips[c].get('last_used', 0)):
+            if total <= max_bytes:
+                break
+            total -= clips[clip_id].get('bytes', 0)
+            _remove_clip(clips, clip_id)
+            removed.append(clip_id)
+
+    _rebuild_terms(index)
+    save_index(index)
+
+    if removed:
+        from broll_embeddings import compact_embeddings
+        compact_embeddings(index['clips'])
+    return removed
+
+def _remove_clip(clips, clip_id):
+    clip = clips.pop(clip_id)
+    _remove_file(clip['path'])
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def library_stats(index=None):
+    index = index or load_index()
+    clips = index['clips'].values()
+    return {
+        'clips': len(index['clips']),
+        'videos': len({c.get('pexels_id') or id(c) for c in clips}),
+        'terms': len(index['terms']),
+        'seconds': sum(c.get('duration', 0) for c in clips),
+        'bytes': sum(c.get('bytes', 0) for c in clips)
+    }
+
+def _cmd_stats(args):
+    stats = library_stats()
+    print(f"📚 B-roll library: {LIBRARY_DIR}")
+    print(f"   🎬 Clips: {stats['clips']} (from {stats['videos']} videos)")
+    print(f"   ⏱️  Footage: {stats['seconds'] / 60:.1f} minutes")
+    print(f"   💾 Size: {stats['bytes'] / 1024 / 1024:.1f} MB")
+    print(f"   🔤 Indexed terms: {stats['terms']}")
+
+def _cmd_search(args):
+    index = load_index()
+    results = search(args.query, index)
+    print(f"🔍 '{args.query}': {len(results)} clips")
+    for clip_id in results[:args.limit]:
+        clip = index['clips'][clip_id]
+        print(f"   {clip_id} ({clip['duration']:.1f}s, used {clip.get('uses', 0)}x): {' '.join(clip['tags'])}")
+
+def _cmd_ingest(args):
+    index = load_index()
+    tags = [t.strip() for t in args.tags.split(',') if t.strip()]
+    added = 0
+    for path in args.files:
+        if not os.path.exists(path):
+            print(f"   ⚠️ Not found: {path}")
+            continue
+        info = _probe_format(path)
+        if not info or not info['duration']:
+            print(f"   ⚠️ Not a readable video, skipped: {path}")
+            continue
+
+        # 라이브러리 클립은 create_video에서 스트림 복사로 이어 붙이므로 형식이 같아야 함
+        # (프로파일/레벨까지 확인, 파라미터 세트 차이는 create_video 병합 단계에서 다시 확인)
+        source = path
+        temp_path = os.path.join(CLIPS_DIR, f".ingest_{os.getpid()}.mp4")
+        if not matches_target(info):
+            if args.no_transcode:
+                print(f"   ⚠️ Not H.264 High@4.0 1920x1080 30fps yuv420p ({describe(info)}), skipped: {path}")
+                continue
+            print(f"   🎬 Transcoding {path} ({describe(info)}) → H.264 High@4.0 1920x1080 30fps")
+            os.makedirs(CLIPS_DIR, exist_ok=True)
+            source = temp_path
+            if not _normalize_clip(path, source):
+                _remove_file(source)
+                continue
+            info = _probe_format(source) or info
+        elif info.get('time_base') != f'1/{VIDEO_TIMESCALE}':
+            # 형식은 같고 time base만 다름 → 재인코딩 없이 다시 mux
+            os.makedirs(CLIPS_DIR, exist_ok=True)
+            source = temp_path
+            if not _remux_clip(path, source):
+                _remove_file(source)
+                continue
+
+        name = os.path.splitext(os.path.basename(path))[0]
+        video = {
+            'id': None,
+            'keyword': ' '.join(tags) or name.replace('_', ' ').replace('-', ' '),
+            'tags': tags,
+            'content_hash': _file_digest(path)
+        }
+        try:
+            added += ingest_segments(video, [(source, info['duration'])], index)
+        finally:
+            if source != path:
+                _remove_file(source)
+    save_index(index)
+    sync_library_embeddings(index)
+    print(f"✅ Ingested {added} clips")
+
+def _cmd_prune(args):
+    max_bytes = int(args.max_gb * 1024 ** 3) if args.max_gb is not None else None
+    removed = prune(max_bytes, args.max_age_days)
+    print(f"🧹 Pruned {len(removed)} clips")
+    _cmd_stats(args)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local B-roll library maintenance")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('stats', help="Show library size").set_defaults(func=_cmd_stats)
+
+    search_parser = subparsers.add_parser('search', help="Query the inverted index")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--limit', type=int, default=20)
+    search_parser.set_defaults(func=_cmd_search)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Add clips (converted to H.264 1080p30 when needed)")
+    ingest_parser.add_argument('files', nargs='+')
+    ingest_parser.add_argument('--tags', default='', help="Comma-separated tags")
+    ingest_parser.add_argument('--no-transcode', action='store_true',
+                               help="Skip files that are not H.264 High@4.0 1920x1080 30fps yuv420p instead of converting")
+    ingest_parser.set_defaults(func=_cmd_ingest)
+
+    prune_parser = subparsers.add_parser('prune', help="Remove missing, stale or least-recently-used clips")
+    prune_parser.add_argument('--max-gb', type=float, default=None)
+    prune_parser.add_argument('--max-age-days', type=float, default=None)
+    prune_parser.set_defaults(func=_cmd_prune)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
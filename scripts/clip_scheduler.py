@@ -0,0 +1,214 @@
+"""
+클립 변환 작업 스케줄링 (makespan 최소화)
+
+- videos.json 메타데이터(해상도/fps/길이)로 작업별 비용(초)을 예측
+- 비용이 큰 작업부터 워커 풀에 넣음 (LPT: Longest Processing Time first)
+  → 4K/60fps 소스가 마지막에 남아 다른 코어가 노는 상황 방지
+- 다운로드는 완료 순서가 제각각 → LPTDispatcher가 준비된 작업을 모아 두고
+  워커가 빌 때마다 그중 예측 비용이 가장 큰 작업을 투입
+- 실제 처리 시간으로 단위 작업당 속도를 학습해 cache/encode_speed.json에 저장 (EWMA)
+- 예측 makespan(LPT 시뮬레이션) vs 실제 makespan을 배치별로 비교해 temp/clip_schedule.json과
+  run report 지표에 기록 (실제 makespan은 배치의 첫 작업 투입부터 마지막 완료까지)
+"""
+
+import os
+import json
+import heapq
+import time
+import itertools
+import threading
+
+SPEED_PATH = os.environ.get('ENCODE_SPEED_CACHE', 'cache/encode_speed.json')
+SCHEDULE_REPORT = 'temp/clip_schedule.json'
+
+# 출력 1초 = 1920x1080 30fps 인코딩 1단위
+OUTPUT_PIXEL_RATE = 1920 * 1080 * 30
+
+# 학습 전 기본값: 단위당 초 (libx264 medium, 러너 2코어 기준 대략치)
+DEFAULT_SPEED = {'transcode': 0.9, 'copy': 0.02}
+EWMA_ALPHA = 0.3
+
+# 디코딩 비용 가중치 (인코딩 대비)
+DECODE_WEIGHT = 0.25
+
+# 코덱별 디코딩 비용 (H.264 대비, 코덱을 모르면 1.0)
+CODEC_DECODE_WEIGHT = {'h264': 1.0, 'hevc': 1.6, 'vp9': 1.8, 'av1': 2.5}
+
+def load_speed():
+    try:
+        with open(SPEED_PATH, 'r', encoding='utf-8') as f:
+            return {**DEFAULT_SPEED, **json.load(f)}
+    except (OSError, ValueError):
+        return dict(DEFAULT_SPEED)
+
+def save_speed(speed):
+    os.makedirs(os.path.dirname(SPEED_PATH) or '.', exist_ok=True)
+    tmp_path = f'{SPEED_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(speed, f, indent=2)
+    os.replace(tmp_path, SPEED_PATH)
+
+def predict_copy(video):
+    """메타데이터상 출력 형식과 같으면 스트림 복사로 처리될 것으로 예측"""
+    fps = video.get('fps') or 0
+    return (
+        video.get('codec') in (None, 'h264')
+        and video.get('width') == 1920 and video.get('height') == 1080 and abs(fps - 30) < 0.01
+    )
+
+def work_units(video, max_seconds):
+    """
+    작업량 (출력 1080p30 1초 = 1단위)
+
+    인코딩은 출력 길이에 비례, 디코딩은 원본 픽셀 처리량(해상도 x fps)과 코덱에 비례
+    """
+    seconds = min(video.get('duration') or max_seconds, max_seconds)
+    width = video.get('width') or 1920
+    height = video.get('height') or 1080
+    fps = video.get('fps') or 30
+    decode_ratio = width * height * fps / OUTPUT_PIXEL_RATE
+    codec_weight = CODEC_DECODE_WEIGHT.get(video.get('codec'), 1.0)
+    return seconds * (1 + DECODE_WEIGHT * decode_ratio * codec_weight)
+
+def predict_cost(video, max_seconds, speed):
+    kind = 'copy' if predict_copy(video) else 'transcode'
+    return work_units(video, max_seconds) * speed[kind], kind
+
+def lpt_order(jobs):
+    """예측 비용 내림차순 (jobs: [(job, 예측 비용), ...])"""
+    return sorted(jobs, key=lambda item: item[1], reverse=True)
+
+def simulate_makespan(costs, workers):
+    """LPT 순서로 워커에 배정했을 때의 makespan"""
+    loads = [0.0] * max(1, workers)
+    heapq.heapify(loads)
+    for cost in sorted(costs, reverse=True):
+        heapq.heappush(loads, heapq.heappop(loads) + cost)
+    return max(loads)
+
+class LPTDispatcher:
+    """
+    준비된 작업을 버퍼에 모아 두고, 실행 중인 작업이 workers개 미만일 때마다
+    예측 비용이 가장 큰 작업부터 pool에 제출 (완료 순서와 무관하게 LPT 유지)
+    """
+
+    def __init__(self, pool, workers, on_dispatch=None):
+        self.pool = pool
+        self.workers = workers
+        self.on_dispatch = on_dispatch
+        self.ready = []           # (-비용, 순번, tag, fn, args) 힙
+        self.running = 0
+        self.futures = {}         # future → tag
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+
+    def submit(self, cost, tag, fn, *args):
+        with self._lock:
+            heapq.heappush(self.ready, (-cost, next(self._order), tag, fn, args))
+            self._dispatch()
+
+    def _dispatch(self):
+        while self.running < self.workers and self.ready:
+            _, _, tag, fn, args = heapq.heappop(self.ready)
+            self.running += 1
+            if self.on_dispatch:
+                self.on_dispatch()
+            future = self.pool.submit(fn, *args)
+            self.futures[future] = tag
+            future.add_done_callback(self._done)
+
+    def _done(self, future):
+        with self._lock:
+            self.running -= 1
+            self._dispatch()
+            self._idle.notify_all()
+
+    def drain(self):
+        """버퍼의 작업이 모두 pool에 제출될 때까지 대기 → {future: tag} (as_completed용)"""
+        with self._lock:
+            while self.ready:
+                self._idle.wait()
+            return dict(self.futures)
+
+class ScheduleRecorder:
+    """작업별 예측/실측 기록 + 속도 학습"""
+
+    def __init__(self, workers, speed):
+        self.workers = workers
+        self.speed = speed
+        self.jobs = []
+        self.batches = []
+
+    def start_batch(self):
+        """배치마다 호출 (배치끼리는 순서대로 실행되므로 makespan은 배치별로 비교)"""
+        self.batches.append({'jobs': [], 'started': None, 'finished': None})
+
+    def start(self):
+        """배치의 작업이 워커에 처음 투입될 때 (LPTDispatcher on_dispatch)"""
+        if not self.batches:
+            self.start_batch()
+        batch = self.batches[-1]
+        if batch['started'] is None:
+            batch['started'] = time.perf_counter()
+
+    def record(self, name, kind, units, predicted, actual, copied=None):
+        """작업 하나의 실측 시간 기록 (실제 처리 방식으로 속도 갱신)"""
+        if not self.batches:
+            self.start_batch()
+        batch = self.batches[-1]
+        batch['finished'] = time.perf_counter()
+        actual_kind = kind if copied is None else ('copy' if copied else 'transcode')
+        batch['jobs'].append(predicted)
+        self.jobs.append({
+            'name': name,
+            'predicted_kind': kind,
+            'kind': actual_kind,
+            'units': round(units, 2),
+            'predicted_s': round(predicted, 2),
+            'actual_s': round(actual, 2)
+        })
+        if units > 0 and actual > 0:
+            observed = actual / units
+            self.speed[actual_kind] = (1 - EWMA_ALPHA) * self.speed[actual_kind] + EWMA_ALPHA * observed
+
+    def report(self):
+        """예측 vs 실제 makespan 출력 + temp/clip_schedule.json 저장 + 속도 저장"""
+        if not self.jobs:
+            return None
+
+        batches = []
+        for batch in self.batches:
+            if not batch['jobs']:
+                continue
+            started = batch['started'] or batch['finished']
+            batches.append({
+                'jobs': len(batch['jobs']),
+                'predicted_makespan_s': round(simulate_makespan(batch['jobs'], self.workers), 2),
+                'actual_makespan_s': round(batch['finished'] - started, 2)
+            })
+        predicted = sum(b['predicted_makespan_s'] for b in batches)
+        actual = sum(b['actual_makespan_s'] for b in batches)
+        busy = sum(job['actual_s'] for job in self.jobs)
+        utilization = busy / (actual * self.workers) if actual > 0 else 0.0
+
+        report = {
+            'workers': self.workers,
+            'predicted_makespan_s': round(predicted, 2),
+            'actual_makespan_s': round(actual, 2),
+            'worker_utilization': round(utilization, 3),
+            'batches': batches,
+            'speed_s_per_unit': {k: round(v, 4) for k, v in self.speed.items()},
+            'jobs': self.jobs
+        }
+
+        os.makedirs(os.path.dirname(SCHEDULE_REPORT), exist_ok=True)
+        with open(SCHEDULE_REPORT, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        save_speed(self.speed)
+
+        print(f"\n⏱️  Clip schedule ({self.workers} workers, longest first):")
+        print(f"   Predicted makespan: {predicted:.1f}s ({len(batches)} batches)")
+        print(f"   Actual makespan: {actual:.1f}s (utilization {utilization:.0%})")
+        print(f"   📄 Saved: {SCHEDULE_REPORT}")
+        return report
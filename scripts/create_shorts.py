@@ -2,6 +2,8 @@ import os
 import json
 import subprocess
 from pathlib import Path
+import time
+from telemetry import stage, record_encode, set_metric
 
 # temp 폴더 생성
 os.makedirs('temp', exist_ok=True)
@@ -107,7 +109,9 @@ def create_shorts():
         ]
         
         try:
+            start = time.perf_counter()
             subprocess.run(crop_cmd, check=True, capture_output=True)
+            record_encode(f"short_{i}_crop", duration, time.perf_counter() - start)
             print(f"   ✅ Clip extracted")
         except subprocess.CalledProcessError as e:
             print(f"   ❌ Crop failed: {e.stderr.decode()}")
@@ -138,7 +142,9 @@ def create_shorts():
         ]
         
         try:
+            start = time.perf_counter()
             subprocess.run(subtitle_cmd, check=True, capture_output=True)
+            record_encode(f"short_{i}_subtitles", duration, time.perf_counter() - start)
             print(f"   ✅ Subtitles added")
             
             # Clean up temp file
@@ -160,10 +166,14 @@ def create_shorts():
     
     print("\n✅ All shorts created!")
     print("\n📂 Output files:")
+    created = 0
     for i in range(1, 4):
         short_file = f'temp/short_{i}.mp4'
         if os.path.exists(short_file):
             print(f"   • {short_file}")
+            created += 1
+    set_metric('shorts', created)
 
 if __name__ == '__main__':
-    create_shorts()
+    with stage('create_shorts'):
+        create_shorts()
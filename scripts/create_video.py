@@ -8,34 +8,47 @@ import os
 import sys
 import subprocess
 from pathlib import Path
-import requests
+import random
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+import numpy as np
+from frame_reader import FrameReader
+from broll_library import ingest_segments, mark_used
+from broll_downloader import AdaptiveDownloader
+from telemetry import stage, step, add, record_step, record_encode, set_metric
+from tracing import span
+from video_format import (
+    KEYFRAME_INTERVAL, VIDEO_TIMESCALE, concat_signature, describe, encode_args, matches_target, probe_stream
+)
+from clip_scheduler import (
+    LPTDispatcher, ScheduleRecorder, load_speed, lpt_order, predict_cost, simulate_makespan, work_units
+)
 
-def download_video(url: str, output_path: str, max_retries=3) -> bool:
-    """영상 다운로드 (재시도 로직 추가)"""
-    for attempt in range(max_retries):
-        try:
-            print(f"      Downloading attempt {attempt + 1}/{max_retries}...", end=" ")
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            file_size = Path(output_path).stat().st_size
-            if file_size > 1024 * 100:  # 최소 100KB
-                print(f"Success ({file_size / 1024 / 1024:.1f}MB)")
-                return True
-            else:
-                print(f"Failed (file too small: {file_size}bytes)")
-                
-        except Exception as e:
-            print(f"Failed ({e})")
-            if attempt < max_retries - 1:
-                time.sleep(2)
-    
-    return False
+# 클립 검사 (인코딩 전에 쓸모없는 클립 거르기)
+INSPECT_FPS = 2
+INSPECT_SIZE = (160, 90)
+BLACK_LEVEL = 16           # 평균 밝기가 이보다 낮으면 검은 프레임
+MAX_BLACK_RATIO = 0.5      # 검은 프레임 비율 상한
+FROZEN_DIFF = 0.5          # 연속 프레임 평균 차이가 이보다 작으면 정지 프레임
+MIN_MOTION = 1.0           # 프레임 간 차이 중앙값이 이보다 작으면 거의 정지된 영상
+
+# 클립 하나에서 잘라낼 구간 (초) - 다운로드 한 번으로 여러 컷
+SEGMENT_MIN = int(os.environ.get('BROLL_SEGMENT_MIN', '6'))
+SEGMENT_MAX = int(os.environ.get('BROLL_SEGMENT_MAX', '10'))
+CLIP_MAX_SECONDS = float(os.environ.get('BROLL_CLIP_MAX_SECONDS', '60'))
+
+# 클립 변환 워커 수 (ffmpeg 스레드는 코어를 워커 수로 나눠 배정)
+TRANSCODE_WORKERS = int(os.environ.get('TRANSCODE_WORKERS', str(max(1, (os.cpu_count() or 1) // 2))))
+
+# 메타데이터 기준 예상 길이에 더하는 여유분 (거부/실패 대비)
+COVERAGE_MARGIN = 1.2
+
+# 원본이 이미 출력 형식(video_format.TARGET_FORMAT)이면 스트림 복사 (STREAM_COPY=0이면 항상 재인코딩)
+STREAM_COPY = os.environ.get('STREAM_COPY', '1') != '0'
+
+# 영상이 부족할 때 처리된 클립을 재사용할 시작 위치 (클립 길이 비율)
+REUSE_OFFSETS = (0.5, 0.25, 0.75)
+MIN_REUSE_DURATION = 3.0
 
 def get_video_duration(video_path: str) -> float:
     """FFmpeg로 영상 길이 가져오기"""
@@ -54,40 +67,171 @@ def get_video_duration(video_path: str) -> float:
         print(f"      ⚠️ Duration check failed: {e}")
         return 0.0
 
-def process_video_ffmpeg(input_path: str, output_path: str, target_duration: float = 30.0) -> bool:
-    """FFmpeg로 영상 처리"""
+def plan_segments(duration: float, seed: int = 0):
+    """
+    클립을 겹치지 않는 SEGMENT_MIN~SEGMENT_MAX초 구간으로 나눌 경계 시각
+    
+    반환: (경계 목록, 사용할 길이) - 경계는 키프레임 간격의 배수
+    """
+    usable = min(duration, CLIP_MAX_SECONDS)
+    lengths = list(range(SEGMENT_MIN, SEGMENT_MAX + 1, KEYFRAME_INTERVAL)) or [SEGMENT_MIN]
+    rng = random.Random(seed)
+    
+    boundaries = []
+    position = 0
+    while usable - position > SEGMENT_MAX:
+        position += rng.choice(lengths)
+        boundaries.append(position)
+    
+    # 마지막 구간이 너무 짧으면 버림
+    if usable - position < SEGMENT_MIN and boundaries:
+        usable = boundaries.pop()
+    
+    return boundaries, usable
+
+def probe_video(video_path: str) -> dict:
+    """FFprobe 한 번으로 길이 + 첫 영상 스트림 정보 (코덱/프로파일/레벨/해상도/fps/픽셀 포맷)"""
+    try:
+        info = probe_stream(video_path)
+        print(f"      ✅ Duration: {info['duration']:.1f}s ({describe(info)})")
+        return info
+    except Exception as e:
+        print(f"      ⚠️ Probe failed: {e}")
+        return {'duration': 0.0}
+
+def can_stream_copy(info: dict) -> bool:
+    """출력 형식(H.264 High@4.0 1920x1080 30fps yuv420p)과 같으면 재인코딩 없이 복사 가능"""
+    return STREAM_COPY and matches_target(info)
+
+def read_segment_list(list_path: str, output_dir: str) -> list:
+    """segment muxer의 CSV 목록 → [(구간 경로, 실제 길이), ...]"""
+    segments = []
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            name, start, end = line.strip().rsplit(',', 2)
+            path = os.path.join(output_dir, name)
+            if os.path.exists(path):
+                segments.append((path, float(end) - float(start)))
+    return segments
+
+def process_video_segments(input_path: str, output_prefix: str, seed: int = 0,
+                           threads: int = 0, label: str = ''):
+    """
+    FFmpeg 한 번으로 클립을 여러 구간 파일로 분할 (segment muxer)
+    
+    출력 형식과 같은 원본은 재인코딩 없이 스트림 복사 (키프레임 위치에서 분할)
+    반환: ([(구간 경로, 길이), ...], probe 정보 + 'copied') (실패 시 빈 목록)
+    """
+    info = {'duration': 0.0, 'copied': False}
     try:
-        duration = get_video_duration(input_path)
+        info = probe_video(input_path)
+        duration = info['duration']
         if duration == 0:
-            return False
+            return [], info
         
-        trim_duration = min(duration, target_duration)
+        boundaries, trim_duration = plan_segments(duration, seed)
+        segment_times = ','.join(str(t) for t in boundaries)
+        copy = can_stream_copy(info)
+        info['copied'] = copy
+        mode = "stream copy" if copy else "transcode"
         
-        print(f"      🎬 Processing... (target: {trim_duration:.1f}s)", end=" ")
+        print(f"      🎬 {label}Processing... ({trim_duration:.1f}s → {len(boundaries) + 1} segments, {mode})")
         
-        result = subprocess.run([
+        cmd = [
             'ffmpeg', '-y',
             '-i', input_path,
             '-t', str(trim_duration),
-            '-vf', 'scale=1920:1080:force_original_aspect_ratio=increase,crop=1920:1080',
-            '-r', '30',
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
+            '-map', '0:v:0',
+        ]
+        if copy:
+            # 이미 출력 형식 → 디코딩/인코딩 없이 원본 키프레임에서 분할
+            cmd += ['-c:v', 'copy']
+        else:
+            # 구간 경계 + 재사용 오프셋에서 스트림 복사로 자를 수 있도록 키프레임 고정
+            cmd += encode_args(threads)
+        
+        list_path = f"{output_prefix}_segments.csv"
+        cmd += [
             '-an',
-            output_path
-        ], check=True, capture_output=True, text=True)
+            '-f', 'segment',
+            '-segment_format_options', f'video_track_timescale={VIDEO_TIMESCALE}',
+            '-reset_timestamps', '1',
+            '-segment_list', list_path,
+            '-segment_list_type', 'csv',
+        ]
+        if boundaries:
+            cmd += ['-segment_times', segment_times]
+        else:
+            cmd += ['-segment_time', str(trim_duration + 1)]
+        cmd.append(f"{output_prefix}_%02d.mp4")
         
-        print("Done")
-        return True
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        
+        # 스트림 복사는 키프레임에서 잘리므로 실제 길이는 목록에서 읽음
+        segments = read_segment_list(list_path, os.path.dirname(output_prefix))
+        os.remove(list_path)
+        
+        print(f"      ✅ {label}Done ({len(segments)} segments)")
+        return segments, info
         
     except subprocess.CalledProcessError as e:
-        print(f"Failed")
+        print(f"      ❌ {label}Failed")
         print(f"      FFmpeg stderr: {e.stderr[:200]}")
-        return False
+        return [], info
     except Exception as e:
-        print(f"Failed: {e}")
-        return False
+        print(f"      ❌ {label}Failed: {e}")
+        return [], info
+
+def interleave_segments(groups: list) -> list:
+    """클립별 구간 목록을 번갈아 배치 (같은 클립 구간이 연달아 나오지 않게)"""
+    timeline = []
+    longest = max((len(group) for group in groups), default=0)
+    for index in range(longest):
+        for group in groups:
+            if index < len(group):
+                timeline.append(group[index])
+    return timeline
+
+def inspect_clip(video_path: str, duration: float = 30.0):
+    """
+    저해상도 프레임을 파이프로 받아 검은/멈춘/거의 정지된 클립인지 검사
+    
+    반환: (사용 가능 여부, 사유)
+    """
+    black_frames = 0
+    diffs = []
+    previous = np.empty((INSPECT_SIZE[1], INSPECT_SIZE[0], 3), dtype=np.int16)
+    
+    reader = FrameReader(video_path, fps=INSPECT_FPS, size=INSPECT_SIZE, duration=duration)
+    try:
+        with reader:
+            for index, frame in enumerate(reader):
+                if frame.mean() < BLACK_LEVEL:
+                    black_frames += 1
+                if index:
+                    diffs.append(float(np.abs(frame - previous).mean()))
+                # 재사용 버퍼는 다음 프레임에 덮어써지므로 이전 프레임만 따로 보관
+                np.copyto(previous, frame)
+    except Exception as e:
+        # 검사 실패는 거부 사유가 아님 (처리 단계에서 판단)
+        print(f"      ⚠️ Inspection skipped: {e}")
+        return True, None
+    
+    total = reader.frames_read
+    if total == 0:
+        return False, "no decodable frames"
+    
+    if black_frames / total > MAX_BLACK_RATIO:
+        return False, f"black ({black_frames}/{total} frames)"
+    
+    if diffs:
+        if max(diffs) < FROZEN_DIFF:
+            return False, "frozen"
+        motion = float(np.median(diffs))
+        if motion < MIN_MOTION:
+            return False, f"near-static (motion {motion:.2f})"
+    
+    return True, None
 
 def create_concat_file(clip_paths: list, concat_file: str):
     """FFmpeg concat 파일 생성"""
@@ -96,42 +240,197 @@ def create_concat_file(clip_paths: list, concat_file: str):
             abs_path = Path(path).resolve()
             f.write(f"file '{abs_path}'\n")
 
-def extract_video_urls(videos_data):
-    """videos.json에서 영상 URL 추출"""
+def reencode_segment(input_path: str, output_path: str) -> bool:
+    """구간 하나를 출력 형식으로 재인코딩 (병합 전 파라미터 세트 맞추기용)"""
+    try:
+        subprocess.run(
+            ['ffmpeg', '-y', '-i', input_path, '-map', '0:v:0']
+            + encode_args()
+            + ['-an', '-video_track_timescale', str(VIDEO_TIMESCALE), output_path],
+            check=True, capture_output=True, text=True
+        )
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"      FFmpeg stderr: {e.stderr[:200]}")
+        return False
+
+def match_concat_parameters(clip_paths: list, temp_dir: Path, encoded: set):
+    """
+    -c copy concat 전에 구간끼리 파라미터 세트(extradata)/프로파일/레벨/time base 비교
+    
+    기준은 직접 인코딩한 구간의 형식 (없으면 가장 많은 형식), 다른 구간만 재인코딩
+    반환: 병합할 경로 목록, 재인코딩으로도 맞출 수 없으면 None (병합 시 전체 재인코딩)
+    """
+    signatures = {}
+    for path in dict.fromkeys(clip_paths):
+        try:
+            signatures[path] = concat_signature(probe_stream(path))
+        except Exception as e:
+            print(f"   ⚠️ Probe failed for {Path(path).name}: {e}")
+            return None
+    
+    groups = {}
+    for path, signature in signatures.items():
+        groups.setdefault(signature, []).append(path)
+    if len(groups) <= 1:
+        return clip_paths
+    
+    reference = next((signatures[p] for p in signatures if p in encoded), None)
+    if reference is None:
+        reference = max(groups, key=lambda signature: len(groups[signature]))
+    
+    replaced = {}
+    for attempt in range(2):
+        mismatched = [path for path, signature in signatures.items()
+                      if signature != reference and path not in replaced]
+        print(f"\n🧬 {len(mismatched)}/{len(signatures)} segments differ in stream parameters, re-encoding them...")
+        for path in mismatched:
+            output_path = str(temp_dir / f"concat_fix_{len(replaced) + 1}.mp4")
+            if not reencode_segment(path, output_path):
+                return None
+            signature = concat_signature(probe_stream(output_path))
+            replaced[path] = output_path
+            if signature != reference:
+                if attempt:
+                    return None
+                # 기준이 복사한 원본 형식이었음 → 재인코딩 형식을 기준으로 나머지도 맞춤
+                reference = signature
+                replaced = {p: out for p, out in replaced.items() if signatures[p] != reference}
+                break
+        else:
+            return [replaced.get(path, path) for path in clip_paths]
+    return None
+
+def extract_video_entries(videos_data):
+    """videos.json에서 HD 영상 항목 추출 (Pexels id 기준 중복 제거)"""
     print(f"\n🔍 Analyzing videos.json:")
     print(f"   Type: {type(videos_data)}")
     
-    video_urls = []
+    videos = []
     
     # List 형식
     if isinstance(videos_data, list):
         print(f"   Format: list (length: {len(videos_data)})")
-        
-        for i, video in enumerate(videos_data):
-            if not isinstance(video, dict):
-                continue
-            
-            if "url" in video and "width" in video:
-                url = video["url"]
-                width = video["width"]
-                
-                if width >= 1920 and url:
-                    video_urls.append(url)
-                    print(f"   ✅ [{i}] HD video: {width}x{video.get('height', '?')}")
+        candidates = videos_data
     
     # Dict 형식
     elif isinstance(videos_data, dict):
         print(f"   Format: dict")
-        videos = videos_data.get("videos", [])
+        candidates = videos_data.get("videos", [])
+    
+    else:
+        candidates = []
+    
+    seen = set()
+    for i, video in enumerate(candidates):
+        if not isinstance(video, dict):
+            continue
         
-        for i, video in enumerate(videos):
-            if "url" in video and "width" in video:
-                if video["width"] >= 1920:
-                    video_urls.append(video["url"])
-                    print(f"   ✅ [{i}] HD video")
-    
-    print(f"\n   📊 Extracted URLs: {len(video_urls)}\n")
-    return video_urls
+        if video.get("source") == "library":
+            # 로컬 라이브러리 구간 (다운로드/처리 불필요)
+            segments = [seg for seg in video.get("segments", []) if os.path.exists(seg["path"])]
+            if segments:
+                videos.append({**video, "segments": segments})
+                print(f"   📚 [{i}] Library: {len(segments)} segments")
+            continue
+        
+        if "url" in video and "width" in video:
+            if video["width"] < 1920 or not video["url"]:
+                continue
+            
+            # 같은 영상은 한 번만 다운로드 (id가 없으면 URL 기준)
+            key = video.get("id") or video["url"]
+            if key in seen:
+                print(f"   ♻️  [{i}] Duplicate skipped (id {video.get('id')})")
+                continue
+            seen.add(key)
+            
+            videos.append(video)
+            print(f"   ✅ [{i}] HD video: {video['width']}x{video.get('height', '?')}")
+    
+    print(f"\n   📊 Extracted videos: {len(videos)}\n")
+    return videos
+
+def cut_clip_at_offset(clip_path: str, output_path: str, offset: float) -> bool:
+    """처리된 클립을 offset부터 스트림 복사로 잘라냄 (재인코딩 없음, 키프레임 기준)"""
+    try:
+        subprocess.run([
+            'ffmpeg', '-y',
+            '-ss', f"{offset:.3f}",
+            '-i', clip_path,
+            '-c', 'copy',
+            '-avoid_negative_ts', 'make_zero',
+            '-video_track_timescale', str(VIDEO_TIMESCALE),
+            output_path
+        ], check=True, capture_output=True, text=True)
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"      FFmpeg stderr: {e.stderr[:200]}")
+        return False
+
+def reuse_clips(clips: list, target_duration: float, temp_dir: Path) -> list:
+    """
+    목표 길이에 못 미치면 이미 처리된 클립을 다른 위치에서 잘라 재사용
+    
+    clips: [(경로, 길이), ...] → 재사용 클립을 뒤에 덧붙인 목록
+    (같은 영상을 다시 다운로드/인코딩하지 않음)
+    """
+    total = sum(duration for _, duration in clips)
+    if total >= target_duration or not clips:
+        return clips
+    
+    print(f"\n♻️  Reusing processed clips at new offsets ({total:.0f}s / {target_duration:.0f}s)...")
+    
+    sources = list(clips)
+    result = list(clips)
+    for round_index, fraction in enumerate(REUSE_OFFSETS, 1):
+        for index, (clip_path, duration) in enumerate(sources, 1):
+            if total >= target_duration:
+                return result
+            
+            offset = duration * fraction
+            if duration - offset < MIN_REUSE_DURATION:
+                continue
+            
+            reused_path = temp_dir / f"reuse_{round_index}_{index}.mp4"
+            if cut_clip_at_offset(clip_path, str(reused_path), offset):
+                reused_duration = duration - offset
+                result.append((str(reused_path), reused_duration))
+                total += reused_duration
+                print(f"   ✅ {Path(clip_path).name} from {offset:.1f}s (+{reused_duration:.1f}s)")
+    
+    return result
+
+def transcode_job(index: int, video: dict, raw_path: Path, temp_dir: Path, threads: int) -> dict:
+    """워커에서 실행: 클립 검사 + 구간 분할 (원본은 끝나면 삭제)"""
+    label = f"[{index}] "
+    start = time.perf_counter()
+    try:
+        with span(f"clip_{index}", 'transcode', width=video.get('width'), fps=video.get('fps')):
+            with span('inspect', 'ffmpeg'):
+                usable, reason = inspect_clip(str(raw_path), CLIP_MAX_SECONDS)
+            if not usable:
+                return {'segments': [], 'info': {}, 'elapsed': time.perf_counter() - start,
+                        'error': f"rejected ({reason})"}
+            
+            with span('segment', 'ffmpeg'):
+                segments, info = process_video_segments(
+                    str(raw_path), str(temp_dir / f"clip_{index}"), seed=index, threads=threads, label=label
+                )
+        return {'segments': segments, 'info': info, 'elapsed': time.perf_counter() - start,
+                'error': None if segments else "processing failed"}
+    finally:
+        raw_path.unlink(missing_ok=True)
+
+def select_batch(candidates: list, missing_duration: float):
+    """남은 길이를 (여유분 포함) 채울 만큼의 영상 선택 → (이번 배치, 나머지)"""
+    needed = missing_duration * COVERAGE_MARGIN
+    planned = 0.0
+    for count, video in enumerate(candidates, 1):
+        planned += min(video.get('duration') or CLIP_MAX_SECONDS, CLIP_MAX_SECONDS)
+        if planned >= needed:
+            return candidates[:count], candidates[count:]
+    return candidates, []
 
 def create_video():
     """메인 영상 생성"""
@@ -162,74 +461,177 @@ def create_video():
         print(f"❌ CRITICAL: videos.json load failed: {e}")
         sys.exit(1)
     
-    # 3단계: URL 추출
-    video_urls = extract_video_urls(videos_data)
+    # 3단계: 영상 항목 추출
+    videos = extract_video_entries(videos_data)
     
-    if not video_urls:
+    if not videos:
         print(f"\n❌ CRITICAL: No video URLs available!")
         sys.exit(1)
     
     # 4단계: 영상 처리 준비
     target_duration = 540  # 9분
-    needed_videos = 18
     
     print(f"\n🎯 Target:")
     print(f"   Duration: {target_duration / 60:.1f} minutes")
-    print(f"   Videos needed: {needed_videos}")
-    print(f"   Videos found: {len(video_urls)}")
+    print(f"   Segments: {SEGMENT_MIN}-{SEGMENT_MAX}s (up to {CLIP_MAX_SECONDS:.0f}s per clip)")
+    print(f"   Videos found: {len(videos)}")
     
-    # 부족하면 반복
-    if len(video_urls) < needed_videos:
-        repeat_count = needed_videos - len(video_urls)
-        video_urls.extend(video_urls[:repeat_count])
-        print(f"   Videos repeated: +{repeat_count}")
+    # 5단계: 라이브러리 구간 + 영상 다운로드/구간 분할 (목표 길이를 채우면 중단)
+    print(f"\n📥 Video download & processing:")
+    segment_groups = []
+    library_clip_ids = []
+    encoded_paths = set()
+    total_duration = 0.0
     
-    video_urls = video_urls[:needed_videos]
+    for video in videos:
+        if video.get("source") == "library":
+            segments = [(seg["path"], seg["duration"]) for seg in video["segments"]]
+            segment_groups.append(segments)
+            library_clip_ids += [seg["clip_id"] for seg in video["segments"]]
+            total_duration += sum(duration for _, duration in segments)
+            print(f"   📚 Library: {len(segments)} segments (total {total_duration:.0f}s)")
     
-    # 5단계: 영상 다운로드 + 처리
-    print(f"\n📥 Video download & processing:")
-    processed_clips = []
+    remaining = [video for video in videos if video.get("source") != "library"]
     
-    for i, url in enumerate(video_urls, 1):
-        print(f"\n   [{i}/{len(video_urls)}] Processing...")
-        print(f"      URL: {url[:60]}...")
-        
-        raw_path = temp_dir / f"raw_{i}.mp4"
-        if not download_video(url, str(raw_path)):
-            print(f"      ⚠️ Download failed, next...")
-            continue
-        
-        processed_path = temp_dir / f"clip_{i}.mp4"
-        if process_video_ffmpeg(str(raw_path), str(processed_path)):
-            processed_clips.append(str(processed_path))
-            print(f"      ✅ Processing completed!")
-        else:
-            print(f"      ⚠️ Processing failed, next...")
-        
-        # 원본 삭제
-        raw_path.unlink(missing_ok=True)
+    # 비용이 큰 작업부터 워커 풀에 투입 (LPT), 실측 속도 학습
+    workers = TRANSCODE_WORKERS
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    speed = load_speed()
+    recorder = ScheduleRecorder(workers, speed)
+    job_index = 0
+    downloads = 0
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while total_duration < target_duration and remaining:
+            batch, remaining = select_batch(remaining, target_duration - total_duration)
+            jobs = []
+            for video in batch:
+                cost, kind = predict_cost(video, CLIP_MAX_SECONDS, speed)
+                jobs.append(((video, kind), cost))
+            jobs = lpt_order(jobs)
+            print(f"\n   🗓️  Batch of {len(jobs)} clips on {workers} workers "
+                  f"(predicted makespan {simulate_makespan([c for _, c in jobs], workers):.0f}s)")
+            
+            # 다운로드는 처리량에 맞춰 동시 진행, 받은 작업은 워커가 빌 때마다 예측 비용 순으로 투입
+            planned = {}
+            download_jobs = []
+            for (video, kind), cost in jobs:
+                job_index += 1
+                print(f"   [{job_index}] {video.get('width')}x{video.get('height')} "
+                      f"{video.get('fps') or '?'}fps, predicted {cost:.1f}s ({kind})")
+                planned[job_index] = (video, kind, cost)
+                download_jobs.append((job_index, [video["url"]] + (video.get("alternates") or []),
+                                      temp_dir / f"raw_{job_index}.mp4"))
+            
+            downloader = AdaptiveDownloader(download_jobs)
+            recorder.start_batch()
+            dispatcher = LPTDispatcher(pool, workers, on_dispatch=recorder.start)
+            for download in downloader:
+                index = download['key']
+                if not download['path']:
+                    print(f"   ⚠️ [{index}] Download failed, next...")
+                    continue
+                downloads += 1
+                add('bytes_downloaded', download['bytes'])
+                record_step('download', f"clip_{index}", download['seconds'], bytes=download['bytes'],
+                            hedged=download['hedged'], attempts=download['attempts'])
+                print(f"   📥 [{index}] {download['bytes'] / 1024 / 1024:.1f}MB in {download['seconds']:.1f}s "
+                      f"({download['rate'] / 1e6:.1f}MB/s{', hedged' if download['hedged'] else ''})")
+                
+                video, kind, cost = planned[index]
+                # 메타데이터에 없는 코덱은 받은 파일 헤더로 확인해 예측 비용 보정 (HEVC/VP9 디코딩 비용)
+                try:
+                    codec = probe_stream(download['path'])['codec']
+                except Exception:
+                    codec = None
+                if codec and codec != video.get('codec'):
+                    video = {**video, 'codec': codec}
+                    cost, kind = predict_cost(video, CLIP_MAX_SECONDS, speed)
+                dispatcher.submit(cost, (index, video, kind, cost),
+                                  transcode_job, index, video, Path(download['path']), temp_dir, threads)
+            
+            stats = downloader.summary()
+            set_metric('download_aggregate_mb_s', stats['aggregate_mb_s'])
+            set_metric('download_max_concurrency', stats['max_concurrency'])
+            set_metric('download_hedge_wasted_mb', round(stats['hedge_wasted_bytes'] / 1e6, 2))
+            print(f"   📶 Downloaded {stats['bytes'] / 1024 / 1024:.0f}MB at {stats['aggregate_mb_s']:.1f}MB/s "
+                  f"(concurrency up to {stats['max_concurrency']}, {stats['hedges']} hedged "
+                  f"[{stats['hedge_wasted_bytes'] / 1024 / 1024:.1f}MB wasted], {stats['retries']} retries)")
+            
+            futures = dispatcher.drain()
+            for future in as_completed(futures):
+                index, video, kind, cost = futures[future]
+                result = future.result()
+                segments = result['segments']
+                info = result['info']
+                
+                used_seconds = sum(duration for _, duration in segments)
+                units = work_units({**video, **{k: info[k] for k in ('width', 'height', 'fps') if info.get(k)},
+                                    'duration': used_seconds}, CLIP_MAX_SECONDS)
+                recorder.record(f"clip_{index}", kind, units, cost, result['elapsed'],
+                                copied=info.get('copied') if segments else None)
+                if segments:
+                    record_encode(f"clip_{index}", used_seconds, result['elapsed'],
+                                  copied=info.get('copied'), segments=len(segments))
+                
+                if not segments:
+                    print(f"   ⚠️ [{index}] {result['error']}, skipped")
+                    continue
+                
+                segment_groups.append(segments)
+                if not info.get('copied'):
+                    encoded_paths.update(path for path, _ in segments)
+                # 다음 실행에서 재사용할 수 있도록 라이브러리에 보관
+                try:
+                    ingest_segments(video, segments)
+                except Exception as e:
+                    print(f"   ⚠️ [{index}] Library ingest failed: {e}")
+                total_duration += used_seconds
+                print(f"   ✅ [{index}] {len(segments)} segments in {result['elapsed']:.1f}s "
+                      f"(predicted {cost:.1f}s, total {total_duration:.0f}s)")
+    
+    print(f"\n   📥 Downloads: {downloads}")
+    schedule = recorder.report()
+    if schedule:
+        set_metric('clip_makespan_predicted_s', schedule['predicted_makespan_s'])
+        set_metric('clip_makespan_actual_s', schedule['actual_makespan_s'])
+        set_metric('clip_worker_utilization', schedule['worker_utilization'])
     
     # 6단계: 최소 영상 개수 체크
-    if not processed_clips:
+    if not segment_groups:
         print(f"\n❌ CRITICAL: No processed videos!")
         sys.exit(1)
     
-    print(f"\n✅ Total {len(processed_clips)} videos processed")
+    mark_used(library_clip_ids)
+    
+    # 클립별 구간을 번갈아 배치
+    processed_clips = interleave_segments(segment_groups)
+    print(f"\n✅ Total {len(segment_groups)} videos processed → {len(processed_clips)} segments")
     
-    # 7단계: 영상 병합
+    # 7단계: 길이가 부족하면 처리된 클립을 다른 위치에서 재사용
+    processed_clips = [path for path, _ in reuse_clips(processed_clips, target_duration, temp_dir)]
+    
+    # 8단계: 영상 병합 (스트림 파라미터가 다른 구간은 먼저 맞춤, 안 되면 전체 재인코딩)
+    concat_clips = match_concat_parameters(processed_clips, temp_dir, encoded_paths)
+    if concat_clips is None:
+        print(f"   ⚠️ Segments cannot be stream-copied together, re-encoding during merge")
+        codec_args = encode_args() + ['-an']
+    else:
+        codec_args = ['-c', 'copy']
     concat_file = temp_dir / "concat.txt"
-    create_concat_file(processed_clips, str(concat_file))
+    create_concat_file(concat_clips or processed_clips, str(concat_file))
     
     print(f"\n🔗 Merging videos...")
     try:
-        subprocess.run([
-            'ffmpeg', '-y',
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', str(concat_file),
-            '-c', 'copy',
-            str(output_file)
-        ], check=True, capture_output=True, text=True)
+        with step('ffmpeg', 'concat', clips=len(processed_clips), copy=concat_clips is not None):
+            subprocess.run([
+                'ffmpeg', '-y',
+                '-f', 'concat',
+                '-safe', '0',
+                '-i', str(concat_file),
+                *codec_args,
+                str(output_file)
+            ], check=True, capture_output=True, text=True)
         
         print(f"✅ Merge completed!")
         
@@ -238,13 +640,18 @@ def create_video():
         print(f"   FFmpeg stderr: {e.stderr[:300]}")
         sys.exit(1)
     
-    # 8단계: 최종 확인
+    # 9단계: 최종 확인
     if not output_file.exists():
         print(f"\n❌ CRITICAL: Final video not created!")
         sys.exit(1)
     
     final_duration = get_video_duration(str(output_file))
     final_size = output_file.stat().st_size / (1024 * 1024)
+    set_metric('clips', len(segment_groups))
+    set_metric('library_segments', len(library_clip_ids))
+    set_metric('downloads', downloads)
+    set_metric('cuts', len(processed_clips))
+    set_metric('output_duration_s', round(final_duration, 2))
     
     print(f"\n" + "=" * 60)
     print(f"🎉 Silent video creation completed!")
@@ -252,18 +659,21 @@ def create_video():
     print(f"   📁 File: {output_file}")
     print(f"   📊 Size: {final_size:.1f} MB")
     print(f"   ⏱️  Duration: {final_duration / 60:.1f} minutes")
-    print(f"   🎬 Clips: {len(processed_clips)}")
+    print(f"   🎬 Clips: {len(segment_groups)} ({len(processed_clips)} cuts)")
     print(f"   🔇 Audio: None (will be merged in next step)")
     print("=" * 60)
     
     # 정리
     concat_file.unlink(missing_ok=True)
-    for clip in processed_clips:
-        Path(clip).unlink(missing_ok=True)
+    for clip in set(processed_clips) | set(concat_clips or []):
+        # 라이브러리 클립은 남겨둠 (temp/clips 안의 파일만 삭제)
+        if Path(clip).resolve().parent == temp_dir.resolve():
+            Path(clip).unlink(missing_ok=True)
 
 if __name__ == "__main__":
     try:
-        create_video()
+        with stage('create_video'):
+            create_video()
     except KeyboardInterrupt:
         print("\n\n⚠️ User interrupted")
         sys.exit(1)
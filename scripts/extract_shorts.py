@@ -1,6 +1,7 @@
 import os
 import json
-from openai import OpenAI
+from video_metadata import get_video_metadata
+from telemetry import stage
 from pydub.utils import mediainfo
 
 # temp 폴더 생성
@@ -22,61 +23,12 @@ def extract_shorts_segments():
     print(f"📊 Script length: {len(script)} characters")
     print(f"🎵 Audio duration: {audio_duration:.1f} seconds")
     
-    # Initialize OpenAI
-    client = OpenAI(api_key=os.environ['OPENAI_API_KEY'])
+    # Shorts come from the shared metadata request (temp/metadata.json)
+    metadata = get_video_metadata(script)
+    if not metadata or not metadata.get('shorts'):
+        raise RuntimeError("Shorts extraction failed: no metadata available")
     
-    # AI prompt for extracting shorts
-    prompt = f"""You are a YouTube Shorts expert for an AI & Future Technology channel.
-
-Extract exactly 3 engaging Shorts segments from this script.
-
-SCRIPT:
-{script}
-
-REQUIREMENTS:
-- Each Short should be 30-60 seconds of the most captivating content
-- Focus on: mind-blowing facts, bold predictions, controversial takes, or "aha!" moments
-- Structure: Hook (3-5 sec) → Core insight (20-40 sec) → Mini-CTA (5-10 sec)
-- Make titles punchy and curiosity-driven
-- Include 3-5 viral hashtags per Short
-
-OUTPUT FORMAT (JSON):
-{{
-  "shorts": [
-    {{
-      "title": "AI Will Replace 80% of Jobs by 2030",
-      "script": "full segment text (natural sentences, 30-60 seconds worth)",
-      "hook": "first sentence that grabs attention",
-      "estimated_start_time": 45.0,
-      "hashtags": "#AI #FutureTech #JobAutomation"
-    }}
-  ]
-}}
-
-Return ONLY valid JSON, no markdown."""
-
-    # Call OpenAI
-    response = client.chat.completions.create(
-        model='gpt-4o-mini',
-        messages=[
-            {'role': 'system', 'content': 'You are a YouTube Shorts content strategist.'},
-            {'role': 'user', 'content': prompt}
-        ],
-        temperature=0.7,
-        max_tokens=2000
-    )
-    
-    # Parse response
-    result_text = response.choices[0].message.content.strip()
-    
-    # Remove markdown code blocks if present
-    if result_text.startswith('```'):
-        result_text = result_text.split('```')[1]
-        if result_text.startswith('json'):
-            result_text = result_text[4:]
-        result_text = result_text.strip()
-    
-    shorts_data = json.loads(result_text)
+    shorts_data = {'shorts': [dict(short) for short in metadata['shorts']]}
     
     # Estimate timestamps based on script position
     script_lower = script.lower()
@@ -108,4 +60,5 @@ Return ONLY valid JSON, no markdown."""
         print(f"   Hook: {short['hook'][:60]}...")
 
 if __name__ == '__main__':
-    extract_shorts_segments()
+    with stage('extract_shorts'):
+        extract_shorts_segments()
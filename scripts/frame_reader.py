@@ -0,0 +1,167 @@
+"""
+ffmpeg rawvideo 파이프 기반 NumPy 프레임 리더
+
+- ffmpeg가 요청한 fps / 해상도로 -f rawvideo -pix_fmt rgb24를 stdout에 출력
+- 프레임은 하나의 재사용 버퍼에 readinto()로 직접 읽어 (H, W, 3) uint8 뷰로 반환
+  → 디스크에 이미지를 쓰지 않고, 프레임마다 새 배열도 만들지 않음
+- 반환된 뷰는 다음 프레임을 읽으면 덮어써짐 (보관하려면 .copy())
+- keyframes_only / showinfo로 키프레임만 디코딩 + 프레임 시각 수집 가능
+"""
+
+import re
+import subprocess
+import threading
+import numpy as np
+
+_PTS_PATTERN = re.compile(r'pts_time:\s*([\d.]+)')
+
+def scale_filter(size):
+    """비율 유지 확대 후 중앙 crop"""
+    width, height = size
+    return (f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+            f"crop={width}:{height}")
+
+class FrameReader:
+    """
+    with FrameReader(path, fps=2, size=(160, 90)) as reader:
+        for frame in reader:
+            ...  # frame: 재사용 버퍼 위의 (H, W, 3) uint8 뷰
+
+    fps=None이면 원본 프레임 전부 (keyframes_only면 키프레임 전부).
+    timestamps에는 읽은 프레임의 시각(초)이 순서대로 쌓임.
+    """
+
+    def __init__(self, path, fps=None, size=(320, 180), start=None, duration=None,
+                 keyframes_only=False):
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.start = start
+        self.duration = duration
+        self.keyframes_only = keyframes_only
+
+        width, height = size
+        self.frame_bytes = width * height * 3
+        self.buffer = np.empty((height, width, 3), dtype=np.uint8)
+        self._view = memoryview(self.buffer).cast('B')
+
+        self.timestamps = []
+        self.frames_read = 0
+        self._process = None
+        self._stderr_thread = None
+        self._stderr_tail = []
+
+    def _command(self):
+        cmd = ['ffmpeg', '-v', 'info', '-nostats']
+        if self.keyframes_only:
+            cmd += ['-skip_frame', 'nokey']
+        if self.start is not None:
+            cmd += ['-ss', f"{self.start:.3f}"]
+        if self.duration is not None:
+            cmd += ['-t', f"{self.duration:.3f}"]
+
+        filters = []
+        if self.fps:
+            filters.append(f"fps={self.fps:g}")
+        filters += [scale_filter(self.size), 'showinfo']
+
+        cmd += [
+            '-i', self.path,
+            '-an',
+            '-vf', ','.join(filters),
+            '-fps_mode', 'passthrough',
+            '-f', 'rawvideo',
+            '-pix_fmt', 'rgb24',
+            'pipe:1'
+        ]
+        return cmd
+
+    def _drain_stderr(self):
+        # stderr를 계속 비워야 ffmpeg가 블록되지 않음 (showinfo에서 시각 수집)
+        offset = self.start or 0.0
+        for raw_line in self._process.stderr:
+            line = raw_line.decode('utf-8', 'replace')
+            match = _PTS_PATTERN.search(line)
+            if match:
+                self.timestamps.append(offset + float(match.group(1)))
+            else:
+                self._stderr_tail = (self._stderr_tail + [line.rstrip()])[-5:]
+
+    def open(self):
+        self._process = subprocess.Popen(
+            self._command(),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            stdin=subprocess.DEVNULL
+        )
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+        return self
+
+    def _read_frame(self):
+        """버퍼를 한 프레임으로 채움 (EOF면 False)"""
+        filled = 0
+        while filled < self.frame_bytes:
+            count = self._process.stdout.readinto(self._view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def __iter__(self):
+        if self._process is None:
+            self.open()
+        while self._read_frame():
+            self.frames_read += 1
+            yield self.buffer
+
+    def close(self):
+        """ffmpeg 종료 대기 (중간에 멈췄으면 종료시킴). 반환: 종료 코드"""
+        if self._process is None:
+            return None
+
+        if self._process.poll() is None:
+            self._process.stdout.close()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+        self._stderr_thread.join(timeout=5)
+
+        returncode = self._process.returncode
+        self._process = None
+        return returncode
+
+    @property
+    def error(self):
+        """ffmpeg stderr 마지막 몇 줄 (실패 원인 출력용)"""
+        return ' | '.join(self._stderr_tail)
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def read_all(self):
+        """
+        모든 프레임을 (N, H, W, 3) 배열로 반환 (보관용으로 복사)
+
+        반환: (frames, timestamps)
+        """
+        frames = [frame.copy() for frame in self]
+        returncode = self.close()
+        if returncode and not frames:
+            raise RuntimeError(f"ffmpeg failed ({returncode}): {self.error}")
+
+        width, height = self.size
+        stacked = np.stack(frames) if frames else np.empty((0, height, width, 3), dtype=np.uint8)
+
+        timestamps = self.timestamps[:len(frames)]
+        if len(timestamps) != len(frames):
+            # showinfo 파싱 실패 시 fps 기준으로 추정
+            step = 1.0 / self.fps if self.fps else 1.0
+            timestamps = [(self.start or 0.0) + i * step for i in range(len(frames))]
+
+        return stacked, np.array(timestamps)
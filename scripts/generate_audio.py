@@ -6,8 +6,17 @@ Neural2-J (Male, News Anchor voice)
 """
 
 import os
+import time
+import hashlib
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import texttospeech
+from telemetry import stage, step, record_api_call, set_metric
+from tracing import span
+
+AUDIO_PATH = 'temp/audio.mp3'
+# 어떤 대본으로 만든 오디오인지 기록 (스트리밍 모드에서 이미 생성된 경우 건너뛰기)
+AUDIO_SOURCE_MARKER = 'temp/audio.sha256'
 
 def split_script_smart(script, max_chars=4500):
     """
@@ -37,6 +46,10 @@ def split_script_smart(script, max_chars=4500):
 
 def generate_audio_part(client, text, part_num):
     """개별 파트 TTS 생성 (Google Cloud Neural2)"""
+    with span(f"tts part {part_num}", 'tts', chars=len(text)):
+        return _synthesize_part(client, text, part_num)
+
+def _synthesize_part(client, text, part_num):
     print(f"  🎤 Part {part_num} generating... ({len(text)} chars)")
     
     try:
@@ -58,11 +71,14 @@ def generate_audio_part(client, text, part_num):
         )
         
         # TTS 실행
+        start = time.perf_counter()
         response = client.synthesize_speech(
             input=synthesis_input,
             voice=voice,
             audio_config=audio_config
         )
+        record_api_call('google_tts', 'synthesize', time.perf_counter() - start,
+                        part=part_num, chars=len(text), bytes=len(response.audio_content))
         
         # 파일 저장
         output_path = f'temp/audio_part{part_num}.mp3'
@@ -100,7 +116,8 @@ def merge_audio_files(part_files, output_path):
     ]
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, cwd='temp', text=True)
+        with step('ffmpeg', 'audio_merge', parts=len(part_files)):
+            result = subprocess.run(cmd, check=True, capture_output=True, cwd='temp', text=True)
         
         final_path = 'temp/audio.mp3'
         file_size = os.path.getsize(final_path) / (1024 * 1024)
@@ -113,48 +130,21 @@ def merge_audio_files(part_files, output_path):
         print(f"FFmpeg stderr: {e.stderr if e.stderr else 'N/A'}")
         raise
 
-def generate_audio():
-    """Google Cloud TTS로 오디오 생성"""
-    
-    # temp 폴더 생성
-    os.makedirs('temp', exist_ok=True)
-    
-    # Google Cloud 클라이언트 초기화
-    # GOOGLE_APPLICATION_CREDENTIALS 환경변수 사용
-    client = texttospeech.TextToSpeechClient()
-    
-    # 스크립트 읽기
-    with open('temp/script.txt', 'r', encoding='utf-8') as f:
-        script = f.read()
-    
-    print(f"📊 Script length: {len(script)} chars")
-    print(f"⏱️ Estimated duration: ~{len(script) / 900:.1f} minutes\n")
-    print(f"🎙️ Voice: Google Neural2-J (Male, US English)\n")
-    
-    # 5000자 제한 대응
-    max_chars_per_part = 4500
-    
-    if len(script) > max_chars_per_part:
-        print(f"✂️ Splitting script into parts...\n")
-        parts = split_script_smart(script, max_chars_per_part)
-        print(f"📋 Split into {len(parts)} parts")
-        
-        for i, part in enumerate(parts, 1):
-            print(f"  Part {i}: {len(part)} chars")
-        print()
-    else:
-        parts = [script]
-        print("📋 Single file generation.\n")
-    
-    # 각 파트별 TTS 생성
-    part_files = []
-    
-    for i, part in enumerate(parts, 1):
-        part_file = generate_audio_part(client, part, i)
-        part_files.append(part_file)
+def script_sha256(script):
+    return hashlib.sha256(script.encode('utf-8')).hexdigest()
+
+def audio_matches_script(script):
+    """temp/audio.mp3가 이미 이 대본으로 생성되었는지 확인"""
+    if not (os.path.exists(AUDIO_PATH) and os.path.exists(AUDIO_SOURCE_MARKER)):
+        return False
+    with open(AUDIO_SOURCE_MARKER, 'r', encoding='utf-8') as f:
+        return f.read().strip() == script_sha256(script)
+
+def finalize_audio(part_files, script):
+    """파트 병합 + 정리 + 결과 출력"""
     
     # 단일 파일이면 그대로, 여러 파일이면 병합
-    output_path = 'temp/audio.mp3'
+    output_path = AUDIO_PATH
     
     if len(part_files) == 1:
         os.rename(part_files[0], output_path)
@@ -182,6 +172,7 @@ def generate_audio():
         )
         duration = float(result.stdout.strip())
         duration_min = duration / 60
+        set_metric('audio_duration_s', round(duration, 2))
         print(f"📄 Final file: {output_path}")
         print(f"📊 Size: {final_size:.2f} MB")
         print(f"⏱️  Duration: {duration_min:.1f} minutes ({duration:.0f}s)")
@@ -189,9 +180,98 @@ def generate_audio():
         print(f"📄 Final file: {output_path}")
         print(f"📊 Size: {final_size:.2f} MB")
     
+    with open(AUDIO_SOURCE_MARKER, 'w', encoding='utf-8') as f:
+        f.write(script_sha256(script))
+    
+    set_metric('tts_parts', len(part_files))
     print(f"🎉 8-9 minute audio generated!\n")
     
     return output_path
 
+class PipelinedTTS:
+    """
+    대본 생성과 동시에 문단 단위로 TTS 실행 (스트리밍 모드)
+    
+    submit()으로 완성된 문단을 넘기면 백그라운드에서 바로 합성하고,
+    finish()에서 제출 순서대로 병합해 temp/audio.mp3 생성
+    """
+    
+    def __init__(self, max_workers=4, max_chars=4500):
+        os.makedirs('temp', exist_ok=True)
+        self.client = texttospeech.TextToSpeechClient()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_chars = max_chars
+        self.futures = []
+        self.next_part = 1
+    
+    def submit(self, text):
+        """문단 합성 시작 (병합은 제출 순서대로)"""
+        for chunk in split_script_smart(text.strip(), self.max_chars):
+            self.futures.append(self.executor.submit(generate_audio_part, self.client, chunk, self.next_part))
+            self.next_part += 1
+    
+    def finish(self, script):
+        """모든 합성 완료 대기 후 제출 순서대로 병합"""
+        try:
+            part_files = [future.result() for future in self.futures]
+        finally:
+            self.executor.shutdown(wait=True)
+        
+        print(f"\n📋 {len(part_files)} TTS parts synthesized during script generation")
+        return finalize_audio(part_files, script)
+    
+    def abort(self):
+        """실패 시 남은 합성 취소 + 이 대본용 오디오로 표시되지 않도록 marker 삭제"""
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        if os.path.exists(AUDIO_SOURCE_MARKER):
+            os.remove(AUDIO_SOURCE_MARKER)
+
+def generate_audio():
+    """Google Cloud TTS로 오디오 생성"""
+    
+    # temp 폴더 생성
+    os.makedirs('temp', exist_ok=True)
+    
+    # 스크립트 읽기
+    with open('temp/script.txt', 'r', encoding='utf-8') as f:
+        script = f.read()
+    
+    if audio_matches_script(script):
+        print(f"✅ {AUDIO_PATH} already synthesized for this script (streaming mode), skipping")
+        return AUDIO_PATH
+    
+    # Google Cloud 클라이언트 초기화
+    # GOOGLE_APPLICATION_CREDENTIALS 환경변수 사용
+    client = texttospeech.TextToSpeechClient()
+    
+    print(f"📊 Script length: {len(script)} chars")
+    print(f"⏱️ Estimated duration: ~{len(script) / 900:.1f} minutes\n")
+    print(f"🎙️ Voice: Google Neural2-J (Male, US English)\n")
+    
+    # 5000자 제한 대응
+    max_chars_per_part = 4500
+    
+    if len(script) > max_chars_per_part:
+        print(f"✂️ Splitting script into parts...\n")
+        parts = split_script_smart(script, max_chars_per_part)
+        print(f"📋 Split into {len(parts)} parts")
+        
+        for i, part in enumerate(parts, 1):
+            print(f"  Part {i}: {len(part)} chars")
+        print()
+    else:
+        parts = [script]
+        print("📋 Single file generation.\n")
+    
+    # 각 파트별 TTS 생성
+    part_files = []
+    
+    for i, part in enumerate(parts, 1):
+        part_file = generate_audio_part(client, part, i)
+        part_files.append(part_file)
+    
+    return finalize_audio(part_files, script)
+
 if __name__ == "__main__":
-    generate_audio()
+    with stage("generate_audio"):
+        generate_audio()
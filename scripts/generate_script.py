@@ -1,154 +1,169 @@
 #!/usr/bin/env python3
 import os
-from openai import OpenAI
+from llm_gateway import chat, chat_stream, usage_totals
+from prompts import build_messages
+from telemetry import stage
 
-def generate_script():
-    """6-8분 분량의 AI/Future Tech 대본 생성"""
-    
-    # temp 폴더 생성
-    os.makedirs('temp', exist_ok=True)
-    
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
-    prompt = """
-You are a professional YouTube scriptwriter specializing in AI and future technology content.
-
-Create a complete narration script for a 6-8 minute YouTube video about AI and future technology.
-
-CRITICAL RULES:
-1. Write ONLY the narration text that will be spoken
-2. DO NOT include any meta information like:
-   - Word counts (e.g., "200 words")
-   - Time markers (e.g., "1 minute 30 seconds")
-   - Section instructions (e.g., "This section should be...")
-   - Technical notes or comments
-3. DO NOT include section headers like "HOOK:", "INTRO:", etc.
-4. Write as one continuous, flowing narration
-5. Use NATURAL, ORGANIC transitions between ideas
-6. Speak directly to the viewer using "you" and "your"
-
-TARGET LENGTH: 1,500-1,700 words (approximately 8-9 minutes when narrated)
+# 스트리밍 모드: 대본 생성 중 완성된 문단부터 바로 TTS 시작
+STREAM_TTS = os.getenv('SCRIPT_STREAM_TTS', '0') == '1'
 
-CRITICAL LENGTH REQUIREMENTS:
-- The script MUST be at least 1,500 words minimum
-- Aim for 1,600-1,700 words for optimal 8-9 minute duration
-- Be thorough, detailed, and comprehensive in every section
-- Use concrete examples, research findings, and future predictions
-- Expand on ideas rather than condensing them
+# 너무 짧은 문단은 모아서 TTS 요청 (요청 수 절약)
+MIN_TTS_CHARS = 800
 
-CONTENT STRUCTURE (but don't label these in the script):
+# 대본이 짧을 때 전체 재생성 대신 부분 확장 (최대 라운드 수)
+MIN_WORDS = 1500
+TARGET_WORDS = 1600
+MAX_EXPAND_ROUNDS = int(os.getenv('SCRIPT_MAX_EXPAND_ROUNDS', '2'))
 
-1. HOOK (80-100 words / ~30-40 seconds):
-   - Start with a mind-blowing fact or provocative question
-   - Create curiosity about the future
-   - Make it relevant to everyday life
-   - Example: "By 2030, AI will change everything about how you work..."
-
-2. CONTEXT (150-200 words / ~60-80 seconds):
-   - Current state of the technology
-   - Recent breakthroughs or developments
-   - Why this matters NOW
-   - Real-world examples
-
-3. MAIN CONTENT (700-900 words / ~280-360 seconds):
-   - Deep dive into the technology/concept
-   - Explain how it works (simply)
-   - Future predictions for 2030
-   - Real applications and use cases
-   - Expert opinions or research findings
-   - Balance: optimism + realistic challenges
-   
-   ⭐ CRITICAL: TRANSITION NATURALLY
-   
-   GOOD TRANSITION EXAMPLES:
-   ✅ "But here's where it gets really interesting..."
-   ✅ "So what does this mean for you in 2030?"
-   ✅ "Now, imagine this scenario..."
-   ✅ "The question everyone's asking is..."
-   
-   BAD TRANSITIONS (NEVER USE):
-   ❌ "Let's transition to..."
-   ❌ "Moving on to the next section..."
-   ❌ "Now I will explain..."
-
-4. IMPACT & IMPLICATIONS (250-350 words / ~100-140 seconds):
-   - How this affects different industries
-   - Changes in daily life
-   - Opportunities and challenges
-   - What you need to know/prepare for
-
-5. CONCLUSION (80-100 words / ~30-40 seconds):
-   - Summarize the key takeaway
-   - Forward-looking statement
-   - Call to action (subscribe, comment)
-   - Leave viewer inspired and informed
-
-TONE & STYLE:
-- Informative yet accessible
-- Enthusiastic but not sensational
-- Clear explanations without jargon
-- Direct address to viewer
-- Professional yet conversational
-- Natural flow like a tech journalist
-
-TOPIC SELECTION:
-Choose ONE fascinating topic from:
-- AI breakthroughs (GPT-5, AGI progress, multimodal AI)
-- Quantum computing applications
-- Brain-computer interfaces
-- Autonomous systems (vehicles, robots, drones)
-- Space technology (Mars, space tourism, asteroid mining)
-- Metaverse and virtual worlds
-- Biotechnology and longevity
-- Renewable energy innovations
-- Smart cities and IoT
-- Future of work with AI
-
-TRANSITION PRINCIPLES:
-- Use questions to shift topics naturally
-- Use "but", "so", "now", "here's the thing" for smooth flow
-- Paint mental pictures
-- Make the listener WANT to hear what's next
-- Never announce section changes explicitly
-
-IMPORTANT REMINDERS:
-- Write ONLY what the narrator will say
-- NO technical markers, word counts, or time stamps
-- NO section labels or headers
-- ONE continuous narrative flow
-- Natural transitions between ideas
-- PRIORITIZE LENGTH - aim for 1,300+ words
-- Better to be detailed than too brief
+def stream_script_with_tts(messages, **params):
+    """
+    토큰 스트림을 받으면서 완성된 문단을 TTS 파이프라인에 제출
+    
+    마지막 문단(결론)은 길이 보정으로 앞에 문단이 추가될 수 있으므로
+    제출하지 않고 tail로 반환
+    
+    TTS 클라이언트를 만들 수 없으면 tts=None (대본만 생성, 오디오는 generate_audio.py에서)
+    """
+    from generate_audio import PipelinedTTS
+    
+    try:
+        tts = PipelinedTTS()
+    except Exception as e:
+        print(f"   ⚠️ Streaming TTS unavailable ({e}), audio will be generated in the next step")
+        tts = None
+    deltas = []
+    buffer = ''
+    pending = ''
+    held = ''
+    
+    for delta in chat_stream(model="gpt-4o", messages=messages, **params):
+        deltas.append(delta)
+        buffer += delta
+        
+        while '\n\n' in buffer:
+            paragraph, buffer = buffer.split('\n\n', 1)
+            paragraph = paragraph.strip()
+            if not paragraph:
+                continue
+            
+            # 가장 최근 문단은 결론일 수 있으므로 다음 문단이 올 때까지 보류
+            if held:
+                pending = f"{pending}\n\n{held}" if pending else held
+            held = paragraph
+            
+            if tts and len(pending) >= MIN_TTS_CHARS:
+                tts.submit(pending)
+                print(f"   🎙️ TTS started for paragraph block ({len(pending)} chars)")
+                pending = ''
+    
+    tail = '\n\n'.join(p for p in (pending, held, buffer.strip()) if p)
+    return ''.join(deltas).strip(), tts, tail
 
-Choose a unique, timely topic that provides genuine insights about the future of technology.
+def expand_script(script):
+    """
+    단어 수가 부족하면 기존 대본을 컨텍스트로 결론 앞에 들어갈 문단만 추가 요청
+    
+    Returns (script, added_paragraphs)
+    """
+    added = []
+    body, conclusion = split_conclusion(script)
+    
+    for round_num in range(1, MAX_EXPAND_ROUNDS + 1):
+        word_count = len(script.split())
+        if word_count >= MIN_WORDS:
+            break
+        
+        missing = TARGET_WORDS - word_count
+        print(f"\n📏 Expansion round {round_num}/{MAX_EXPAND_ROUNDS}: {word_count} words, requesting ~{missing} more")
+        
+        before = dict(usage_totals.get("gpt-4o", {}))
+        
+        expansion = chat(
+            model="gpt-4o",
+            messages=build_messages('script_expand', target_words=f"about {missing} words", script=script),
+            max_tokens=int(missing * 1.6) + 200,
+            temperature=0.8
+        ).strip()
+        
+        after = usage_totals.get("gpt-4o", {})
+        prompt_tokens = after.get('prompt_tokens', 0) - before.get('prompt_tokens', 0)
+        cached_tokens = after.get('cached_tokens', 0) - before.get('cached_tokens', 0)
+        completion_tokens = after.get('completion_tokens', 0) - before.get('completion_tokens', 0)
+        print(f"   💰 Expansion cost: {prompt_tokens} prompt ({cached_tokens} cached) + {completion_tokens} completion tokens "
+              f"(+{len(expansion.split())} words)")
+        
+        if not expansion:
+            break
+        
+        added.append(expansion)
+        script = '\n\n'.join(p for p in (body, *added, conclusion) if p)
+    
+    return script, added
 
-Begin the script now. Write ONLY the narration text in English.
-"""
+def split_conclusion(script):
+    """
+    (본문, 결론) - 결론은 마지막 문단, 확장 문단은 그 앞에 순서대로 들어감
+    
+    문단 구분이 없으면 결론 없음 → 확장 문단은 뒤에 붙음 (대본과 TTS 모두 같은 규칙)
+    """
+    body, sep, conclusion = script.rpartition('\n\n')
+    if not sep:
+        return script, ''
+    return body, conclusion
 
+def generate_script():
+    """6-8분 분량의 AI/Future Tech 대본 생성"""
+    
+    # temp 폴더 생성
+    os.makedirs('temp', exist_ok=True)
+    
     print("📝 Future Tech script generation...")
     print("   Model: gpt-4o")
     print("   Target: 1,500-1,700 words (8-9 minutes)")
     print("   Language: English")
     
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
-            {
-                "role": "system", 
-                "content": "You are a professional YouTube scriptwriter specializing in AI and future technology. Write comprehensive, detailed scripts of at least 1,200 words. Always aim for 1,300+ words. Write ONLY the narration text. Never include meta information, word counts, or section labels. Use NATURAL transitions. Make complex tech accessible and exciting."
-            },
-            {"role": "user", "content": prompt}
-        ],
-        max_tokens=3000,
-        temperature=0.8
-    )
-    
-    script = response.choices[0].message.content.strip()
+    messages = build_messages('script')
+    
+    tts = None
+    tail = ''
+    if STREAM_TTS:
+        print("   Mode: streaming (TTS pipelined per paragraph)")
+        script, tts, tail = stream_script_with_tts(messages, max_tokens=3000, temperature=0.8)
+    else:
+        script = chat(
+            model="gpt-4o",
+            messages=messages,
+            max_tokens=3000,
+            temperature=0.8
+        ).strip()
+    
+    # 길이 부족 시 결론 앞에 부분 확장 (전체 재생성 없음)
+    _, conclusion = split_conclusion(script)
+    script, added = expand_script(script)
     
     # 스크립트 저장
     with open('temp/script.txt', 'w', encoding='utf-8') as f:
         f.write(script)
     
+    # 스트리밍 모드: 확장 문단 + 결론 제출 후 temp/audio.mp3 병합
+    # 실패해도 대본은 저장됨 → audio.sha256이 없으므로 generate_audio.py가 전체 합성
+    if tts:
+        try:
+            # script.txt와 같은 순서: tail의 마지막 문단이 결론이면 확장 문단을 그 앞에
+            if conclusion:
+                head, _, last = tail.rpartition('\n\n')
+                blocks = [head, *added, last]
+            else:
+                blocks = [tail, *added]
+            for block in blocks:
+                if block:
+                    tts.submit(block)
+            tts.finish(script)
+        except Exception as e:
+            tts.abort()
+            print(f"\n⚠️ Streaming TTS failed: {e}")
+            print(f"   Audio will be synthesized by generate_audio.py instead")
+    
     # 통계
     word_count = len(script.split())
     char_count = len(script)
@@ -174,4 +189,5 @@ Begin the script now. Write ONLY the narration text in English.
     return script
 
 if __name__ == "__main__":
-    generate_script()
+    with stage("generate_script"):
+        generate_script()
@@ -1,267 +1,141 @@
 #!/usr/bin/env python3
 import os
-from openai import OpenAI
-import requests
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageOps
 from io import BytesIO
+from video_metadata import get_video_metadata
+from llm_gateway import generate_image
+from prompts import THUMBNAIL_BACKGROUND as THUMBNAIL_BACKGROUND_PROMPT
+from text_render import draw_outlined_text
+from jpeg_encode import encode_jpeg_under_limit
+from thumbnail_frames import FRAME_SOURCE_VIDEO, select_background_frame
+from thumbnail_variants import get_variant_count, render_thumbnail_variants
+from telemetry import stage
 
-def compress_image_to_limit(image_path, max_size_mb=2):
-    """이미지를 2MB 이하로 압축"""
-    max_bytes = max_size_mb * 1024 * 1024
+# 배경 소스: dalle (기본) / frame (완성 영상에서 프레임 선택, API 호출 없음)
+THUMBNAIL_SOURCE = os.environ.get('THUMBNAIL_SOURCE', 'dalle').lower()
+
+# DALL-E 배경 요청 (prefetch_llm.py도 같은 값으로 요청 → 캐시 공유)
+THUMBNAIL_IMAGE_MODEL = "dall-e-3"
+THUMBNAIL_IMAGE_PARAMS = {"size": "1792x1024", "quality": "standard"}
+
+# YouTube 권장 썸네일 해상도
+THUMBNAIL_SIZE = (1280, 720)
+
+def load_background(img_data, size=THUMBNAIL_SIZE):
+    """배경 이미지를 메모리에서 한 번만 디코딩 + 1280x720으로 한 번만 리사이즈 (center crop)"""
+    img = Image.open(BytesIO(img_data))
     
-    img = Image.open(image_path)
+    # JPEG이면 디코딩 단계에서 축소 (PNG는 무시됨)
+    img.draft('RGB', size)
     
     # RGBA → RGB 변환
     if img.mode == 'RGBA':
         background = Image.new('RGB', img.size, (255, 255, 255))
         background.paste(img, mask=img.split()[3])
         img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
     
-    # 품질 95부터 시작
-    quality = 95
-    while quality > 20:
-        buffer = BytesIO()
-        img.save(buffer, format='JPEG', quality=quality, optimize=True)
-        size = buffer.tell()
-        
-        if size <= max_bytes:
-            with open(image_path, 'wb') as f:
-                f.write(buffer.getvalue())
-            print(f"   ✅ Compression complete: {size / 1024 / 1024:.2f}MB (quality: {quality})")
-            return True
-        
-        quality -= 5
-    
-    # 해상도 축소
-    print(f"   ⚠️  Reducing resolution...")
-    img = img.resize((int(img.width * 0.8), int(img.height * 0.8)), Image.Resampling.LANCZOS)
-    buffer = BytesIO()
-    img.save(buffer, format='JPEG', quality=85, optimize=True)
-    
-    with open(image_path, 'wb') as f:
-        f.write(buffer.getvalue())
-    
-    final_size = os.path.getsize(image_path)
-    print(f"   ✅ Resolution reduced: {final_size / 1024 / 1024:.2f}MB")
-    return True
+    return ImageOps.fit(img, size, method=Image.Resampling.LANCZOS)
 
 def extract_thumbnail_text():
     """대본에서 썸네일 텍스트 추출 (2-4 단어)"""
     
-    api_key = os.environ.get('OPENAI_API_KEY')
-    if not api_key:
+    if not os.environ.get('OPENAI_API_KEY'):
         return "AI 2030"
     
-    client = OpenAI(api_key=api_key)
+    metadata = get_video_metadata()
+    if not metadata or not metadata.get('thumbnail_text'):
+        print(f"   ⚠️  Text extraction failed, using fallback")
+        return "AI 2030"
     
-    with open('temp/script.txt', 'r', encoding='utf-8') as f:
-        script = f.read()
+    text = clean_thumbnail_text(metadata['thumbnail_text'])
     
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a YouTube thumbnail text expert for tech content."
-                },
-                {
-                    "role": "user",
-                    "content": f"""Extract 2-4 POWERFUL words for a YouTube thumbnail from this AI/tech script.
-
-Script:
-{script[:500]}
-
-REQUIREMENTS:
-- 2-4 words ONLY
-- ALL CAPS
-- Tech-focused and impactful
-- Easy to read on mobile
-- Related to the main topic
-
-GOOD EXAMPLES:
-✅ AI REVOLUTION
-✅ FUTURE 2030
-✅ QUANTUM LEAP
-✅ TECH TAKEOVER
-✅ NEXT LEVEL AI
-
-BAD EXAMPLES:
-❌ How AI will change everything (too long)
-❌ technology (too generic)
-❌ Click here (clickbait)
+    print(f"   📝 Thumbnail text: {text}")
+    return text
 
-Output ONLY the text, no quotes, no explanation."""
-                }
-            ],
-            max_tokens=20,
-            temperature=0.7
-        )
-        
-        text = response.choices[0].message.content.strip()
-        text = text.replace('"', '').replace("'", '').upper()
-        
-        # 최대 4단어로 제한
-        words = text.split()[:4]
-        text = ' '.join(words)
-        
-        print(f"   📝 Thumbnail text: {text}")
-        return text
-        
-    except Exception as e:
-        print(f"   ⚠️  Text extraction failed: {e}")
-        return "AI 2030"
+def clean_thumbnail_text(text):
+    """따옴표 제거 + 대문자 + 최대 4단어"""
+    text = text.strip()
+    text = text.replace('"', '').replace("'", '').upper()
+    
+    # 최대 4단어로 제한
+    words = text.split()[:4]
+    return ' '.join(words)
 
-def add_text_to_thumbnail(image_path, text):
-    """썸네일에 텍스트 오버레이 추가"""
-    img = Image.open(image_path)
-    draw = ImageDraw.Draw(img)
+def extract_alternative_texts():
+    """A/B 변형용 대체 썸네일 텍스트 (메타데이터에 없으면 빈 목록)"""
     
-    width, height = img.size
+    if not os.environ.get('OPENAI_API_KEY'):
+        return []
     
-    # 여백
-    margin = int(width * 0.1)
-    max_text_width = width - (margin * 2)
+    metadata = get_video_metadata() or {}
+    alternatives = metadata.get('thumbnail_text_alternatives') or []
+    return [clean_thumbnail_text(text) for text in alternatives if text.strip()]
+
+def add_text_to_thumbnail(img, text):
+    """썸네일에 텍스트 오버레이 추가 (메모리 상의 이미지에 직접 그림)"""
+    # 텍스트 위치: 상단 1/4, 가로 중앙 / 흰색 + 검은색 외곽선
+    font_size = draw_outlined_text(img, text, y_frac=0.25)
     
-    # 폰트 크기
-    font_size = int(width / 10)
+    print(f"   ✅ Text overlay complete: '{text}' (font: {font_size}px)")
+    return img
+
+def generate_background_dalle():
+    """DALL-E 3 배경 생성 → 1280x720 RGB 이미지"""
+    print(f"   🎨 DALL-E 3 generating...")
     
-    try:
-        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", font_size)
-    except:
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", font_size)
-        except:
-            font = ImageFont.load_default()
-            print("   ⚠️  System font not found, using default")
+    img_data = generate_image(
+        model=THUMBNAIL_IMAGE_MODEL,
+        prompt=THUMBNAIL_BACKGROUND_PROMPT,
+        **THUMBNAIL_IMAGE_PARAMS
+    )
     
-    # 텍스트 크기 계산
-    bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = bbox[2] - bbox[0]
-    text_height = bbox[3] - bbox[1]
+    print(f"   📥 Original size: {len(img_data) / 1024 / 1024:.2f}MB")
     
-    # 텍스트가 너무 길면 폰트 축소
-    retry_count = 0
-    while text_width > max_text_width and retry_count < 5:
-        font_size = int(font_size * 0.85)
+    # 디코딩 1회 + 1280x720 리사이즈 1회
+    return load_background(img_data)
+
+def load_thumbnail_background():
+    """THUMBNAIL_SOURCE에 따라 배경 준비 (frame 실패 시 DALL-E로 대체)"""
+    if THUMBNAIL_SOURCE == 'frame':
+        print(f"   🎞️  Selecting background frame from {FRAME_SOURCE_VIDEO}...")
         try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", font_size)
-        except:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf", font_size)
-            except:
-                font = ImageFont.load_default()
-        
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        retry_count += 1
-        print(f"   🔧 Text too long → font size reduced: {font_size}px")
-    
-    # 텍스트 위치 (상단 1/3, 중앙)
-    x = (width - text_width) / 2
-    x = max(margin, min(x, width - margin - text_width))
-    y = height / 4
-    
-    # 검은색 외곽선
-    outline_width = max(8, int(font_size / 20))
-    for offset_x in range(-outline_width, outline_width + 1):
-        for offset_y in range(-outline_width, outline_width + 1):
-            if offset_x != 0 or offset_y != 0:
-                draw.text((x + offset_x, y + offset_y), text, font=font, fill=(0, 0, 0))
+            return select_background_frame(FRAME_SOURCE_VIDEO, THUMBNAIL_SIZE)
+        except Exception as e:
+            print(f"   ⚠️  Frame selection failed: {e}")
+            if not os.environ.get('OPENAI_API_KEY'):
+                raise
+            print(f"   ↩️  Falling back to DALL-E")
+    elif THUMBNAIL_SOURCE != 'dalle':
+        raise ValueError(f"Unknown THUMBNAIL_SOURCE '{THUMBNAIL_SOURCE}' (expected 'frame' or 'dalle')")
     
-    # 흰색 텍스트
-    draw.text((x, y), text, font=font, fill=(255, 255, 255))
-    
-    img.save(image_path, quality=95)
-    print(f"   ✅ Text overlay complete: '{text}' (font: {font_size}px)")
+    return generate_background_dalle()
 
 def generate_thumbnail():
-    """DALL-E 3로 AI/Tech 썸네일 생성"""
+    """DALL-E 3(또는 영상 프레임) 배경으로 AI/Tech 썸네일 생성"""
     
     # temp 폴더 생성
     os.makedirs('temp', exist_ok=True)
     
-    client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-    
     # 1단계: 썸네일 텍스트 추출
     print(f"\n🎨 Generating thumbnail...")
     thumbnail_text = extract_thumbnail_text()
     
-    # 2단계: 배경 이미지 생성
-    prompt = f"""
-Create a professional YouTube thumbnail background for an AI and future technology video:
-
-VISUAL STYLE:
-- Futuristic, high-tech aesthetic
-- Dramatic lighting with neon accents (blue, purple, cyan)
-- Focus on AI/robotics/digital technology imagery
-- Cinematic, eye-catching composition
-- Professional photography style
-
-SUBJECT OPTIONS (choose one):
-- AI robot or humanoid with glowing eyes
-- Futuristic cityscape with holographic displays
-- Neural network visualization with glowing nodes
-- High-tech laboratory with advanced equipment
-- Digital brain or AI consciousness representation
-
-IMPORTANT: NO TEXT in the image (text will be added separately)
-
-COLOR SCHEME:
-- Background: Deep blue, dark purple, or black
-- Accent: Neon blue, cyan, or electric purple
-- Lighting: Dramatic, high contrast
-- Modern, sleek, futuristic
-
-COMPOSITION:
-- 16:9 aspect ratio (1280x720)
-- Leave top third area clear for text overlay
-- Professional, eye-catching
-- YouTube thumbnail optimized
-
-STYLE: Futuristic, cinematic, high-tech, professional, clickable
-QUALITY: High-detail, photorealistic or stylized 3D render
-
-CRITICAL: NO TEXT, NO WORDS, NO LETTERS in the image
-The text will be added programmatically later
-"""
-
-    print(f"   🎨 DALL-E 3 generating...")
-    
-    response = client.images.generate(
-        model="dall-e-3",
-        prompt=prompt,
-        size="1792x1024",
-        quality="standard",
-        n=1
-    )
-    
-    image_url = response.data[0].url
-    
-    # 다운로드
-    print(f"   ⬇️  Downloading...")
-    img_data = requests.get(image_url).content
+    # 2~3단계: 배경 준비 (1280x720)
+    background = load_thumbnail_background()
     
     thumbnail_path = 'temp/thumbnail.jpg'
     
-    with open(thumbnail_path, 'wb') as f:
-        f.write(img_data)
-    
-    original_size = os.path.getsize(thumbnail_path)
-    print(f"   📥 Original size: {original_size / 1024 / 1024:.2f}MB")
-    
-    # 3단계: 텍스트 오버레이
+    # 4단계: 텍스트 오버레이 (배경은 변형 렌더링에 재사용)
     print(f"   ✍️  Adding text...")
-    add_text_to_thumbnail(thumbnail_path, thumbnail_text)
+    img = add_text_to_thumbnail(background.copy(), thumbnail_text)
     
-    # 4단계: 2MB 압축
-    current_size = os.path.getsize(thumbnail_path)
-    if current_size > 2 * 1024 * 1024:
-        print(f"   🔧 Over 2MB → compressing...")
-        compress_image_to_limit(thumbnail_path, max_size_mb=2)
-    else:
-        print(f"   ✅ Under 2MB, no compression needed")
+    # 5단계: 2MB 이하로 최종 인코딩 (품질 이진 탐색)
+    jpeg_data, quality = encode_jpeg_under_limit(img)
+    with open(thumbnail_path, 'wb') as f:
+        f.write(jpeg_data)
+    print(f"   ✅ Encoded: {len(jpeg_data) / 1024 / 1024:.2f}MB (quality: {quality})")
     
     final_size = os.path.getsize(thumbnail_path)
     
@@ -270,7 +144,15 @@ The text will be added programmatically later
     print(f"   📊 Final size: {final_size / 1024 / 1024:.2f}MB")
     print(f"   📝 Text: '{thumbnail_text}'")
     
+    # 6단계: A/B 테스트용 변형 (같은 배경, 텍스트/위치/색상만 다르게)
+    variant_count = get_variant_count()
+    if variant_count > 1:
+        texts = [thumbnail_text] + extract_alternative_texts()
+        base = {'path': thumbnail_path, 'quality': quality, 'bytes': len(jpeg_data)}
+        render_thumbnail_variants(background, texts, variant_count, base=base)
+    
     return thumbnail_path
 
 if __name__ == "__main__":
-    generate_thumbnail()
+    with stage("generate_thumbnail"):
+        generate_thumbnail()
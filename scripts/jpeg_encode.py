@@ -0,0 +1,47 @@
+"""
+썸네일 JPEG 인코딩 (generate_thumbnail.py / thumbnail_variants.py 워커 공용)
+
+워커 프로세스가 generate_thumbnail 전체(LLM 게이트웨이, 프레임 선택 등)를
+import하지 않도록 인코딩만 분리
+"""
+
+from io import BytesIO
+from PIL import Image
+
+# YouTube 썸네일 용량 제한
+MAX_THUMBNAIL_BYTES = 2 * 1024 * 1024
+
+def _encode_jpeg(img, quality):
+    buffer = BytesIO()
+    img.save(buffer, format='JPEG', quality=quality, optimize=True)
+    return buffer.getvalue()
+
+def encode_jpeg_under_limit(img, max_bytes=MAX_THUMBNAIL_BYTES, min_quality=20, max_quality=95):
+    """
+    용량 제한 이하가 되는 가장 높은 JPEG 품질을 이진 탐색으로 찾아 인코딩
+    
+    1280x720에서는 보통 최고 품질 한 번으로 끝나고, 넘는 경우에도
+    최대 ~7번의 인코딩으로 결정됨
+    """
+    data = _encode_jpeg(img, max_quality)
+    if len(data) <= max_bytes:
+        return data, max_quality
+    
+    best = None
+    low, high = min_quality, max_quality - 1
+    while low <= high:
+        quality = (low + high) // 2
+        candidate = _encode_jpeg(img, quality)
+        if len(candidate) <= max_bytes:
+            best = (candidate, quality)
+            low = quality + 1
+        else:
+            high = quality - 1
+    
+    if best:
+        return best
+    
+    # 최저 품질로도 초과 → 해상도 축소 후 재시도
+    print(f"   ⚠️  Reducing resolution...")
+    smaller = img.resize((int(img.width * 0.8), int(img.height * 0.8)), Image.Resampling.LANCZOS)
+    return encode_jpeg_under_limit(smaller, max_bytes, min_quality, max_quality)
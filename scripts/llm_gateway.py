@@ -0,0 +1,414 @@
+"""
+Shared gateway for every OpenAI call in the pipeline.
+
+Responses are cached on disk keyed by a hash of (kind, model, messages,
+parameters), so reruns of a stage never re-pay model latency for an
+identical prompt. LLM_MODE selects the behaviour:
+
+- live   (default) serve from cache, call the API on a miss and store it;
+         sampled chat calls (temperature > 0, the API default) always go to
+         the API so a reused temp/ never replays yesterday's "new" script
+- record always call the API and overwrite the cached response
+- replay serve only from cache; a miss is an error (offline runs)
+- off    no cache at all
+
+Point LLM_CACHE_DIR at a fixtures directory to record once and replay the
+whole pipeline offline. Every call is reported with its latency and token
+usage, appended to temp/llm_calls.jsonl and added to the stage's run report.
+
+achat()/agenerate_image() are AsyncOpenAI counterparts sharing the same
+cache, and gather_calls() runs independent calls concurrently with bounded
+parallelism and per-call timeouts.
+
+embed() caches each input text separately, so a batch only sends the texts
+that have not been embedded before.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import requests
+from telemetry import record_api_call
+
+LLM_MODE = os.environ.get('LLM_MODE', 'live').lower()
+LLM_CACHE_DIR = os.environ.get('LLM_CACHE_DIR', 'temp/llm_cache')
+LLM_CALL_LOG = os.environ.get('LLM_CALL_LOG', 'temp/llm_calls.jsonl')
+
+MODES = ('live', 'record', 'replay', 'off')
+
+# Concurrency limit and per-call timeout for the async layer
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', '4'))
+LLM_CALL_TIMEOUT = float(os.environ.get('LLM_CALL_TIMEOUT', '180'))
+
+# The embeddings endpoint accepts at most 2048 inputs per request
+EMBED_BATCH_SIZE = 2048
+
+_client = None
+_async_client = None
+
+# Token totals for this process, per model
+usage_totals = {}
+
+class ReplayMiss(RuntimeError):
+    """Raised in replay mode when no recorded response exists"""
+
+def get_client():
+    """Lazily created OpenAI client shared by all calls in this process"""
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+    return _client
+
+def get_async_client():
+    """Lazily created AsyncOpenAI client for the concurrent layer"""
+    global _async_client
+    if _async_client is None:
+        from openai import AsyncOpenAI
+        _async_client = AsyncOpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+    return _async_client
+
+def _check_mode():
+    if LLM_MODE not in MODES:
+        raise ValueError(f"Unknown LLM_MODE '{LLM_MODE}' (expected one of {MODES})")
+
+def cache_key(kind, payload):
+    """Content address for a request: sha256 of its canonical JSON"""
+    canonical = json.dumps({'kind': kind, **payload}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+def _cache_path(key, suffix='.json'):
+    return os.path.join(LLM_CACHE_DIR, key[:2], key + suffix)
+
+def is_sampled(params):
+    """True for chat requests whose output is meant to vary between calls"""
+    return params.get('temperature', 1.0) > 0
+
+def _read_cache(key, sampled=False):
+    if LLM_MODE in ('off', 'record'):
+        return None
+    # Stored for record/replay, but a live run wants a fresh sample
+    if sampled and LLM_MODE == 'live':
+        return None
+
+    path = _cache_path(key)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    if LLM_MODE == 'replay':
+        raise ReplayMiss(f"No recorded LLM response for {key} in {LLM_CACHE_DIR}")
+    return None
+
+def _write_cache(key, record, blob=None):
+    if LLM_MODE == 'off':
+        return
+
+    path = _cache_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if blob is not None:
+        with open(_cache_path(key, '.bin'), 'wb') as f:
+            f.write(blob)
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _report(kind, model, latency, usage, cached, first_token=None):
+    """Print and log one call's latency and token usage"""
+    usage = usage or {}
+    prompt_tokens = usage.get('prompt_tokens', 0)
+    completion_tokens = usage.get('completion_tokens', 0)
+    # Prompt tokens served from the provider's prefix cache
+    cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens', 0)
+
+    if not cached:
+        totals = usage_totals.setdefault(model, {
+            'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'completion_tokens': 0
+        })
+        totals['calls'] += 1
+        totals['prompt_tokens'] += prompt_tokens
+        totals['cached_tokens'] += cached_tokens
+        totals['completion_tokens'] += completion_tokens
+
+    source = 'cache' if cached else 'api'
+    ttft = f" (first token {first_token:.2f}s)" if first_token is not None else ''
+    print(f"   🧠 {model} ({kind}, {source}): {latency:.2f}s{ttft}, "
+          f"{prompt_tokens} prompt ({cached_tokens} cached) + {completion_tokens} completion tokens")
+
+    entry = {
+        'stage': os.path.basename(sys.argv[0]),
+        'kind': kind,
+        'model': model,
+        'cached': cached,
+        'latency_s': round(latency, 3),
+        'first_token_s': round(first_token, 3) if first_token is not None else None,
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': cached_tokens,
+        'completion_tokens': completion_tokens,
+        'timestamp': time.time()
+    }
+
+    record_api_call('openai', kind, latency, model=model, cached=cached,
+                    prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    log_dir = os.path.dirname(LLM_CALL_LOG)
+    if log_dir:
+        os.makedirs(log_dir, exist_ok=True)
+    with open(LLM_CALL_LOG, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def _usage_dict(usage):
+    if usage is None:
+        return {}
+    return usage.model_dump() if hasattr(usage, 'model_dump') else dict(usage)
+
+def _sum_usage(total, usage):
+    if total is None:
+        return usage
+    return {key: total.get(key, 0) + value if isinstance(value, int) else value
+            for key, value in usage.items()}
+
+def _chat_key(model, messages, params):
+    return cache_key('chat', {'model': model, 'messages': messages, 'params': params})
+
+def _chat_record(model, response):
+    message = response.choices[0].message
+    return {
+        'model': model,
+        'content': message.content,
+        'refusal': getattr(message, 'refusal', None),
+        'finish_reason': response.choices[0].finish_reason,
+        'usage': _usage_dict(response.usage)
+    }
+
+def _chat_result(model, record, start, cached):
+    _report('chat', model, time.perf_counter() - start, record.get('usage'), cached)
+
+    if record.get('refusal'):
+        raise RuntimeError(f"{model} refused the request: {record['refusal']}")
+    return record['content']
+
+def chat(model, messages, **params):
+    """
+    chat.completions.create through the cache. Returns the message content.
+
+    Extra keyword arguments (temperature, max_tokens, response_format, ...)
+    are passed to the API and are part of the cache key.
+    """
+    _check_mode()
+    key = _chat_key(model, messages, params)
+
+    start = time.perf_counter()
+    record = _read_cache(key, is_sampled(params))
+    cached = record is not None
+
+    if record is None:
+        response = get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            **params
+        )
+        record = _chat_record(model, response)
+        _write_cache(key, record)
+
+    return _chat_result(model, record, start, cached)
+
+async def achat(model, messages, **params):
+    """Async chat() using AsyncOpenAI; shares the same cache entries"""
+    _check_mode()
+    key = _chat_key(model, messages, params)
+
+    start = time.perf_counter()
+    record = _read_cache(key, is_sampled(params))
+    cached = record is not None
+
+    if record is None:
+        response = await get_async_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            **params
+        )
+        record = _chat_record(model, response)
+        _write_cache(key, record)
+
+    return _chat_result(model, record, start, cached)
+
+def _image_key(model, prompt, params):
+    return cache_key('image', {'model': model, 'prompt': prompt, 'params': params})
+
+def _read_image_blob(key):
+    with open(_cache_path(key, '.bin'), 'rb') as f:
+        return f.read()
+
+def generate_image(model, prompt, **params):
+    """images.generate through the cache. Returns the image bytes."""
+    _check_mode()
+    key = _image_key(model, prompt, params)
+
+    start = time.perf_counter()
+    record = _read_cache(key)
+    cached = record is not None
+
+    if record is not None:
+        image_data = _read_image_blob(key)
+    else:
+        response = get_client().images.generate(model=model, prompt=prompt, n=1, **params)
+        # Image URLs expire, so the bytes themselves are what gets cached
+        image_data = requests.get(response.data[0].url, timeout=60).content
+        record = {'model': model, 'bytes': len(image_data)}
+        _write_cache(key, record, blob=image_data)
+
+    _report('image', model, time.perf_counter() - start, None, cached)
+    return image_data
+
+async def agenerate_image(model, prompt, **params):
+    """Async generate_image(); shares the same cache entries"""
+    _check_mode()
+    key = _image_key(model, prompt, params)
+
+    start = time.perf_counter()
+    record = _read_cache(key)
+    cached = record is not None
+
+    if record is not None:
+        image_data = _read_image_blob(key)
+    else:
+        response = await get_async_client().images.generate(model=model, prompt=prompt, n=1, **params)
+        url = response.data[0].url
+        image_data = await asyncio.to_thread(lambda: requests.get(url, timeout=60).content)
+        record = {'model': model, 'bytes': len(image_data)}
+        _write_cache(key, record, blob=image_data)
+
+    _report('image', model, time.perf_counter() - start, None, cached)
+    return image_data
+
+async def _bounded(semaphore, name, factory, timeout):
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(factory(), timeout)
+        except asyncio.TimeoutError:
+            print(f"   ⏱️ {name}: timed out after {timeout:g}s")
+            return TimeoutError(f"{name} timed out after {timeout:g}s")
+        except Exception as e:
+            print(f"   ⚠️ {name}: failed after {time.perf_counter() - start:.1f}s: {e}")
+            return e
+        print(f"   ✅ {name}: done in {time.perf_counter() - start:.1f}s")
+        return result
+
+async def gather_calls(calls, max_concurrency=None, timeout=None):
+    """
+    Run independent async LLM calls concurrently.
+
+    calls maps a name to a zero-argument coroutine function. At most
+    max_concurrency calls are in flight and each gets its own timeout.
+    Returns {name: result or exception}; one failure never cancels others.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency or LLM_MAX_CONCURRENCY)
+    timeout = timeout or LLM_CALL_TIMEOUT
+
+    names = list(calls)
+    results = await asyncio.gather(*(
+        _bounded(semaphore, name, calls[name], timeout) for name in names
+    ))
+    return dict(zip(names, results))
+
+def chat_stream(model, messages, **params):
+    """
+    Streaming variant of chat(): yields content deltas as they arrive.
+
+    Shares the cache with chat() (same key), so a cached response is
+    replayed as a single chunk and a streamed response is stored once the
+    stream completes.
+    """
+    _check_mode()
+    key = _chat_key(model, messages, params)
+
+    start = time.perf_counter()
+    record = _read_cache(key, is_sampled(params))
+
+    if record is not None:
+        _report('chat', model, time.perf_counter() - start, record.get('usage'), True)
+        yield record['content']
+        return
+
+    stream = get_client().chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={'include_usage': True},
+        **params
+    )
+
+    parts = []
+    usage = None
+    finish_reason = None
+    first_token = None
+
+    for chunk in stream:
+        if chunk.usage is not None:
+            usage = _usage_dict(chunk.usage)
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        delta = choice.delta.content
+        if delta:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            parts.append(delta)
+            yield delta
+
+    record = {
+        'model': model,
+        'content': ''.join(parts),
+        'refusal': None,
+        'finish_reason': finish_reason,
+        'usage': usage or {}
+    }
+    _write_cache(key, record)
+    _report('chat', model, time.perf_counter() - start, record['usage'], False, first_token)
+
+def embed(texts, model='text-embedding-3-small', **params):
+    """
+    embeddings.create through the cache. Returns one vector (list of floats)
+    per input text.
+
+    Each text is cached on its own key; misses go out in requests of up to
+    EMBED_BATCH_SIZE inputs, and each batch is cached as soon as it returns.
+    """
+    _check_mode()
+    start = time.perf_counter()
+
+    keys = [cache_key('embedding', {'model': model, 'input': text, 'params': params}) for text in texts]
+    vectors = [None] * len(texts)
+    missing = []
+    for i, key in enumerate(keys):
+        record = _read_cache(key)
+        if record is not None:
+            vectors[i] = record['embedding']
+        else:
+            missing.append(i)
+
+    usage = None
+    for offset in range(0, len(missing), EMBED_BATCH_SIZE):
+        batch = missing[offset:offset + EMBED_BATCH_SIZE]
+        response = get_client().embeddings.create(
+            model=model,
+            input=[texts[i] for i in batch],
+            **params
+        )
+        usage = _sum_usage(usage, _usage_dict(response.usage))
+        for i, item in zip(batch, sorted(response.data, key=lambda d: d.index)):
+            vectors[i] = item.embedding
+            _write_cache(keys[i], {'model': model, 'embedding': item.embedding})
+
+    _report('embedding', model, time.perf_counter() - start, usage, not missing)
+    return vectors
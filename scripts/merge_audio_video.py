@@ -6,7 +6,9 @@
 import os
 import sys
 import subprocess
+import time
 from pathlib import Path
+from telemetry import stage, record_encode, set_metric
 
 def get_duration(file_path):
     """FFprobe로 파일 길이 가져오기"""
@@ -80,7 +82,9 @@ def merge_audio_video():
             str(output_path)
         ]
         
+        start = time.perf_counter()
         result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        record_encode('merge', audio_duration, time.perf_counter() - start)
         
         print(f"✅ Merge completed!")
         
@@ -96,6 +100,8 @@ def merge_audio_video():
     
     final_duration = get_duration(str(output_path))
     final_size = output_path.stat().st_size / (1024 * 1024)
+    set_metric('output_duration_s', round(final_duration, 2))
+    set_metric('output_mb', round(final_size, 1))
     
     print(f"\n" + "=" * 60)
     print(f"🎉 Final video created!")
@@ -108,7 +114,8 @@ def merge_audio_video():
 
 if __name__ == "__main__":
     try:
-        merge_audio_video()
+        with stage('merge_audio_video'):
+            merge_audio_video()
     except KeyboardInterrupt:
         print("\n\n⚠️ User interrupted")
         sys.exit(1)
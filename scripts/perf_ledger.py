@@ -0,0 +1,270 @@
+"""
+Historical performance ledger with regression detection.
+
+Each run's temp/run_report.json (see telemetry.py) is ingested into a local
+SQLite database (cache/perf_ledger.sqlite, persisted with the B-roll cache)
+as one row per (run, stage, metric): wall/CPU time, peak RSS, encode speed,
+API latency percentiles, byte counters and stage metrics such as clip counts
+and output durations.
+
+    python scripts/perf_ledger.py ingest [temp/run_report.json]
+    python scripts/perf_ledger.py trend [--stage create_video] [--metric wall_s]
+    python scripts/perf_ledger.py check [--window 5] [--baseline 20] [--threshold 0.2]
+
+`check` compares the p50 and p90 of the latest `window` successful runs of
+each stage against the `baseline` runs before them, and flags metrics that
+got worse by more than `threshold` (and by more than a small absolute floor,
+so sub-second stages do not flap). On GitHub Actions flags are also emitted
+as ::warning:: annotations; --strict turns them into a failing exit code.
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import fnmatch
+
+LEDGER_PATH = os.environ.get('PERF_LEDGER', 'cache/perf_ledger.sqlite')
+RUN_REPORT = os.environ.get('RUN_REPORT', 'temp/run_report.json')
+
+# Metrics checked for regressions: pattern → direction that counts as worse
+CHECKED_METRICS = {
+    'wall_s': 'higher',
+    'cpu_s': 'higher',
+    'child_cpu_s': 'higher',
+    'peak_rss_mb': 'higher',
+    'child_peak_rss_mb': 'higher',
+    'encode.speed_x': 'lower',
+    'api.*.p50_s': 'higher',
+    'metrics.download_aggregate_mb_s': 'lower',
+}
+
+# Changes smaller than this are noise regardless of the relative threshold
+ABSOLUTE_FLOOR = {'_s': 1.0, '_mb': 25.0, '_x': 0.1, '_mb_s': 0.5}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    started REAL,
+    ingested REAL,
+    commit_sha TEXT,
+    host TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id TEXT,
+    stage TEXT,
+    status TEXT,
+    started REAL,
+    PRIMARY KEY (run_id, stage)
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id TEXT,
+    stage TEXT,
+    name TEXT,
+    value REAL,
+    PRIMARY KEY (run_id, stage, name)
+);
+CREATE INDEX IF NOT EXISTS metrics_by_name ON metrics (stage, name);
+"""
+
+def connect(path=LEDGER_PATH):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    return db
+
+def percentile(values, q):
+    """Linear-interpolated percentile (q in 0..100) of a non-empty list"""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+def flatten_stage(stage):
+    """Numeric metrics of one run-report stage as {name: value}"""
+    flat = {}
+    for key in ('wall_s', 'cpu_s', 'child_cpu_s', 'peak_rss_mb', 'child_peak_rss_mb'):
+        if stage.get(key) is not None:
+            flat[key] = stage[key]
+
+    encode = stage.get('encode') or {}
+    for key in ('runs', 'media_s', 'wall_s', 'speed_x'):
+        if encode.get(key) is not None:
+            flat[f'encode.{key}'] = encode[key]
+
+    for api_key, summary in (stage.get('api') or {}).items():
+        for key in ('calls', 'errors', 'p50_s', 'max_s', 'total_s'):
+            flat[f'api.{api_key}.{key}'] = summary[key]
+
+    for group in ('counters', 'metrics'):
+        for key, value in (stage.get(group) or {}).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                flat[f'{group}.{key}'] = value
+
+    steps = stage.get('steps') or []
+    if steps:
+        flat['steps'] = len(steps)
+    return flat
+
+def ingest(report_path=RUN_REPORT, db=None):
+    """Store one run report; re-ingesting the same run replaces it"""
+    with open(report_path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+
+    run_id = report.get('run_id') or f"local-{int(report.get('created', time.time()))}"
+    db = db or connect()
+    with db:
+        db.execute("DELETE FROM stages WHERE run_id = ?", (run_id,))
+        db.execute("DELETE FROM metrics WHERE run_id = ?", (run_id,))
+        db.execute(
+            "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?)",
+            (run_id, report.get('created'), time.time(), os.environ.get('GITHUB_SHA'),
+             json.dumps(report.get('host') or {}))
+        )
+        rows = 0
+        for name, stage in report.get('stages', {}).items():
+            db.execute("INSERT INTO stages VALUES (?, ?, ?, ?)",
+                       (run_id, name, stage.get('status'), stage.get('started')))
+            flat = flatten_stage(stage)
+            db.executemany("INSERT INTO metrics VALUES (?, ?, ?, ?)",
+                           [(run_id, name, key, float(value)) for key, value in flat.items()])
+            rows += len(flat)
+    return run_id, len(report.get('stages', {})), rows
+
+def history(db, stage, name, limit=None):
+    """[(started, value), ...] of successful runs, oldest first"""
+    query = """
+        SELECT s.started, m.value FROM metrics m
+        JOIN stages s ON s.run_id = m.run_id AND s.stage = m.stage
+        WHERE m.stage = ? AND m.name = ? AND s.status = 'ok'
+        ORDER BY s.started DESC
+    """
+    params = [stage, name]
+    if limit:
+        query += " LIMIT ?"
+        params.append(limit)
+    return list(reversed(db.execute(query, params).fetchall()))
+
+def checked_direction(name):
+    for pattern, direction in CHECKED_METRICS.items():
+        if fnmatch.fnmatchcase(name, pattern):
+            return direction
+    return None
+
+def absolute_floor(name):
+    for suffix in sorted(ABSOLUTE_FLOOR, key=len, reverse=True):
+        if name.endswith(suffix):
+            return ABSOLUTE_FLOOR[suffix]
+    return 0.0
+
+def find_regressions(db, window=5, baseline=20, threshold=0.2, min_baseline=5):
+    """
+    Compare p50/p90 of the latest `window` runs with the `baseline` runs
+    before them. Returns a list of dicts, worst relative change first.
+    """
+    regressions = []
+    pairs = db.execute("SELECT DISTINCT stage, name FROM metrics ORDER BY stage, name").fetchall()
+    for stage, name in pairs:
+        direction = checked_direction(name)
+        if direction is None:
+            continue
+
+        values = [value for _, value in history(db, stage, name, window + baseline)]
+        recent, base = values[-window:], values[:-window]
+        if len(recent) < window or len(base) < min_baseline:
+            continue
+
+        for q in (50, 90):
+            recent_q = percentile(recent, q)
+            base_q = percentile(base, q)
+            if base_q <= 0:
+                continue
+            change = (recent_q - base_q) / base_q
+            worse = change if direction == 'higher' else -change
+            if worse > threshold and abs(recent_q - base_q) >= absolute_floor(name):
+                regressions.append({
+                    'stage': stage, 'metric': name, 'quantile': f'p{q}',
+                    'baseline': base_q, 'recent': recent_q, 'change': change
+                })
+    return sorted(regressions, key=lambda r: abs(r['change']), reverse=True)
+
+def _format_value(value):
+    return f"{value:.0f}" if abs(value) >= 100 else f"{value:.2f}"
+
+def _cmd_ingest(args):
+    run_id, stages, rows = ingest(args.report)
+    print(f"📒 Ingested run {run_id}: {stages} stages, {rows} metrics → {LEDGER_PATH}")
+
+def _cmd_trend(args):
+    db = connect()
+    stages = [args.stage] if args.stage else [
+        row[0] for row in db.execute(
+            "SELECT stage FROM stages GROUP BY stage ORDER BY MIN(started)"
+        )
+    ]
+    runs = db.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    print(f"📈 {args.metric} over the last {args.last} successful runs ({runs} runs in ledger)")
+
+    for stage in stages:
+        points = history(db, stage, args.metric, args.last)
+        if not points:
+            continue
+        values = [value for _, value in points]
+        latest = values[-1]
+        print(f"\n   {stage}")
+        print(f"      {' '.join(_format_value(v) for v in values)}")
+        print(f"      latest {_format_value(latest)}, p50 {_format_value(percentile(values, 50))}, "
+              f"p90 {_format_value(percentile(values, 90))}, "
+              f"range {_format_value(min(values))}-{_format_value(max(values))}")
+
+def _cmd_check(args):
+    db = connect()
+    regressions = find_regressions(db, args.window, args.baseline, args.threshold)
+    if not regressions:
+        print(f"✅ No regressions (latest {args.window} runs vs previous {args.baseline}, "
+              f"threshold {args.threshold:.0%})")
+        return
+
+    print(f"⚠️ {len(regressions)} regression(s) (latest {args.window} runs vs previous {args.baseline}):")
+    for r in regressions:
+        message = (f"{r['stage']} {r['metric']} {r['quantile']}: "
+                   f"{_format_value(r['baseline'])} → {_format_value(r['recent'])} ({r['change']:+.0%})")
+        print(f"   📉 {message}")
+        if os.environ.get('GITHUB_ACTIONS'):
+            print(f"::warning title=Performance regression::{message}")
+
+    if args.strict:
+        sys.exit(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pipeline performance ledger")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    ingest_parser = subparsers.add_parser('ingest', help="Add a run report to the ledger")
+    ingest_parser.add_argument('report', nargs='?', default=RUN_REPORT)
+    ingest_parser.set_defaults(func=_cmd_ingest)
+
+    trend_parser = subparsers.add_parser('trend', help="Print recent values per stage")
+    trend_parser.add_argument('--stage', default=None)
+    trend_parser.add_argument('--metric', default='wall_s',
+                              help="e.g. wall_s, peak_rss_mb, encode.speed_x, api.openai.chat.p50_s")
+    trend_parser.add_argument('--last', type=int, default=14)
+    trend_parser.set_defaults(func=_cmd_trend)
+
+    check_parser = subparsers.add_parser('check', help="Flag p50/p90 regressions against a rolling baseline")
+    check_parser.add_argument('--window', type=int, default=5)
+    check_parser.add_argument('--baseline', type=int, default=20)
+    check_parser.add_argument('--threshold', type=float, default=0.2)
+    check_parser.add_argument('--strict', action='store_true', help="Exit 1 when a regression is found")
+    check_parser.set_defaults(func=_cmd_check)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
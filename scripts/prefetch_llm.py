@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+script.txt 기반의 독립적인 LLM 요청을 동시에 실행 (asyncio)
+
+- 메타데이터 (제목/설명/챕터/썸네일 텍스트/B-roll 키워드/Shorts 제목) → temp/metadata.json
+  (Shorts 제목도 이 한 번의 요청에 포함되므로 별도 요청 없음)
+- DALL-E 썸네일 배경 → LLM 캐시 (THUMBNAIL_SOURCE=dalle일 때만)
+
+동시에 실행할 요청이 2개 미만이면 (frame 모드) 이 단계는 아무것도 하지 않고,
+메타데이터는 search_videos 단계에서 그대로 요청됩니다.
+
+결과는 각 단계가 읽는 캐시에 저장되므로, 이후 search_videos / generate_thumbnail /
+upload_youtube / extract_shorts는 네트워크 호출 없이 바로 결과를 사용합니다.
+실패한 요청은 해당 단계에서 기존처럼 동기적으로 다시 요청됩니다.
+"""
+
+import os
+import sys
+import time
+import asyncio
+
+from llm_gateway import agenerate_image, gather_calls
+from telemetry import stage
+from video_metadata import aget_video_metadata, load_script
+from generate_thumbnail import (
+    THUMBNAIL_SOURCE, THUMBNAIL_IMAGE_MODEL, THUMBNAIL_IMAGE_PARAMS, THUMBNAIL_BACKGROUND_PROMPT
+)
+
+def prefetch_llm():
+    """메타데이터 단계의 LLM 요청을 동시에 실행"""
+
+    print("\n⚡ Prefetching LLM outputs concurrently...")
+
+    if not os.path.exists('temp/script.txt'):
+        print("❌ temp/script.txt not found!")
+        sys.exit(1)
+
+    script = load_script()
+
+    # generate_thumbnail와 같은 요청 → 같은 캐시 키
+    calls = {
+        'metadata': lambda: aget_video_metadata(script),
+    }
+    # frame 모드에서는 썸네일 배경을 영상에서 고르므로 DALL-E 요청 없음
+    if THUMBNAIL_SOURCE == 'dalle':
+        calls['thumbnail_background'] = lambda: agenerate_image(
+            model=THUMBNAIL_IMAGE_MODEL,
+            prompt=THUMBNAIL_BACKGROUND_PROMPT,
+            **THUMBNAIL_IMAGE_PARAMS
+        )
+
+    # 요청이 하나뿐이면 동시 실행으로 얻는 게 없음 → 해당 단계에서 요청
+    if len(calls) < 2:
+        print(f"   ⏭️ Only {len(calls)} independent request (THUMBNAIL_SOURCE={THUMBNAIL_SOURCE}), skipping prefetch")
+        return {}
+
+    start = time.perf_counter()
+    results = asyncio.run(gather_calls(calls))
+    elapsed = time.perf_counter() - start
+
+    failed = [name for name, result in results.items() if isinstance(result, Exception)]
+
+    print(f"\n✅ Prefetch finished in {elapsed:.1f}s ({len(calls) - len(failed)}/{len(calls)} succeeded)")
+    if failed:
+        print(f"   ⚠️ Will retry in their own stages: {', '.join(failed)}")
+
+    return results
+
+if __name__ == "__main__":
+    with stage("prefetch_llm"):
+        prefetch_llm()
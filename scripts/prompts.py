@@ -0,0 +1,270 @@
+"""
+Prompt template registry.
+
+Every template keeps its long static instructions in a fixed prefix
+(system message + instruction block) and appends the variable content
+(the script, target lengths, ...) at the very end of the last message.
+Identical prefixes across runs and stages let the provider's prompt-prefix
+cache serve them; the gateway reports cached prompt tokens per call.
+"""
+
+SCRIPT_SYSTEM = 'You are a professional YouTube scriptwriter specializing in AI and future technology. Write comprehensive, detailed scripts of at least 1,200 words. Always aim for 1,300+ words. Write ONLY the narration text. Never include meta information, word counts, or section labels. Use NATURAL transitions. Make complex tech accessible and exciting.'
+
+CONTENT_STRATEGIST_SYSTEM = 'You are a YouTube content strategist.'
+
+SCRIPT_INSTRUCTIONS = """
+You are a professional YouTube scriptwriter specializing in AI and future technology content.
+
+Create a complete narration script for a 6-8 minute YouTube video about AI and future technology.
+
+CRITICAL RULES:
+1. Write ONLY the narration text that will be spoken
+2. DO NOT include any meta information like:
+   - Word counts (e.g., "200 words")
+   - Time markers (e.g., "1 minute 30 seconds")
+   - Section instructions (e.g., "This section should be...")
+   - Technical notes or comments
+3. DO NOT include section headers like "HOOK:", "INTRO:", etc.
+4. Write as one continuous, flowing narration
+5. Use NATURAL, ORGANIC transitions between ideas
+6. Speak directly to the viewer using "you" and "your"
+
+TARGET LENGTH: 1,500-1,700 words (approximately 8-9 minutes when narrated)
+
+CRITICAL LENGTH REQUIREMENTS:
+- The script MUST be at least 1,500 words minimum
+- Aim for 1,600-1,700 words for optimal 8-9 minute duration
+- Be thorough, detailed, and comprehensive in every section
+- Use concrete examples, research findings, and future predictions
+- Expand on ideas rather than condensing them
+
+CONTENT STRUCTURE (but don't label these in the script):
+
+1. HOOK (80-100 words / ~30-40 seconds):
+   - Start with a mind-blowing fact or provocative question
+   - Create curiosity about the future
+   - Make it relevant to everyday life
+   - Example: "By 2030, AI will change everything about how you work..."
+
+2. CONTEXT (150-200 words / ~60-80 seconds):
+   - Current state of the technology
+   - Recent breakthroughs or developments
+   - Why this matters NOW
+   - Real-world examples
+
+3. MAIN CONTENT (700-900 words / ~280-360 seconds):
+   - Deep dive into the technology/concept
+   - Explain how it works (simply)
+   - Future predictions for 2030
+   - Real applications and use cases
+   - Expert opinions or research findings
+   - Balance: optimism + realistic challenges
+   
+   ⭐ CRITICAL: TRANSITION NATURALLY
+   
+   GOOD TRANSITION EXAMPLES:
+   ✅ "But here's where it gets really interesting..."
+   ✅ "So what does this mean for you in 2030?"
+   ✅ "Now, imagine this scenario..."
+   ✅ "The question everyone's asking is..."
+   
+   BAD TRANSITIONS (NEVER USE):
+   ❌ "Let's transition to..."
+   ❌ "Moving on to the next section..."
+   ❌ "Now I will explain..."
+
+4. IMPACT & IMPLICATIONS (250-350 words / ~100-140 seconds):
+   - How this affects different industries
+   - Changes in daily life
+   - Opportunities and challenges
+   - What you need to know/prepare for
+
+5. CONCLUSION (80-100 words / ~30-40 seconds):
+   - Summarize the key takeaway
+   - Forward-looking statement
+   - Call to action (subscribe, comment)
+   - Leave viewer inspired and informed
+
+TONE & STYLE:
+- Informative yet accessible
+- Enthusiastic but not sensational
+- Clear explanations without jargon
+- Direct address to viewer
+- Professional yet conversational
+- Natural flow like a tech journalist
+
+TOPIC SELECTION:
+Choose ONE fascinating topic from:
+- AI breakthroughs (GPT-5, AGI progress, multimodal AI)
+- Quantum computing applications
+- Brain-computer interfaces
+- Autonomous systems (vehicles, robots, drones)
+- Space technology (Mars, space tourism, asteroid mining)
+- Metaverse and virtual worlds
+- Biotechnology and longevity
+- Renewable energy innovations
+- Smart cities and IoT
+- Future of work with AI
+
+TRANSITION PRINCIPLES:
+- Use questions to shift topics naturally
+- Use "but", "so", "now", "here's the thing" for smooth flow
+- Paint mental pictures
+- Make the listener WANT to hear what's next
+- Never announce section changes explicitly
+
+IMPORTANT REMINDERS:
+- Write ONLY what the narrator will say
+- NO technical markers, word counts, or time stamps
+- NO section labels or headers
+- ONE continuous narrative flow
+- Natural transitions between ideas
+- PRIORITIZE LENGTH - aim for 1,300+ words
+- Better to be detailed than too brief
+
+Choose a unique, timely topic that provides genuine insights about the future of technology.
+
+Begin the script now. Write ONLY the narration text in English.
+"""
+
+SCRIPT_EXPAND_INSTRUCTIONS = """The narration script at the end of this message is too short. Write NEW narration that will be inserted immediately BEFORE its final concluding paragraph.
+
+RULES:
+- Deepen the main content and the impact sections: concrete examples, research findings, real applications, predictions for 2030, realistic challenges
+- Do NOT repeat points already made and do NOT write a conclusion or call to action
+- Continue the same topic, tone and direct "you" address
+- Start with a natural transition from the preceding paragraph
+- Write ONLY narration text in paragraphs separated by blank lines; no headers, labels, word counts or time markers"""
+
+METADATA_INSTRUCTIONS = """You are the YouTube SEO expert, content strategist, thumbnail designer, B-roll researcher and Shorts editor for "Future Now", an AI & Future Technology channel.
+
+From the narration script below, produce ALL of the following fields.
+
+title:
+- 50-65 characters total
+- Must start with compelling hook words like: "AI", "Future", "2030", "Revolution", etc.
+- Include power words: "Will", "Change", "Transform", "Reveal", "Secret"
+- SEO-optimized for AI/Tech audience
+- Create curiosity without clickbait
+- Professional and credible tone
+- Examples: "AI Will Replace 80% of Jobs by 2030", "Future of Technology: What Nobody Tells You"
+
+hook_paragraph:
+- 2-3 sentences summarizing the key insight of the video
+
+key_takeaways:
+- Exactly 3 short takeaways
+
+chapters:
+- 4-6 chapters following the script flow, in script order
+- The first chapter is the introduction
+- opening_words: the first 6-10 words of the script sentence where the chapter starts, copied VERBATIM from the script
+
+hashtags:
+- 5 hashtags separated by spaces, e.g. "#AI #FutureTechnology #Innovation #TechTrends #ArtificialIntelligence"
+
+thumbnail_text:
+- 2-4 POWERFUL words, ALL CAPS, tech-focused, easy to read on mobile
+- Examples: AI REVOLUTION, FUTURE 2030, QUANTUM LEAP, NEXT LEVEL AI
+- No quotes, no long phrases, no clickbait like "Click here"
+
+thumbnail_text_alternatives:
+- 3 different alternatives to thumbnail_text for A/B testing, same rules
+
+broll_keywords:
+- 10-12 short English keywords for finding professional B-roll footage on Pexels
+- REAL, CINEMATIC tech visuals (NOT cartoons or animations)
+- Prioritize: AI interfaces, robots, futuristic cities, data centers, coding, research labs, modern architecture
+- Each keyword should work well with "cinematic" or "futuristic" modifiers
+- DIVERSE keywords to avoid repetitive footage
+- Good: "AI robot arm factory", "data center servers glowing", "programmer coding at night", "futuristic city skyline"
+- Bad: "cartoon robot", "toy technology", "abstract AI", "generic computer"
+
+shorts:
+- Exactly 3 engaging Shorts segments taken from the script
+- Each 30-60 seconds of the most captivating content (mind-blowing facts, bold predictions, controversial takes, "aha!" moments)
+- Structure: Hook (3-5 sec) → Core insight (20-40 sec) → Mini-CTA (5-10 sec)
+- title: punchy and curiosity-driven
+- script: full segment text in natural sentences
+- hook: the first sentence, copied VERBATIM from the script
+- hashtags: 3-5 viral hashtags separated by spaces"""
+
+THUMBNAIL_BACKGROUND = """
+Create a professional YouTube thumbnail background for an AI and future technology video:
+
+VISUAL STYLE:
+- Futuristic, high-tech aesthetic
+- Dramatic lighting with neon accents (blue, purple, cyan)
+- Focus on AI/robotics/digital technology imagery
+- Cinematic, eye-catching composition
+- Professional photography style
+
+SUBJECT OPTIONS (choose one):
+- AI robot or humanoid with glowing eyes
+- Futuristic cityscape with holographic displays
+- Neural network visualization with glowing nodes
+- High-tech laboratory with advanced equipment
+- Digital brain or AI consciousness representation
+
+IMPORTANT: NO TEXT in the image (text will be added separately)
+
+COLOR SCHEME:
+- Background: Deep blue, dark purple, or black
+- Accent: Neon blue, cyan, or electric purple
+- Lighting: Dramatic, high contrast
+- Modern, sleek, futuristic
+
+COMPOSITION:
+- 16:9 aspect ratio (1280x720)
+- Leave top third area clear for text overlay
+- Professional, eye-catching
+- YouTube thumbnail optimized
+
+STYLE: Futuristic, cinematic, high-tech, professional, clickable
+QUALITY: High-detail, photorealistic or stylized 3D render
+
+CRITICAL: NO TEXT, NO WORDS, NO LETTERS in the image
+The text will be added programmatically later
+"""
+
+# name → static parts; variables are appended last, in this order
+PROMPTS = {
+    'script': {
+        'system': SCRIPT_SYSTEM,
+        'instructions': SCRIPT_INSTRUCTIONS,
+        'variables': [],
+    },
+    'script_expand': {
+        'system': SCRIPT_SYSTEM,
+        'instructions': SCRIPT_EXPAND_INSTRUCTIONS,
+        'variables': ['target_words', 'script'],
+    },
+    'metadata': {
+        'system': CONTENT_STRATEGIST_SYSTEM,
+        'instructions': METADATA_INSTRUCTIONS,
+        'variables': ['script'],
+    },
+}
+
+def build_messages(name, **variables):
+    """
+    Chat messages for a registered prompt.
+
+    The system message and instruction block are byte-identical on every
+    call; the variables follow as labelled sections at the end.
+    """
+    template = PROMPTS[name]
+
+    missing = [key for key in template['variables'] if key not in variables]
+    unknown = [key for key in variables if key not in template['variables']]
+    if missing or unknown:
+        raise KeyError(f"Prompt '{name}': missing {missing}, unexpected {unknown}")
+
+    sections = [template['instructions']]
+    for key in template['variables']:
+        sections.append(f"{key.upper()}:\n{variables[key]}")
+
+    return [
+        {'role': 'system', 'content': template['system']},
+        {'role': 'user', 'content': '\n\n'.join(sections)}
+    ]
@@ -0,0 +1,242 @@
+"""
+Resumable, idempotent YouTube uploads.
+
+The resumable session URI, the last acknowledged byte offset and the video ID
+are persisted under .upload_state/ keyed by upload_key(): the workflow run ID
+plus the file name on CI, the SHA-256 of the file elsewhere. A re-run of the
+workflow renders a new (byte-different) video, so the content hash alone
+would not match; keying on the run means a retried job reuses the video ID
+instead of inserting and publishing the video again. An interrupted transfer
+is resumed only when the file's SHA-256 matches the stored one.
+
+temp/ starts empty on every CI job, so the state lives outside it; the
+workflow saves .upload_state/ with actions/cache even when the job fails and
+restores it on a re-run of the same workflow run.
+"""
+
+import os
+import json
+import time
+import random
+import hashlib
+import http.client
+
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload
+
+from telemetry import add, record_api_call, record_step
+
+STATE_DIR = os.environ.get('UPLOAD_STATE_DIR', '.upload_state')
+
+# Chunk size must be a multiple of 256 KiB
+CHUNK_GRANULARITY = 256 * 1024
+DEFAULT_CHUNK_MB = 8
+
+MAX_RETRIES = int(os.environ.get('YOUTUBE_UPLOAD_MAX_RETRIES', '10'))
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+RETRIABLE_EXCEPTIONS = (
+    httplib2.HttpLib2Error,
+    http.client.HTTPException,
+    OSError,  # ConnectionError, TimeoutError, socket errors
+)
+
+def get_chunk_size():
+    """Chunk size in bytes from YOUTUBE_UPLOAD_CHUNK_MB, rounded to 256 KiB"""
+    try:
+        chunk_mb = float(os.environ.get('YOUTUBE_UPLOAD_CHUNK_MB', DEFAULT_CHUNK_MB))
+    except ValueError:
+        chunk_mb = DEFAULT_CHUNK_MB
+
+    chunk_size = int(chunk_mb * 1024 * 1024) // CHUNK_GRANULARITY * CHUNK_GRANULARITY
+    return max(CHUNK_GRANULARITY, chunk_size)
+
+def file_sha256(path, block_size=1024 * 1024):
+    """Content hash of an upload (its idempotency key outside CI)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def upload_key(video_file, content_hash):
+    """
+    Idempotency key for an upload: GITHUB_RUN_ID plus the file name (e.g.
+    run123-final_video, run123-short_2) on CI, the content hash otherwise
+    """
+    run_id = os.environ.get('GITHUB_RUN_ID')
+    if run_id:
+        name = os.path.splitext(os.path.basename(video_file))[0]
+        return f'run{run_id}-{name}'
+    return content_hash
+
+def _state_path(key):
+    return os.path.join(STATE_DIR, f'{key}.json')
+
+def load_upload_state(key):
+    """Load persisted state for an upload key (empty dict if none)"""
+    path = _state_path(key)
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"   ⚠️ Ignoring unreadable upload state {path}: {e}")
+        return {}
+
+def save_upload_state(key, state):
+    """Atomically persist upload state so a crash never leaves a torn file"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = _state_path(key)
+    tmp_path = f'{path}.tmp'
+
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+def is_step_done(key, step):
+    """True if a post-upload step (thumbnail, playlist, ...) already ran"""
+    return step in load_upload_state(key).get('completed_steps', [])
+
+def mark_step_done(key, step):
+    """Record a post-upload step so a retried job does not repeat it"""
+    state = load_upload_state(key)
+    steps = state.setdefault('completed_steps', [])
+    if step not in steps:
+        steps.append(step)
+    save_upload_state(key, state)
+
+def _backoff(attempt, label, reason):
+    """Exponential backoff with full jitter, capped at 64 seconds"""
+    if attempt > MAX_RETRIES:
+        raise RuntimeError(f"{label} upload gave up after {MAX_RETRIES} retries ({reason})")
+
+    delay = random.uniform(0, min(64, 2 ** attempt))
+    print(f"   🔁 {label}: {reason} → retry {attempt}/{MAX_RETRIES} in {delay:.1f}s")
+    time.sleep(delay)
+
+def _resume_session(request, session_uri, offset, query_server):
+    """
+    Point a googleapiclient HttpRequest at an existing resumable session.
+
+    googleapiclient has no public API for resuming from a stored session URI.
+    HttpRequest.next_chunk() (google-api-python-client 2.x, see
+    googleapiclient/http.py) first sends an empty PUT with
+    "Content-Range: bytes */<size>" to ask the server for the committed
+    offset only while the private _in_error_state flag is set, so that flag
+    is the only way to resume safely after a restart. With query_server
+    False the request starts a fresh session from the given offset.
+    """
+    request.resumable_uri = session_uri
+    request.resumable_progress = offset
+    request._in_error_state = query_server
+
+def resumable_insert(youtube, video_file, body, part, label='Video'):
+    """
+    Upload a video with videos().insert, resuming from persisted state.
+
+    Returns (video_id, upload_key). If an earlier attempt (or an earlier
+    attempt of the same workflow run) already uploaded this video, the stored
+    video ID is returned without any network call.
+    """
+    content_hash = file_sha256(video_file)
+    key = upload_key(video_file, content_hash)
+    state = load_upload_state(key)
+
+    if state.get('video_id'):
+        print(f"   ♻️ {label}: already uploaded as {state['video_id']}, skipping")
+        return state['video_id'], key
+
+    if state.get('session_uri') and state.get('sha256') != content_hash:
+        # Re-rendered file: the stored session holds other bytes
+        print(f"   ⚠️ {label}: file changed since the interrupted upload, starting a new session")
+        state.pop('session_uri', None)
+        state['offset'] = 0
+
+    file_size = os.path.getsize(video_file)
+    state.update({
+        'file': video_file,
+        'size': file_size,
+        'sha256': content_hash,
+    })
+
+    media = MediaFileUpload(
+        video_file,
+        chunksize=get_chunk_size(),
+        resumable=True,
+        mimetype='video/*'
+    )
+    request = youtube.videos().insert(part=part, body=body, media_body=media)
+
+    if state.get('session_uri'):
+        # Ask the server for the committed offset before sending more bytes
+        _resume_session(request, state['session_uri'], state.get('offset', 0), query_server=True)
+        print(f"   ⏯️ {label}: resuming session at {state.get('offset', 0) / file_size:.0%}")
+
+    def persist_session():
+        if request.resumable_uri and (
+            request.resumable_uri != state.get('session_uri')
+            or request.resumable_progress != state.get('offset')
+        ):
+            state['session_uri'] = request.resumable_uri
+            state['offset'] = request.resumable_progress
+            save_upload_state(key, state)
+
+    response = None
+    attempt = 0
+    last_progress = -1
+    upload_start = time.perf_counter()
+    start_offset = request.resumable_progress or 0
+
+    while response is None:
+        chunk_start = time.perf_counter()
+        try:
+            status, response = request.next_chunk()
+        except HttpError as e:
+            record_api_call('youtube', 'upload_chunk', time.perf_counter() - chunk_start, ok=False)
+            code = e.resp.status
+            if code in (404, 410) and state.get('session_uri'):
+                # Session expired on the server side: start a fresh one
+                print(f"   ⚠️ {label}: upload session expired, restarting")
+                state.pop('session_uri', None)
+                state['offset'] = 0
+                save_upload_state(key, state)
+                _resume_session(request, None, 0, query_server=False)
+                start_offset = 0
+                continue
+            if code not in RETRIABLE_STATUS_CODES:
+                raise
+            persist_session()
+            attempt += 1
+            _backoff(attempt, label, f"HTTP {code}")
+            continue
+        except RETRIABLE_EXCEPTIONS as e:
+            record_api_call('youtube', 'upload_chunk', time.perf_counter() - chunk_start, ok=False)
+            persist_session()
+            attempt += 1
+            _backoff(attempt, label, f"{type(e).__name__}: {e}")
+            continue
+
+        record_api_call('youtube', 'upload_chunk', time.perf_counter() - chunk_start)
+        attempt = 0
+        persist_session()
+
+        if status:
+            progress = int(status.progress() * 100)
+            if progress != last_progress:
+                print(f"   ⏳ {label} upload progress: {progress}%")
+                last_progress = progress
+
+    video_id = response['id']
+    # Bytes actually sent by this attempt (a resumed session skips the rest)
+    sent = file_size - start_offset
+    add('bytes_uploaded', sent)
+    record_step('upload', label, time.perf_counter() - upload_start, bytes=sent, video_id=video_id)
+    state.pop('session_uri', None)
+    state['offset'] = file_size
+    state['video_id'] = video_id
+    save_upload_state(key, state)
+
+    return video_id, key
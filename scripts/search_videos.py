@@ -7,8 +7,17 @@ Pexels API로 AI/Future Tech B-roll 영상 검색
 import os
 import json
 import requests
+import math
 import random
-from openai import OpenAI
+from video_metadata import get_video_metadata
+from broll_dedupe import dedupe_candidates
+from broll_library import query_library
+from telemetry import stage, record_api_call, set_metric
+
+# create_video의 목표 길이 / Pexels 영상 하나로 채우는 평균 길이 (초)
+TARGET_DURATION = 540
+AVG_SECONDS_PER_VIDEO = 30
+MAX_PEXELS_VIDEOS = 16
 
 def extract_keywords():
     """스크립트에서 AI/Tech 키워드 추출"""
@@ -16,69 +25,59 @@ def extract_keywords():
     # temp 폴더 생성
     os.makedirs('temp', exist_ok=True)
     
-    api_key = os.environ.get('OPENAI_API_KEY')
-    if not api_key:
+    if not os.environ.get('OPENAI_API_KEY'):
         raise ValueError("❌ OPENAI_API_KEY not found!")
     
-    client = OpenAI(api_key=api_key)
+    print("🔍 Extracting AI/Tech keywords...")
     
-    # 스크립트 읽기
-    with open('temp/script.txt', 'r', encoding='utf-8') as f:
-        script = f.read()
+    # 제목/설명/썸네일/Shorts와 함께 한 번의 요청으로 생성 (temp/metadata.json)
+    metadata = get_video_metadata()
+    if not metadata or not metadata.get('broll_keywords'):
+        raise RuntimeError("❌ Keyword extraction failed!")
     
-    prompt = f"""You are a video search expert specializing in CINEMATIC AI and technology footage.
-
-Extract 10-12 short English keywords from this AI/Future Tech script for finding professional B-roll video footage on Pexels.
-
-CRITICAL REQUIREMENTS:
-- Focus on REAL, CINEMATIC tech visuals (NOT cartoons or animations)
-- Prioritize: AI interfaces, robots, futuristic cities, data centers, coding, research labs, modern architecture
-- Each keyword should work well with "cinematic" or "futuristic" modifiers
-- Avoid: toys, cartoons, abstract art, generic concepts
-- IMPORTANT: Use DIVERSE keywords to avoid repetitive footage
-
-GOOD KEYWORD EXAMPLES:
-✅ AI robot arm factory
-✅ data center servers glowing
-✅ programmer coding at night
-✅ futuristic city skyline
-✅ hologram display interface
-✅ quantum computer lab
-✅ autonomous car driving
-✅ scientist researching technology
-✅ modern glass building aerial
-✅ neural network visualization
-✅ smart city traffic night
-✅ space station interior
+    keywords = ', '.join(k.strip() for k in metadata['broll_keywords'] if k.strip())
+    print(f"✅ Keywords extracted: {keywords}")
+    
+    return keywords
 
-BAD KEYWORD EXAMPLES (AVOID):
-❌ cartoon robot
-❌ toy technology
-❌ abstract AI
-❌ generic computer
+def preview_pictures(video):
+    """검색 응답의 미리보기 이미지 URL (중복 제거용)"""
+    pictures = sorted(video.get('video_pictures') or [], key=lambda p: p.get('nr', 0))
+    return [p['picture'] for p in pictures if p.get('picture')]
 
-Script:
-{script[:1500]}
+def alternate_links(video, chosen):
+    """같은 영상의 다른 HD 렌디션 URL (느린 다운로드 hedge용, 해상도가 가까운 순)"""
+    files = [
+        f for f in video.get('video_files') or []
+        if f.get('link') and f['link'] != chosen['link'] and (f.get('width') or 0) >= 1920
+    ]
+    files.sort(key=lambda f: abs(f['width'] - (chosen.get('width') or 1920)))
+    return [f['link'] for f in files]
 
-Output ONLY the keywords separated by commas, nothing else.
-Focus on REAL, FILMABLE, CINEMATIC tech scenes with VARIETY."""
+def save_videos_json(video_urls):
+    with open('temp/videos.json', 'w', encoding='utf-8') as f:
+        json.dump(video_urls, f, indent=2, ensure_ascii=False)
 
-    print("🔍 Extracting AI/Tech keywords...")
+def search_pexels_videos(keywords):
+    """로컬 라이브러리 우선 조회 후, 부족한 만큼만 Pexels API로 다양한 영상 검색"""
     
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-        max_tokens=200
-    )
+    keyword_list = [k.strip() for k in keywords.split(',')]
     
-    keywords = response.choices[0].message.content.strip()
-    print(f"✅ Keywords extracted: {keywords}")
+    # 로컬 B-roll 라이브러리 먼저 (네트워크 없음)
+    library_videos, covered = query_library(keyword_list, TARGET_DURATION)
+    print(f"📚 Library: {sum(len(v['segments']) for v in library_videos)} clips, "
+          f"{covered:.0f}s / {TARGET_DURATION}s covered")
     
-    return keywords
-
-def search_pexels_videos(keywords):
-    """Pexels API로 다양한 영상 검색"""
+    if covered >= TARGET_DURATION:
+        save_videos_json(library_videos)
+        set_metric('library_covered_s', round(covered, 1))
+        set_metric('pexels_videos', 0)
+        print(f"\n✅ Library covers the whole video, Pexels not needed")
+        print(f"   📄 Saved: temp/videos.json")
+        return library_videos
+    
+    # 남은 길이만큼만 Pexels 검색
+    max_videos = min(MAX_PEXELS_VIDEOS, math.ceil((TARGET_DURATION - covered) / AVG_SECONDS_PER_VIDEO))
     
     api_key = os.environ.get('PEXELS_API_KEY')
     if not api_key:
@@ -86,8 +85,6 @@ def search_pexels_videos(keywords):
     
     headers = {'Authorization': api_key}
     
-    keyword_list = [k.strip() for k in keywords.split(',')]
-    
     video_urls = []
     
     print(f"🎬 Searching Pexels videos... ({len(keyword_list)} keywords)")
@@ -98,7 +95,7 @@ def search_pexels_videos(keywords):
         'tech', 'innovative', 'digital', 'advanced'
     ]
     
-    # 각 키워드당 2개 영상 = 총 16-20개
+    # 각 키워드당 2개 영상 = 최대 16개
     for keyword in keyword_list[:10]:
         modifier = random.choice(style_modifiers)
         search_query = f"{keyword} {modifier}"
@@ -118,6 +115,8 @@ def search_pexels_videos(keywords):
                 },
                 timeout=10
             )
+            record_api_call('pexels', 'search', response.elapsed.total_seconds(),
+                            ok=response.status_code == 200)
             
             if response.status_code == 200:
                 data = response.json()
@@ -142,33 +141,44 @@ def search_pexels_videos(keywords):
                             continue
                         
                         video_urls.append({
+                            'id': video.get('id'),
                             'keyword': keyword,
+                            'query': search_query,
+                            'page_url': video.get('url'),
                             'style': modifier,
                             'page': random_page,
                             'url': video_file['link'],
                             'duration': duration,
                             'width': video_file['width'],
                             'height': video_file['height'],
-                            'quality': video_file.get('quality', 'hd')
+                            'fps': video_file.get('fps'),
+                            'quality': video_file.get('quality', 'hd'),
+                            'alternates': alternate_links(video, video_file),
+                            'pictures': preview_pictures(video)
                         })
                         
                         print(f"  ✅ {keyword} ({modifier}, p{random_page}): {video_file.get('quality', 'hd').upper()}")
                         count += 1
                         
-                        if len(video_urls) >= 16:
+                        if len(video_urls) >= max_videos:
                             break
             
-            if len(video_urls) >= 16:
+            if len(video_urls) >= max_videos:
                 break
                 
         except Exception as e:
             print(f"  ⚠️ {keyword} search failed: {e}")
     
+    # 같은 영상 / 거의 같은 장면 제거 (미리보기 이미지 기준, 영상 다운로드 전)
+    # 라이브러리에 이미 있는 영상도 함께 비교
+    kept = dedupe_candidates(library_videos + video_urls)
+    video_urls = [v for v in kept if v.get('source') != 'library']
+    
     # 부족하면 추가 검색
-    if len(video_urls) < 16:
+    if len(video_urls) < max_videos:
         print(f"   ℹ️  Only {len(video_urls)} found, searching more...")
         for keyword in keyword_list[len(video_urls) // 2:]:
-            if len(video_urls) >= 16:
+            if len(video_urls) >= max_videos:
                 break
             
             random_page = random.randint(1, 5)
@@ -185,32 +195,45 @@ def search_pexels_videos(keywords):
                     },
                     timeout=10
                 )
+                record_api_call('pexels', 'search', response.elapsed.total_seconds(),
+                                ok=response.status_code == 200)
                 
                 if response.status_code == 200:
                     data = response.json()
                     for video in data['videos'][:2]:
-                        if len(video_urls) >= 16:
+                        if len(video_urls) >= max_videos:
                             break
                         
                         video_file = video['video_files'][0]
                         video_urls.append({
+                            'id': video.get('id'),
                             'keyword': keyword,
+                            'query': keyword,
+                            'page_url': video.get('url'),
                             'style': 'standard',
                             'page': random_page,
                             'url': video_file['link'],
                             'duration': video['duration'],
                             'width': video_file['width'],
-                            'height': video_file['height']
+                            'height': video_file['height'],
+                            'fps': video_file.get('fps'),
+                            'alternates': alternate_links(video, video_file),
+                            'pictures': preview_pictures(video)
                         })
                         print(f"  ✅ {keyword} (standard, p{random_page})")
             except:
                 pass
     
-    # JSON 저장
-    with open('temp/videos.json', 'w', encoding='utf-8') as f:
-        json.dump(video_urls, f, indent=2, ensure_ascii=False)
+    # 추가 검색 결과 포함 최종 중복 제거 (해시는 인덱스에 캐시됨)
+    video_urls = dedupe_candidates(library_videos + video_urls)
+    
+    # JSON 저장 (라이브러리 항목 먼저)
+    save_videos_json(video_urls)
+    set_metric('library_covered_s', round(covered, 1))
+    set_metric('pexels_videos', sum(1 for v in video_urls if v.get('source') != 'library'))
     
     print(f"\n✅ Total {len(video_urls)} videos found!")
+    print(f"   📚 Library: {sum(1 for v in video_urls if v.get('source') == 'library')}")
     print(f"   🎬 Cinematic: {sum(1 for v in video_urls if v.get('style') in style_modifiers)}")
     print(f"   📹 Standard: {sum(1 for v in video_urls if v.get('style') == 'standard')}")
     print(f"   📄 Saved: temp/videos.json")
@@ -218,5 +241,6 @@ def search_pexels_videos(keywords):
     return video_urls
 
 if __name__ == "__main__":
-    keywords = extract_keywords()
-    search_pexels_videos(keywords)
+    with stage("search_videos"):
+        keywords = extract_keywords()
+        search_pexels_videos(keywords)
@@ -0,0 +1,239 @@
+"""
+Per-stage performance telemetry, merged into one machine-readable run report.
+
+Every pipeline stage runs as its own process, so each entry point wraps its
+work in `with stage('create_video'):`. On exit the stage's wall time, CPU
+time (own and ffmpeg/ffprobe children), peak RSS, byte counters, API
+latencies, ffmpeg encode speed and sub-steps are merged into
+temp/run_report.json under stages[name]; later stages add their own entry.
+
+Inside a stage, code records what it measures:
+
+- step(kind, name) / record_step(...)  per-clip, per-part, per-upload timings
+- record_api_call(service, operation, latency)  OpenAI, Pexels, TTS, YouTube
+- record_encode(name, media_seconds, wall_seconds)  ffmpeg speed (x realtime)
+- add(counter, amount)  bytes_downloaded, bytes_uploaded, ...
+- set_metric(name, value)  clip counts, output durations, ...
+
+All recorders are thread-safe and are no-ops outside a stage, so shared
+modules can call them unconditionally. Stages and steps are also emitted as
+trace spans when PIPELINE_TRACE is set (see tracing.py).
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import resource
+import statistics
+import threading
+from contextlib import contextmanager
+from tracing import span, complete, trace_stage
+
+RUN_REPORT = os.environ.get('RUN_REPORT', 'temp/run_report.json')
+
+_lock = threading.Lock()
+_current = None
+
+def _rss_mb(usage):
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage.ru_maxrss / scale, 1)
+
+def _cpu_seconds(usage):
+    return usage.ru_utime + usage.ru_stime
+
+def current_stage():
+    """Name of the stage running in this process (None outside a stage)"""
+    return _current['name'] if _current else None
+
+def _elapsed():
+    return time.perf_counter() - _current['_start']
+
+def add(counter, amount):
+    """Add to a stage counter (e.g. bytes_downloaded)"""
+    if _current is None or not amount:
+        return
+    with _lock:
+        counters = _current['counters']
+        counters[counter] = counters.get(counter, 0) + amount
+
+def set_metric(name, value):
+    """Record a single stage-level value (clip count, output duration, ...)"""
+    if _current is None:
+        return
+    with _lock:
+        _current['metrics'][name] = value
+
+def _add_step(kind, name, wall_s, **fields):
+    if _current is None:
+        return
+    entry = {
+        'kind': kind,
+        'name': name,
+        'start_s': round(max(0.0, _elapsed() - wall_s), 3),
+        'wall_s': round(wall_s, 3),
+        **fields
+    }
+    with _lock:
+        _current['steps'].append(entry)
+
+def record_step(kind, name, wall_s, **fields):
+    """Record an already-timed sub-step that ended just now"""
+    complete(f'{kind} {name}', kind, wall_s, **fields)
+    _add_step(kind, name, wall_s, **fields)
+
+@contextmanager
+def step(kind, name, **fields):
+    """
+    Time a sub-step. Yields a dict the caller can add fields to; the step
+    is marked failed if the block raises.
+    """
+    extra = dict(fields)
+    start = time.perf_counter()
+    status = 'ok'
+    try:
+        with span(f'{kind} {name}', kind, **fields):
+            yield extra
+    except BaseException:
+        status = 'failed'
+        raise
+    finally:
+        _add_step(kind, name, time.perf_counter() - start, status=status, **extra)
+
+def record_api_call(service, operation, latency_s, ok=True, **fields):
+    """Record one external API call's latency"""
+    if _current is None:
+        return
+    with _lock:
+        calls = _current['_api'].setdefault(f'{service}.{operation}', {'latencies': [], 'errors': 0})
+        calls['latencies'].append(latency_s)
+        if not ok:
+            calls['errors'] += 1
+    record_step('api', f'{service}.{operation}', latency_s, ok=ok, **fields)
+
+def record_encode(name, media_seconds, wall_seconds, **fields):
+    """Record one ffmpeg run: media seconds produced per wall second"""
+    if _current is None:
+        return
+    with _lock:
+        encode = _current['_encode']
+        encode['media_s'] += media_seconds
+        encode['wall_s'] += wall_seconds
+        encode['runs'] += 1
+    speed = media_seconds / wall_seconds if wall_seconds > 0 else None
+    record_step('encode', name, wall_seconds, media_s=round(media_seconds, 2),
+                speed_x=round(speed, 2) if speed else None, **fields)
+
+def _summarize_api(api):
+    summary = {}
+    for key, calls in sorted(api.items()):
+        latencies = calls['latencies']
+        summary[key] = {
+            'calls': len(latencies),
+            'errors': calls['errors'],
+            'total_s': round(sum(latencies), 3),
+            'p50_s': round(statistics.median(latencies), 3),
+            'max_s': round(max(latencies), 3)
+        }
+    return summary
+
+def _load_report():
+    try:
+        with open(RUN_REPORT, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        return None
+    # A report left by an earlier CI run (or a different run id) is replaced
+    if report.get('run_id') != os.environ.get('GITHUB_RUN_ID'):
+        return None
+    return report
+
+def _write_report(record):
+    report = _load_report() or {
+        'run_id': os.environ.get('GITHUB_RUN_ID'),
+        'created': time.time(),
+        'host': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        },
+        'stages': {}
+    }
+    report['stages'][record['name']] = record
+
+    stages = report['stages'].values()
+    totals = {
+        'wall_s': round(sum(s['wall_s'] for s in stages), 3),
+        'cpu_s': round(sum(s['cpu_s'] + s['child_cpu_s'] for s in stages), 3),
+        'peak_rss_mb': max(max(s['peak_rss_mb'], s['child_peak_rss_mb']) for s in stages)
+    }
+    for s in stages:
+        for counter, value in s['counters'].items():
+            totals[counter] = totals.get(counter, 0) + value
+    report['totals'] = totals
+    report['updated'] = time.time()
+
+    os.makedirs(os.path.dirname(RUN_REPORT) or '.', exist_ok=True)
+    tmp_path = f'{RUN_REPORT}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, RUN_REPORT)
+
+@contextmanager
+def stage(name):
+    """Measure a whole pipeline stage and merge it into the run report"""
+    global _current
+    self_before = resource.getrusage(resource.RUSAGE_SELF)
+    children_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    record = {
+        'name': name,
+        'started': time.time(),
+        'counters': {},
+        'metrics': {},
+        'steps': [],
+        '_api': {},
+        '_encode': {'media_s': 0.0, 'wall_s': 0.0, 'runs': 0},
+        '_start': time.perf_counter()
+    }
+    _current = record
+    status = 'ok'
+    try:
+        with trace_stage(name):
+            yield record
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            status = 'failed'
+        raise
+    except BaseException:
+        status = 'failed'
+        raise
+    finally:
+        _current = None
+        wall = time.perf_counter() - record.pop('_start')
+        self_after = resource.getrusage(resource.RUSAGE_SELF)
+        children_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+        encode = record.pop('_encode')
+        record.update({
+            'status': status,
+            'wall_s': round(wall, 3),
+            'cpu_s': round(_cpu_seconds(self_after) - _cpu_seconds(self_before), 3),
+            'child_cpu_s': round(_cpu_seconds(children_after) - _cpu_seconds(children_before), 3),
+            'peak_rss_mb': _rss_mb(self_after),
+            'child_peak_rss_mb': _rss_mb(children_after),
+            'api': _summarize_api(record.pop('_api')),
+            'encode': {
+                'runs': encode['runs'],
+                'media_s': round(encode['media_s'], 2),
+                'wall_s': round(encode['wall_s'], 2),
+                'speed_x': round(encode['media_s'] / encode['wall_s'], 2) if encode['wall_s'] else None
+            }
+        })
+        try:
+            _write_report(record)
+            print(f"\n📈 {name}: {wall:.1f}s wall, {record['cpu_s'] + record['child_cpu_s']:.1f}s CPU, "
+                  f"peak {max(record['peak_rss_mb'], record['child_peak_rss_mb']):.0f}MB → {RUN_REPORT}")
+        except Exception as e:
+            print(f"\n⚠️ Run report not written: {e}")
@@ -0,0 +1,105 @@
+"""
+썸네일 텍스트 렌더링
+
+- 외곽선은 FreeType stroke로 한 번에 그림 (오프셋 격자 반복 draw.text 대신)
+- (경로, 크기)별 폰트 캐시 → 같은 폰트를 디스크에서 다시 읽지 않음
+- 폰트 크기는 실제 측정한 텍스트 폭 기준 이진 탐색으로 결정
+"""
+
+import os
+from functools import lru_cache
+from PIL import ImageDraw, ImageFont
+
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+]
+
+@lru_cache(maxsize=None)
+def find_font_path():
+    """사용 가능한 첫 번째 시스템 폰트 경로 (없으면 None)"""
+    for path in FONT_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    print("   ⚠️  System font not found, using default")
+    return None
+
+@lru_cache(maxsize=128)
+def load_font(size, path=None):
+    """(경로, 크기)별로 캐시된 폰트"""
+    path = path or find_font_path()
+    if path:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1: 크기 지정 불가
+        return ImageFont.load_default()
+
+def outline_width_for(font_size):
+    """폰트 크기에 비례하는 외곽선 두께 (최소 8px)"""
+    return max(8, int(font_size / 20))
+
+def measure_text(text, font, stroke_width=0):
+    """외곽선 포함 텍스트 bbox (left, top, right, bottom)"""
+    return font.getbbox(text, stroke_width=stroke_width)
+
+def fit_font_size(text, max_width, max_size, min_size):
+    """max_width 안에 들어가는 가장 큰 폰트 크기 (이진 탐색)"""
+    def fits(size):
+        left, _, right, _ = measure_text(text, load_font(size), outline_width_for(size))
+        return right - left <= max_width
+
+    if fits(max_size):
+        return max_size
+
+    best = min_size
+    low, high = min_size, max_size - 1
+    while low <= high:
+        size = (low + high) // 2
+        if fits(size):
+            best = size
+            low = size + 1
+        else:
+            high = size - 1
+    return best
+
+def draw_outlined_text(img, text, y_frac=0.25, fill=(255, 255, 255),
+                       stroke_fill=(0, 0, 0), margin_frac=0.1, max_size=None):
+    """
+    이미지에 외곽선 텍스트를 그리고 사용한 폰트 크기를 반환
+
+    y_frac: 텍스트 상단의 세로 위치 (이미지 높이 비율)
+    """
+    draw = ImageDraw.Draw(img)
+    width, height = img.size
+
+    # 여백
+    margin = int(width * margin_frac)
+    max_text_width = width - (margin * 2)
+
+    # 폰트 크기: 기본 width/10, 최소 기존 5회 축소(0.85^5)와 비슷한 수준
+    max_size = max_size or int(width / 10)
+    min_size = max(8, int(max_size * 0.44))
+    font_size = fit_font_size(text, max_text_width, max_size, min_size)
+
+    font = load_font(font_size)
+    stroke_width = outline_width_for(font_size)
+    left, _, right, _ = measure_text(text, font, stroke_width)
+    text_width = right - left
+
+    # 가로 중앙 정렬
+    x = (width - text_width) / 2
+    x = max(margin, min(x, width - margin - text_width))
+    y = height * y_frac
+
+    # 외곽선 + 본문을 한 번에 래스터화 (bbox 왼쪽 오프셋 보정)
+    draw.text(
+        (x - left, y), text, font=font, fill=fill,
+        stroke_width=stroke_width, stroke_fill=stroke_fill
+    )
+
+    return font_size
@@ -0,0 +1,151 @@
+"""
+완성된 영상에서 썸네일 배경 프레임 선택 (THUMBNAIL_SOURCE=frame, DALL-E 대체)
+
+- ffmpeg 한 번의 낮은 fps 디코딩으로 후보 프레임을 썸네일 해상도(1280x720)로 수신 (frame_reader)
+- 점수는 축소한 사본(320x180)으로 NumPy에서 한 번에 계산:
+  선명도, 대비, 색감, 상단 1/3 여백(텍스트 공간)
+- 최고 점수 프레임은 보관해 둔 배열을 그대로 배경으로 사용 (다시 seek/디코딩하지 않음)
+"""
+
+import os
+import numpy as np
+from PIL import Image
+from frame_reader import FrameReader
+from video_format import probe_stream
+
+FRAME_SOURCE_VIDEO = 'temp/final_video.mp4'
+
+# 점수 계산용 후보 해상도 (16:9)
+CANDIDATE_SIZE = (320, 180)
+SAMPLE_INTERVAL = 5.0  # 샘플링 간격 (초)
+MAX_CANDIDATES = 60    # 긴 영상은 간격을 늘려 보관하는 1280x720 프레임 수 제한 (~170MB)
+
+# 인트로/아웃트로 제외 비율
+EDGE_SKIP = 0.03
+
+# 너무 어둡거나 밝은 프레임 제외 (평균 밝기)
+MIN_BRIGHTNESS = 35
+MAX_BRIGHTNESS = 225
+
+SCORE_WEIGHTS = {
+    'sharpness': 0.35,
+    'contrast': 0.2,
+    'colorfulness': 0.25,
+    'free_space': 0.2,
+}
+
+def sample_interval(video_path):
+    """SAMPLE_INTERVAL, 영상이 길면 후보가 MAX_CANDIDATES개를 넘지 않도록 늘림"""
+    try:
+        duration = probe_stream(video_path)['duration']
+    except Exception:
+        return SAMPLE_INTERVAL
+    return max(SAMPLE_INTERVAL, duration / MAX_CANDIDATES)
+
+def sample_frames(video_path, size, interval=SAMPLE_INTERVAL):
+    """
+    ffmpeg 한 번의 디코딩으로 후보 프레임을 size로 읽고 점수용 축소본도 만듦
+
+    반환: (frames, small, timestamps) - frames: (N, H, W, 3), small: (N, 180, 320, 3) uint8
+    """
+    reader = FrameReader(video_path, fps=1 / interval, size=size)
+    frames = []
+    small = []
+    with reader:
+        for frame in reader:
+            frames.append(frame.copy())
+            small.append(np.asarray(
+                Image.fromarray(frame).resize(CANDIDATE_SIZE, Image.Resampling.BILINEAR)
+            ))
+    if not frames:
+        raise RuntimeError(f"No candidate frames decoded: {reader.error}")
+
+    timestamps = reader.timestamps[:len(frames)]
+    if len(timestamps) != len(frames):
+        timestamps = [i * interval for i in range(len(frames))]
+    return frames, np.stack(small), np.array(timestamps)
+
+def _normalize(values):
+    """후보 간 0~1 정규화 (모두 같으면 0)"""
+    low, high = values.min(), values.max()
+    if high - low < 1e-9:
+        return np.zeros_like(values)
+    return (values - low) / (high - low)
+
+def score_frames(frames):
+    """
+    후보 프레임 점수 (벡터화)
+
+    반환: (scores, metrics) - 제외된 프레임은 -inf
+    """
+    rgb = frames.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    gray = 0.299 * r + 0.587 * g + 0.114 * b
+
+    # 선명도: 라플라시안 분산
+    laplacian = (
+        gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:] +
+        gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] -
+        4 * gray[:, 1:-1, 1:-1]
+    )
+    sharpness = laplacian.var(axis=(1, 2))
+
+    # 대비: 밝기 표준편차
+    brightness = gray.mean(axis=(1, 2))
+    contrast = gray.std(axis=(1, 2))
+
+    # 색감: Hasler & Süsstrunk colorfulness
+    rg = r - g
+    yb = 0.5 * (r + g) - b
+    colorfulness = (
+        np.sqrt(rg.std(axis=(1, 2)) ** 2 + yb.std(axis=(1, 2)) ** 2) +
+        0.3 * np.sqrt(rg.mean(axis=(1, 2)) ** 2 + yb.mean(axis=(1, 2)) ** 2)
+    )
+
+    # 상단 1/3 여백: 가장자리(그래디언트)가 적을수록 텍스트 넣기 좋음
+    top = gray[:, :gray.shape[1] // 3, :]
+    edge_density = (
+        np.abs(np.diff(top, axis=2)).mean(axis=(1, 2)) +
+        np.abs(np.diff(top, axis=1)).mean(axis=(1, 2))
+    )
+
+    metrics = {
+        'sharpness': sharpness,
+        'contrast': contrast,
+        'colorfulness': colorfulness,
+        'free_space': -edge_density,
+    }
+
+    scores = sum(SCORE_WEIGHTS[name] * _normalize(values) for name, values in metrics.items())
+
+    # 검은 화면 / 하얗게 날아간 화면 / 인트로·아웃트로 제외
+    count = len(frames)
+    skip = int(count * EDGE_SKIP)
+    excluded = (brightness < MIN_BRIGHTNESS) | (brightness > MAX_BRIGHTNESS)
+    excluded[:skip] = True
+    if skip:
+        excluded[-skip:] = True
+    if excluded.all():
+        excluded[:] = False
+
+    scores = np.where(excluded, -np.inf, scores)
+    return scores, metrics
+
+def select_background_frame(video_path=FRAME_SOURCE_VIDEO, size=(1280, 720)):
+    """영상에서 썸네일 배경으로 가장 좋은 프레임을 골라 반환"""
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"{video_path} not found")
+
+    interval = sample_interval(video_path)
+    frames, small, timestamps = sample_frames(video_path, size, interval)
+
+    scores, metrics = score_frames(small)
+    best = int(np.argmax(scores))
+
+    print(f"   🎞️  Scored {len(frames)} candidate frames (every {interval:.1f}s)")
+    print(f"   🏆 Best frame: {timestamps[best]:.1f}s "
+          f"(sharpness {metrics['sharpness'][best]:.0f}, "
+          f"contrast {metrics['contrast'][best]:.0f}, "
+          f"colorfulness {metrics['colorfulness'][best]:.0f})")
+
+    return Image.fromarray(frames[best])
@@ -0,0 +1,147 @@
+"""
+A/B 테스트용 썸네일 변형 일괄 렌더링
+
+- 배경은 한 번만 디코딩/리사이즈 → 공유 메모리(shared_memory)에 RGB 픽셀로 올림
+- 워커 프로세스는 공유 메모리를 복사 없이 참조하고, 변형마다 캔버스만 복사해서 텍스트를 그림
+- 변형 = 텍스트 후보 × 레이아웃(위치/색상), THUMBNAIL_VARIANTS로 켤 때만 렌더링 (기본 1 = 끔)
+- 각 변형은 2MB 이하로 인코딩되어 temp/thumbnail_v{n}.jpg에 저장
+- v1(기본 텍스트 + 첫 레이아웃)은 temp/thumbnail.jpg와 같으므로 다시 렌더링하지 않음
+"""
+
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from PIL import Image
+from text_render import draw_outlined_text
+from jpeg_encode import encode_jpeg_under_limit
+
+VARIANTS_MANIFEST = 'temp/thumbnail_variants.json'
+
+# 텍스트 위치 / 색상 조합
+# 첫 레이아웃 = generate_thumbnail의 기본 오버레이 (상단 1/4, 흰색 + 검은색 외곽선)
+VARIANT_LAYOUTS = [
+    {'name': 'top-white', 'y_frac': 0.25, 'fill': (255, 255, 255), 'stroke_fill': (0, 0, 0)},
+    {'name': 'top-yellow', 'y_frac': 0.25, 'fill': (255, 221, 0), 'stroke_fill': (0, 0, 0)},
+    {'name': 'center-white', 'y_frac': 0.42, 'fill': (255, 255, 255), 'stroke_fill': (0, 0, 0)},
+    {'name': 'bottom-cyan', 'y_frac': 0.65, 'fill': (0, 229, 255), 'stroke_fill': (0, 0, 0)},
+    {'name': 'top-black', 'y_frac': 0.25, 'fill': (0, 0, 0), 'stroke_fill': (255, 255, 255)},
+]
+
+def get_variant_count():
+    """THUMBNAIL_VARIANTS 환경 변수, 없으면 1 (기본 썸네일만, 변형 렌더링 안 함)"""
+    value = os.environ.get('THUMBNAIL_VARIANTS')
+    if value:
+        return max(0, int(value))
+    return 1
+
+def plan_variants(texts, count):
+    """텍스트 후보와 레이아웃을 번갈아 조합한 변형 목록 (중복 없이 최대 count개)"""
+    texts = [t for t in dict.fromkeys(texts) if t]
+    if not texts:
+        return []
+
+    combos = []
+    for layout_index in range(len(VARIANT_LAYOUTS)):
+        for text_index, text in enumerate(texts):
+            # 텍스트마다 다른 레이아웃부터 시작 → 앞쪽 변형끼리 최대한 다르게
+            layout = VARIANT_LAYOUTS[(layout_index + text_index) % len(VARIANT_LAYOUTS)]
+            combos.append({'text': text, **layout})
+
+    return combos[:count]
+
+def _attach_background(shm_name, size):
+    """공유 메모리 위의 RGB 픽셀에서 텍스트를 그릴 캔버스 복사 (핸들은 바로 닫음)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # 공유 배경은 복사 없이 읽기 전용으로 참조 → 캔버스만 복사
+        return Image.frombuffer('RGB', size, shm.buf, 'raw', 'RGB', 0, 1).copy()
+    finally:
+        shm.close()
+
+def _render_variant(shm_name, size, index, variant):
+    """변형 하나를 렌더링 + 인코딩 + 저장 (워커 프로세스에서 실행)"""
+    img = _attach_background(shm_name, size)
+    font_size = draw_outlined_text(
+        img, variant['text'],
+        y_frac=variant['y_frac'],
+        fill=variant['fill'],
+        stroke_fill=variant['stroke_fill']
+    )
+
+    jpeg_data, quality = encode_jpeg_under_limit(img)
+    path = f"temp/thumbnail_v{index}.jpg"
+    with open(path, 'wb') as f:
+        f.write(jpeg_data)
+
+    return {
+        'index': index,
+        'path': path,
+        'text': variant['text'],
+        'layout': variant['name'],
+        'font_size': font_size,
+        'quality': quality,
+        'bytes': len(jpeg_data)
+    }
+
+def render_thumbnail_variants(background, texts, count=None, base=None):
+    """
+    디코딩된 배경 하나로 여러 썸네일 변형을 병렬 렌더링
+
+    background: load_background()가 반환한 RGB 이미지 (텍스트 없는 상태)
+    texts: 텍스트 후보 목록 (첫 번째가 기본 텍스트)
+    base: 이미 인코딩한 기본 썸네일 {'path', 'quality', 'bytes'} → v1로 그대로 사용
+    """
+    count = get_variant_count() if count is None else count
+    variants = plan_variants(texts, count)
+    if not variants:
+        return []
+
+    # v1 = 기본 텍스트 + 첫 레이아웃 = 기본 썸네일과 같은 이미지
+    base_result = None
+    if base and variants[0]['text'] == texts[0]:
+        base_result = {
+            'index': 1,
+            'text': variants[0]['text'],
+            'layout': variants[0]['name'],
+            **base
+        }
+
+    if background.mode != 'RGB':
+        background = background.convert('RGB')
+
+    os.makedirs('temp', exist_ok=True)
+    to_render = list(enumerate(variants, 1))[1 if base_result else 0:]
+    print(f"\n🧪 Rendering {len(to_render)} thumbnail variants...")
+
+    pixels = background.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=len(pixels))
+    try:
+        shm.buf[:len(pixels)] = pixels
+        del pixels
+
+        workers = max(1, min(len(to_render), os.cpu_count() or 1))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_render_variant, shm.name, background.size, index, variant)
+                for index, variant in to_render
+            ]
+            results = [base_result] if base_result else []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"   ⚠️ Variant failed: {e}")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    for result in results:
+        print(f"   ✅ v{result['index']}: '{result['text']}' ({result['layout']}, "
+              f"{result['bytes'] / 1024:.0f}KB, quality {result['quality']})")
+
+    with open(VARIANTS_MANIFEST, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"   📋 Manifest: {VARIANTS_MANIFEST}")
+
+    return results
@@ -0,0 +1,174 @@
+"""
+Opt-in span tracing in Trace Event Format (Perfetto / chrome://tracing).
+
+Set PIPELINE_TRACE=1 and every stage appends its spans to temp/trace.json.
+Each stage process shows up as its own process track, named after the stage
+and ordered by start time, so the whole pipeline opens as one timeline.
+
+- span(name, cat)      nested 'X' events on the calling thread (stages,
+                       telemetry steps, clip transcodes, ffmpeg runs, TTS
+                       parts, download transfers)
+- complete(name, cat)  work that was timed elsewhere and may overlap other
+                       work on the same thread (LLM/API calls, uploads,
+                       recorded downloads/encodes); emitted as async events
+                       so each lands on its own track
+
+With PIPELINE_PROFILE=1 the stage's main thread is also profiled with
+cProfile into temp/trace/<stage>.prof (open with snakeviz or pstats).
+
+Timestamps are wall-clock microseconds so separate processes line up.
+Everything is a no-op unless tracing is enabled.
+"""
+
+import os
+import json
+import time
+import itertools
+import threading
+from contextlib import contextmanager
+
+TRACE_ENABLED = os.environ.get('PIPELINE_TRACE', '') not in ('', '0')
+PROFILE_ENABLED = os.environ.get('PIPELINE_PROFILE', '') not in ('', '0')
+
+TRACE_PATH = os.environ.get('PIPELINE_TRACE_PATH', 'temp/trace.json')
+PROFILE_DIR = 'temp/trace'
+
+_lock = threading.Lock()
+_events = []
+_async_ids = itertools.count(1)
+_named_threads = set()
+
+def _now_us():
+    return time.time() * 1e6
+
+def _thread_id():
+    """Thread id, plus a thread_name metadata event the first time it is seen"""
+    thread = threading.current_thread()
+    tid = thread.ident
+    if tid not in _named_threads:
+        _named_threads.add(tid)
+        _events.append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                        'args': {'name': thread.name}})
+    return tid
+
+def _clean_args(args):
+    return {k: v for k, v in args.items() if v is not None}
+
+@contextmanager
+def span(name, cat='stage', **args):
+    """Time a block as a nested span on the current thread"""
+    if not TRACE_ENABLED:
+        yield
+        return
+
+    ts = _now_us()
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': ts,
+            'dur': (time.perf_counter() - start) * 1e6,
+            'pid': os.getpid(),
+            'args': _clean_args({**args, 'error': error})
+        }
+        with _lock:
+            event['tid'] = _thread_id()
+            _events.append(event)
+
+def complete(name, cat, duration_s, **args):
+    """Record an already-timed piece of work that ended just now"""
+    if not TRACE_ENABLED:
+        return
+
+    end = _now_us()
+    pid = os.getpid()
+    with _lock:
+        tid = _thread_id()
+        event_id = hex(pid << 32 | next(_async_ids))
+        common = {'name': name, 'cat': cat, 'id': event_id, 'pid': pid, 'tid': tid}
+        _events.append({**common, 'ph': 'b', 'ts': end - duration_s * 1e6,
+                        'args': _clean_args(args)})
+        _events.append({**common, 'ph': 'e', 'ts': end})
+
+def _load_events():
+    try:
+        with open(TRACE_PATH, 'r', encoding='utf-8') as f:
+            trace = json.load(f)
+    except (OSError, ValueError):
+        return []
+    # A trace left by an earlier CI run is replaced
+    if trace.get('otherData', {}).get('run_id') != os.environ.get('GITHUB_RUN_ID'):
+        return []
+    return trace.get('traceEvents', [])
+
+def _write_trace(stage_name):
+    pid = os.getpid()
+    previous = _load_events()
+
+    # A re-run stage replaces its earlier events
+    replaced = {pid} | {
+        e['pid'] for e in previous
+        if e.get('name') == 'process_name' and e.get('args', {}).get('name') == stage_name
+    }
+    previous = [e for e in previous if e.get('pid') not in replaced]
+    processes = sum(1 for e in previous if e.get('name') == 'process_name')
+
+    metadata = [
+        {'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0, 'args': {'name': stage_name}},
+        {'name': 'process_sort_index', 'ph': 'M', 'pid': pid, 'tid': 0,
+         'args': {'sort_index': processes}}
+    ]
+    trace = {
+        'traceEvents': previous + metadata + _events,
+        'displayTimeUnit': 'ms',
+        'otherData': {'run_id': os.environ.get('GITHUB_RUN_ID')}
+    }
+
+    os.makedirs(os.path.dirname(TRACE_PATH) or '.', exist_ok=True)
+    tmp_path = f'{TRACE_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(trace, f)
+    os.replace(tmp_path, TRACE_PATH)
+
+@contextmanager
+def trace_stage(name):
+    """Root span for a stage process; writes the trace (and profile) on exit"""
+    if not (TRACE_ENABLED or PROFILE_ENABLED):
+        yield
+        return
+
+    profiler = None
+    if PROFILE_ENABLED:
+        import cProfile
+        profiler = cProfile.Profile()
+
+    try:
+        with span(name, 'stage'):
+            if profiler:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        try:
+            if profiler:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                profile_path = os.path.join(PROFILE_DIR, f'{name}.prof')
+                profiler.dump_stats(profile_path)
+                print(f"🔬 cProfile: {profile_path}")
+            if TRACE_ENABLED:
+                with _lock:
+                    _write_trace(name)
+                print(f"🧵 Trace: {len(_events)} events → {TRACE_PATH}")
+        except Exception as e:
+            print(f"⚠️ Trace not written: {e}")
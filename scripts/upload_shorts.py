@@ -1,61 +1,21 @@
 import os
 import json
-import pickle
-from google.auth.transport.requests import Request
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google.oauth2.credentials import Credentials
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from youtube_client import get_credentials, get_worker_service, run_post_upload_ops
+from resumable_upload import resumable_insert
+from telemetry import stage
 
 # temp 폴더 생성
 os.makedirs('temp', exist_ok=True)
 
-SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+# Concurrent Shorts uploads (each worker gets its own HTTP transport)
+MAX_UPLOAD_WORKERS = int(os.environ.get('SHORTS_UPLOAD_WORKERS', '3'))
 
-def get_authenticated_service():
-    """Authenticate and return YouTube service"""
-    
-    creds = None
-    
-    # Check for existing token
-    if os.path.exists('token.pickle'):
-        with open('token.pickle', 'rb') as token:
-            creds = pickle.load(token)
-    
-    # If no valid credentials, use environment variables
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-        else:
-            # Use GitHub Secrets
-            client_id = os.environ.get('YOUTUBE_CLIENT_ID')
-            client_secret = os.environ.get('YOUTUBE_CLIENT_SECRET')
-            refresh_token = os.environ.get('YOUTUBE_REFRESH_TOKEN')
-            
-            if client_id and client_secret and refresh_token:
-                creds = Credentials(
-                    token=None,
-                    refresh_token=refresh_token,
-                    token_uri='https://oauth2.googleapis.com/token',
-                    client_id=client_id,
-                    client_secret=client_secret,
-                    scopes=SCOPES
-                )
-                creds.refresh(Request())
-            else:
-                print("❌ Error: YouTube credentials not found!")
-                return None
-        
-        # Save credentials
-        with open('token.pickle', 'wb') as token:
-            pickle.dump(creds, token)
-    
-    return build('youtube', 'v3', credentials=creds)
-
-def upload_short(youtube, video_file, title, description, playlist_id=None):
+def upload_short(creds, video_file, title, description, playlist_id=None):
     """Upload a single short to YouTube"""
     
     print(f"\n📤 Uploading: {title}")
+    youtube = get_worker_service(creds)
     
     body = {
         'snippet': {
@@ -72,22 +32,15 @@ def upload_short(youtube, video_file, title, description, playlist_id=None):
         }
     }
     
-    media = MediaFileUpload(video_file, chunksize=-1, resumable=True, mimetype='video/*')
-    
     try:
-        request = youtube.videos().insert(
+        video_id, upload_key = resumable_insert(
+            youtube,
+            video_file,
+            body,
             part='snippet,status',
-            body=body,
-            media_body=media
+            label=title[:30]
         )
         
-        response = None
-        while response is None:
-            status, response = request.next_chunk()
-            if status:
-                print(f"   ⏳ Upload progress: {int(status.progress() * 100)}%")
-        
-        video_id = response['id']
         video_url = f"https://youtube.com/shorts/{video_id}"
         
         print(f"   ✅ Uploaded successfully!")
@@ -95,28 +48,20 @@ def upload_short(youtube, video_file, title, description, playlist_id=None):
         
         # Add to playlist if specified
         if playlist_id:
-            try:
-                youtube.playlistItems().insert(
-                    part='snippet',
-                    body={
-                        'snippet': {
-                            'playlistId': playlist_id,
-                            'resourceId': {
-                                'kind': 'youtube#video',
-                                'videoId': video_id
-                            }
-                        }
-                    }
-                ).execute()
-                print(f"   ✅ Added to Shorts playlist")
-            except Exception as e:
-                print(f"   ⚠️ Playlist add failed: {e}")
+            run_post_upload_ops(
+                creds,
+                youtube,
+                video_id,
+                upload_key,
+                playlist_id=playlist_id,
+                label=f"{title[:30]}: "
+            )
         
         return video_url
         
     except Exception as e:
-        print(f"   ❌ Upload failed: {e}")
-        return None
+        print(f"   ❌ Upload failed ({title}): {e}")
+        raise
 
 def upload_shorts():
     """Upload all 3 shorts"""
@@ -124,8 +69,8 @@ def upload_shorts():
     print("🚀 Starting Shorts upload process...")
     
     # Authenticate
-    youtube = get_authenticated_service()
-    if not youtube:
+    creds = get_credentials()
+    if not creds:
         return
     
     # Load shorts metadata
@@ -141,13 +86,15 @@ def upload_shorts():
     if playlist_id:
         print(f"📋 Shorts Playlist ID: {playlist_id}")
     
-    uploaded_urls = []
+    jobs = []
+    failures = {}
     
     for i, short in enumerate(shorts, 1):
         video_file = f'temp/short_{i}.mp4'
         
         if not os.path.exists(video_file):
             print(f"\n❌ Short #{i} not found: {video_file}")
+            failures[i] = 'file not found'
             continue
         
         # Build description
@@ -166,11 +113,29 @@ def upload_shorts():
 {hashtags}
 #YouTubeShorts #TechShorts #AINews"""
         
-        # Upload
-        url = upload_short(youtube, video_file, title, description, playlist_id)
+        jobs.append((i, video_file, title, description))
+    
+    # Upload concurrently (bounded worker count)
+    results = {}
+    workers = max(1, min(MAX_UPLOAD_WORKERS, len(jobs)))
+    
+    if jobs:
+        print(f"\n⚡ Uploading {len(jobs)} shorts with {workers} workers...")
         
-        if url:
-            uploaded_urls.append(url)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(upload_short, creds, video_file, title, description, playlist_id): i
+                for i, video_file, title, description in jobs
+            }
+            
+            for future in as_completed(futures):
+                i = futures[future]
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    failures[i] = str(e)
+    
+    uploaded_urls = [results[i] for i in sorted(results)]
     
     # Save URLs
     if uploaded_urls:
@@ -178,12 +143,18 @@ def upload_shorts():
             for url in uploaded_urls:
                 f.write(url + '\n')
         
-        print(f"\n✅ Successfully uploaded {len(uploaded_urls)}/3 shorts!")
+        print(f"\n✅ Successfully uploaded {len(uploaded_urls)}/{len(shorts)} shorts!")
         print("\n🔗 Shorts URLs:")
-        for i, url in enumerate(uploaded_urls, 1):
-            print(f"   {i}. {url}")
+        for i in sorted(results):
+            print(f"   {i}. {results[i]}")
     else:
         print("\n❌ No shorts were uploaded successfully")
+    
+    if failures:
+        print(f"\n⚠️ {len(failures)} short(s) failed:")
+        for i in sorted(failures):
+            print(f"   {i}. {failures[i]}")
 
 if __name__ == '__main__':
-    upload_shorts()
+    with stage('upload_shorts'):
+        upload_shorts()
@@ -0,0 +1,95 @@
+"""
+B-roll 구간 출력 형식 (create_video / broll_library 공용)
+
+- 모든 구간은 concat demuxer + -c copy로 이어 붙임
+- concat demuxer는 첫 파일의 파라미터 세트(avcC의 SPS/PPS)와 time base로 전체를 읽음
+  → 스트림 복사한 원본은 코덱/해상도/fps뿐 아니라 프로파일/레벨까지 libx264 출력과 같아야 하고,
+    최종 병합 전에 extradata(SPS/PPS) 해시와 time base를 구간끼리 다시 비교
+- libx264 설정(프로파일/레벨/색 정보/SAR)을 고정해 재인코딩한 구간끼리는 extradata가 같음
+"""
+
+import json
+import subprocess
+
+TARGET_FORMAT = {
+    'codec': 'h264', 'profile': 'High', 'level': 40,
+    'width': 1920, 'height': 1080, 'fps': 30.0, 'pix_fmt': 'yuv420p'
+}
+
+# 재사용 오프셋에서 스트림 복사로 자를 수 있도록 고정하는 키프레임 간격 (초)
+KEYFRAME_INTERVAL = 2
+
+# 모든 구간의 mp4 time base (1/15360 = 30fps 기본값과 같음, 복사한 구간도 맞춤)
+VIDEO_TIMESCALE = 15360
+
+def encode_args(threads=0):
+    """TARGET_FORMAT으로 재인코딩하는 ffmpeg 출력 옵션 (입력/출력 경로 제외)"""
+    args = [
+        '-vf', 'scale=1920:1080:force_original_aspect_ratio=increase,crop=1920:1080,setsar=1',
+        '-r', '30',
+        '-c:v', 'libx264',
+        '-preset', 'medium',
+        '-crf', '23',
+        '-pix_fmt', 'yuv420p',
+        '-profile:v', 'high',
+        '-level:v', '4.0',
+        # 원본의 색 정보가 SPS(VUI)에 들어가지 않도록 고정 → 구간끼리 extradata 동일
+        '-colorspace', 'bt709', '-color_primaries', 'bt709', '-color_trc', 'bt709', '-color_range', 'tv',
+        '-force_key_frames', f'expr:gte(t,n_forced*{KEYFRAME_INTERVAL})',
+    ]
+    if threads:
+        args += ['-threads', str(threads)]
+    return args
+
+def probe_stream(path):
+    """길이 + 첫 영상 스트림 형식 + extradata 해시 (실패하면 예외)"""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error',
+         '-select_streams', 'v:0',
+         '-show_data_hash', 'CRC32',
+         '-show_entries',
+         'stream=codec_name,profile,level,width,height,pix_fmt,r_frame_rate,time_base,'
+         'sample_aspect_ratio,extradata_hash:format=duration',
+         '-of', 'json', path],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    data = json.loads(result.stdout)
+    stream = (data.get('streams') or [{}])[0]
+    numerator, _, denominator = stream.get('r_frame_rate', '0/1').partition('/')
+    return {
+        'duration': float(data.get('format', {}).get('duration', 0)),
+        'codec': stream.get('codec_name'),
+        'profile': stream.get('profile'),
+        'level': stream.get('level'),
+        'width': stream.get('width'),
+        'height': stream.get('height'),
+        'pix_fmt': stream.get('pix_fmt'),
+        'fps': float(numerator) / float(denominator or 1),
+        'time_base': stream.get('time_base'),
+        'sar': stream.get('sample_aspect_ratio'),
+        'extradata_hash': stream.get('extradata_hash')
+    }
+
+def describe(info):
+    return (f"{info.get('codec')} {info.get('profile')}@{info.get('level')} "
+            f"{info.get('width')}x{info.get('height')} {info.get('fps', 0):.2f}fps {info.get('pix_fmt')}")
+
+def matches_target(info):
+    """스트림 복사 후보: 코덱/프로파일/레벨/해상도/fps/픽셀 포맷이 libx264 출력과 같은지"""
+    return (
+        info.get('codec') == TARGET_FORMAT['codec']
+        and info.get('profile') == TARGET_FORMAT['profile']
+        and info.get('level') == TARGET_FORMAT['level']
+        and info.get('width') == TARGET_FORMAT['width']
+        and info.get('height') == TARGET_FORMAT['height']
+        and info.get('pix_fmt') == TARGET_FORMAT['pix_fmt']
+        and abs(info.get('fps', 0) - TARGET_FORMAT['fps']) < 0.01
+    )
+
+def concat_signature(info):
+    """-c copy concat에서 같아야 하는 값 (파라미터 세트 포함)"""
+    return tuple(info.get(key) for key in (
+        'codec', 'profile', 'level', 'width', 'height', 'pix_fmt', 'time_base', 'sar', 'extradata_hash'
+    ))
@@ -0,0 +1,224 @@
+"""
+Derived video metadata from a single structured LLM call.
+
+Title, description parts, chapters, thumbnail text, B-roll keywords and
+Shorts segments are requested together with a strict JSON schema and stored
+in temp/metadata.json together with the SHA-256 of the script they were
+derived from. Every stage that needs metadata reads that artifact; the model
+is only called again when the script changes.
+"""
+
+import os
+import json
+import hashlib
+import subprocess
+from llm_gateway import chat, achat
+from prompts import build_messages
+
+SCRIPT_PATH = 'temp/script.txt'
+METADATA_PATH = 'temp/metadata.json'
+METADATA_MODEL = 'gpt-4o-mini'
+
+METADATA_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'title': {'type': 'string'},
+        'hook_paragraph': {'type': 'string'},
+        'key_takeaways': {'type': 'array', 'items': {'type': 'string'}},
+        'chapters': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'title': {'type': 'string'},
+                    'opening_words': {'type': 'string'}
+                },
+                'required': ['title', 'opening_words'],
+                'additionalProperties': False
+            }
+        },
+        'hashtags': {'type': 'string'},
+        'thumbnail_text': {'type': 'string'},
+        'thumbnail_text_alternatives': {'type': 'array', 'items': {'type': 'string'}},
+        'broll_keywords': {'type': 'array', 'items': {'type': 'string'}},
+        'shorts': {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {
+                    'title': {'type': 'string'},
+                    'script': {'type': 'string'},
+                    'hook': {'type': 'string'},
+                    'hashtags': {'type': 'string'}
+                },
+                'required': ['title', 'script', 'hook', 'hashtags'],
+                'additionalProperties': False
+            }
+        }
+    },
+    'required': [
+        'title', 'hook_paragraph', 'key_takeaways', 'chapters', 'hashtags',
+        'thumbnail_text', 'thumbnail_text_alternatives', 'broll_keywords', 'shorts'
+    ],
+    'additionalProperties': False
+}
+
+def script_sha256(script):
+    """Hash identifying the script a metadata artifact was derived from"""
+    return hashlib.sha256(script.encode('utf-8')).hexdigest()
+
+def load_script():
+    with open(SCRIPT_PATH, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def _load_cached_metadata(content_hash):
+    if not os.path.exists(METADATA_PATH):
+        return None
+
+    try:
+        with open(METADATA_PATH, 'r', encoding='utf-8') as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if metadata.get('script_sha256') != content_hash:
+        return None
+    return metadata
+
+def _metadata_request(script):
+    """(model, messages, params) of the structured metadata request"""
+    messages = build_messages('metadata', script=script)
+    params = {
+        'response_format': {
+            'type': 'json_schema',
+            'json_schema': {
+                'name': 'video_metadata',
+                'strict': True,
+                'schema': METADATA_SCHEMA
+            }
+        },
+        'temperature': 0.7,
+        'max_tokens': 4000
+    }
+    return METADATA_MODEL, messages, params
+
+def _save_metadata(metadata, content_hash):
+    metadata['script_sha256'] = content_hash
+
+    os.makedirs(os.path.dirname(METADATA_PATH), exist_ok=True)
+    with open(METADATA_PATH, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Metadata saved: {METADATA_PATH}")
+    return metadata
+
+def get_video_metadata(script=None):
+    """
+    Return the metadata dict for the current script.
+
+    Served from temp/metadata.json when its script hash matches; otherwise
+    requested from the model and saved. Returns None if the request fails,
+    so callers can fall back to their defaults.
+    """
+    if script is None:
+        script = load_script()
+
+    content_hash = script_sha256(script)
+    metadata = _load_cached_metadata(content_hash)
+    if metadata:
+        return metadata
+
+    print("🧠 Generating video metadata (single structured request)...")
+
+    model, messages, params = _metadata_request(script)
+    try:
+        metadata = json.loads(chat(model=model, messages=messages, **params))
+    except Exception as e:
+        print(f"⚠️ Metadata generation failed: {e}")
+        return None
+
+    return _save_metadata(metadata, content_hash)
+
+async def aget_video_metadata(script=None):
+    """Async get_video_metadata() for the concurrent prefetch stage (raises on failure)"""
+    if script is None:
+        script = load_script()
+
+    content_hash = script_sha256(script)
+    metadata = _load_cached_metadata(content_hash)
+    if metadata:
+        return metadata
+
+    model, messages, params = _metadata_request(script)
+    metadata = json.loads(await achat(model=model, messages=messages, **params))
+    return _save_metadata(metadata, content_hash)
+
+def get_narration_duration(script, audio_path='temp/audio.mp3'):
+    """Audio duration via ffprobe, or a 150 wpm estimate if unavailable"""
+    if os.path.exists(audio_path):
+        try:
+            result = subprocess.run(
+                ['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                 '-of', 'default=noprint_wrappers=1:nokey=1', audio_path],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+            return float(result.stdout.strip())
+        except Exception:
+            pass
+    return len(script.split()) / 150 * 60
+
+def estimate_script_time(script, phrase, duration):
+    """Seconds into the narration where phrase starts (None if not found)"""
+    pos = script.lower().find(phrase.lower()[:50])
+    if pos == -1 or not script:
+        return None
+    return pos / len(script) * duration
+
+def format_timestamp(seconds):
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{secs:02d}"
+    return f"{minutes}:{secs:02d}"
+
+def build_chapters(metadata, script, duration):
+    """Chapter lines with timestamps from each chapter's position in the script"""
+    lines = []
+    last_time = None
+
+    for i, chapter in enumerate(metadata.get('chapters', [])):
+        if i == 0:
+            start = 0.0
+        else:
+            start = estimate_script_time(script, chapter['opening_words'], duration)
+            # YouTube requires ascending chapters at least 10 seconds long
+            if start is None or start < last_time + 10:
+                continue
+        lines.append(f"{format_timestamp(start)} - {chapter['title']}")
+        last_time = start
+
+    return lines
+
+def build_description(metadata, script):
+    """Assemble the YouTube description from metadata fields"""
+    duration = get_narration_duration(script)
+    takeaways = '\n'.join(f"• {t}" for t in metadata['key_takeaways'][:3])
+    chapters = '\n'.join(build_chapters(metadata, script, duration))
+
+    return f"""{metadata['hook_paragraph']}
+
+🔑 KEY TAKEAWAYS:
+{takeaways}
+
+📚 CHAPTERS:
+{chapters}
+
+🔔 SUBSCRIBE for daily AI & Future Tech insights!
+💡 Follow us: @FutureNow2
+
+{metadata['hashtags']}"""
+
+if __name__ == '__main__':
+    get_video_metadata()
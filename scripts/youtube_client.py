@@ -0,0 +1,211 @@
+"""
+Shared YouTube Data API client for the upload stages.
+
+- Builds the service from the discovery document bundled with
+  google-api-python-client (no discovery fetch over the network).
+- Caches the OAuth access token and its expiry as JSON (never pickle), so
+  consecutive stages reuse one token and only refresh when it is about to
+  expire. The refresh token and client secret stay in the environment and
+  are never written to disk.
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+
+import httplib2
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.http import MediaFileUpload
+from resumable_upload import is_step_done, mark_step_done
+from telemetry import add, record_api_call
+
+SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+TOKEN_URI = 'https://oauth2.googleapis.com/token'
+
+TOKEN_CACHE = os.environ.get('YOUTUBE_TOKEN_CACHE', 'token.json')
+
+# Refresh a cached token this long before it actually expires
+REFRESH_MARGIN = timedelta(minutes=5)
+
+_worker_local = threading.local()
+
+def _load_cached_token():
+    """Return (token, expiry) from the cache file, or (None, None)"""
+    if not os.path.exists(TOKEN_CACHE):
+        return None, None
+
+    try:
+        with open(TOKEN_CACHE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        # google-auth uses naive UTC datetimes for expiry
+        expiry = datetime.fromisoformat(data['expiry'])
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"⚠️ Ignoring unreadable token cache: {e}")
+        return None, None
+
+    if set(data.get('scopes', [])) != set(SCOPES):
+        return None, None
+
+    return data.get('token'), expiry
+
+def _save_cached_token(creds):
+    """Persist the access token and expiry with owner-only permissions"""
+    tmp_path = f'{TOKEN_CACHE}.tmp'
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({
+            'token': creds.token,
+            'expiry': creds.expiry.isoformat() if creds.expiry else None,
+            'scopes': SCOPES
+        }, f)
+    os.replace(tmp_path, TOKEN_CACHE)
+
+def get_credentials():
+    """Return OAuth credentials, refreshing only if the cached token is stale"""
+
+    # Use GitHub Secrets
+    client_id = os.environ.get('YOUTUBE_CLIENT_ID')
+    client_secret = os.environ.get('YOUTUBE_CLIENT_SECRET')
+    refresh_token = os.environ.get('YOUTUBE_REFRESH_TOKEN')
+
+    if not (client_id and client_secret and refresh_token):
+        print("❌ Error: YouTube credentials not found!")
+        return None
+
+    token, expiry = _load_cached_token()
+
+    creds = Credentials(
+        token=token,
+        refresh_token=refresh_token,
+        token_uri=TOKEN_URI,
+        client_id=client_id,
+        client_secret=client_secret,
+        scopes=SCOPES,
+        expiry=expiry
+    )
+
+    if token and expiry and expiry - REFRESH_MARGIN > datetime.now(timezone.utc).replace(tzinfo=None):
+        print("🔑 Using cached YouTube access token")
+        return creds
+
+    print("🔑 Refreshing YouTube access token...")
+    creds.refresh(Request())
+    _save_cached_token(creds)
+
+    return creds
+
+@lru_cache(maxsize=1)
+def _discovery_document():
+    """YouTube v3 discovery document shipped with google-api-python-client"""
+    document = get_static_doc('youtube', 'v3')
+    if document is None:
+        raise RuntimeError("Bundled youtube.v3 discovery document not found")
+    return document
+
+def build_youtube(creds, http=None):
+    """Build a YouTube service from the bundled discovery document"""
+    if http is not None:
+        return build_from_document(_discovery_document(), http=http)
+    return build_from_document(_discovery_document(), credentials=creds)
+
+def get_authenticated_service():
+    """Authenticate and return YouTube service"""
+    creds = get_credentials()
+    if not creds:
+        return None
+    return build_youtube(creds)
+
+def get_worker_service(creds):
+    """YouTube service bound to this thread's own authorized transport"""
+
+    # httplib2.Http is not thread-safe, so every worker builds its own
+    if getattr(_worker_local, 'youtube', None) is None:
+        http = AuthorizedHttp(creds, http=httplib2.Http())
+        _worker_local.youtube = build_youtube(creds, http=http)
+    return _worker_local.youtube
+
+def _set_thumbnail(creds, video_id, thumbnail_file):
+    """Thumbnail upload (media requests cannot go into a batch)"""
+    start = time.perf_counter()
+    get_worker_service(creds).thumbnails().set(
+        videoId=video_id,
+        media_body=MediaFileUpload(thumbnail_file)
+    ).execute()
+    record_api_call('youtube', 'thumbnails.set', time.perf_counter() - start)
+    add('bytes_uploaded', os.path.getsize(thumbnail_file))
+
+def run_post_upload_ops(creds, youtube, video_id, upload_key,
+                        thumbnail_file=None, playlist_id=None, label=''):
+    """
+    Run post-upload steps with as few blocking round trips as possible.
+
+    The thumbnail upload runs on its own thread and transport while the
+    non-media calls (playlist insert) go out as one batch HTTP request.
+    Steps already recorded for this upload key are skipped.
+    Returns {step: error message or None}.
+    """
+    results = {}
+    thumbnail_future = None
+    executor = None
+
+    if thumbnail_file and os.path.exists(thumbnail_file) and not is_step_done(upload_key, 'thumbnail'):
+        print(f"   📸 {label}Uploading thumbnail...")
+        executor = ThreadPoolExecutor(max_workers=1)
+        thumbnail_future = executor.submit(_set_thumbnail, creds, video_id, thumbnail_file)
+
+    batch_steps = {}
+    if playlist_id and not is_step_done(upload_key, 'playlist'):
+        batch_steps['playlist'] = youtube.playlistItems().insert(
+            part='snippet',
+            body={
+                'snippet': {
+                    'playlistId': playlist_id,
+                    'resourceId': {
+                        'kind': 'youtube#video',
+                        'videoId': video_id
+                    }
+                }
+            }
+        )
+
+    if batch_steps:
+        def callback(request_id, response, exception):
+            results[request_id] = str(exception) if exception else None
+
+        print(f"   📋 {label}Sending {len(batch_steps)} batched API call(s)...")
+        batch = youtube.new_batch_http_request(callback=callback)
+        for step, request in batch_steps.items():
+            batch.add(request, request_id=step)
+        start = time.perf_counter()
+        try:
+            batch.execute()
+            record_api_call('youtube', 'batch', time.perf_counter() - start, calls=len(batch_steps))
+        except Exception as e:
+            record_api_call('youtube', 'batch', time.perf_counter() - start, ok=False)
+            for step in batch_steps:
+                results.setdefault(step, str(e))
+
+    if thumbnail_future:
+        try:
+            thumbnail_future.result()
+            results['thumbnail'] = None
+        except Exception as e:
+            results['thumbnail'] = str(e)
+        executor.shutdown()
+
+    for step, error in results.items():
+        if error is None:
+            mark_step_done(upload_key, step)
+            print(f"   ✅ {label}{step} done")
+        else:
+            print(f"   ⚠️ {label}{step} failed: {error}")
+
+    return results